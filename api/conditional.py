@@ -0,0 +1,67 @@
+# api/conditional.py
+
+"""
+Requêtes conditionnelles (If-None-Match / If-Modified-Since) sur les taux d'une zone.
+
+L'ETag d'une réponse dérive de la version des taux de la zone de l'utilisateur (incrémentée
+après chaque commit du pipeline, voir core/latest_rates_cache.py), du chemin et des
+paramètres de la requête ; Last-Modified est la date de cette dernière modification. Un
+client qui renvoie ses validateurs reçoit un 304 sans que les taux soient lus ni sérialisés.
+Si le cache est indisponible, les réponses sont envoyées en entier, sans validateurs.
+"""
+
+import hashlib
+from functools import wraps
+from datetime import datetime, timezone
+
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from core.latest_rates_cache import get_latest_rates_state
+
+
+def _zone_state(request):
+    # Calculé une fois par requête : l'ETag et Last-Modified en dérivent tous les deux.
+    if not hasattr(request, '_zone_rates_state'):
+        zone = getattr(request.user, 'zone', None) if request.user.is_authenticated else None
+        request._zone_rates_state = (zone, *get_latest_rates_state(zone.pk)) if zone else (None, None, None)
+    return request._zone_rates_state
+
+
+def zone_rates_etag(request, *args, **kwargs):
+    zone, version, _ = _zone_state(request)
+    if version is None:
+        return None
+    query = sorted(request.GET.lists())
+    key = f"{zone.pk}:{zone.nom}:{version}:{request.path}:{query}"
+    return f'"{hashlib.sha256(key.encode("utf-8")).hexdigest()}"'
+
+
+def zone_rates_last_modified(request, *args, **kwargs):
+    _, version, modified = _zone_state(request)
+    if version is None or modified is None:
+        return None
+    return datetime.fromtimestamp(modified, tz=timezone.utc)
+
+
+def zone_rates_conditional(view_method):
+    """
+    Décorateur d'une méthode get() d'APIView : validateurs ETag / Last-Modified et 304.
+    Les réponses, propres à l'utilisateur, doivent être revalidées à chaque utilisation.
+    """
+    conditional_method = method_decorator(
+        condition(etag_func=zone_rates_etag, last_modified_func=zone_rates_last_modified)
+    )(view_method)
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        response = conditional_method(self, request, *args, **kwargs)
+        if response.status_code != 200 and response.status_code != 304:
+            # Pas de validateurs sur une erreur (paramètre invalide) : elle ne doit pas être revalidée en 304.
+            del response['ETag']
+            del response['Last-Modified']
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    return wrapper
@@ -0,0 +1,87 @@
+# api/pagination.py
+
+"""
+Pagination par curseur (keyset) de l'historique des taux, sur (date_publication, devise).
+
+Chaque page reprend strictement après la dernière ligne de la précédente, dans l'ordre de
+l'index (zone, date_publication, devise) : une page coûte la même chose quelle que soit sa
+profondeur, contrairement à un OFFSET. Le curseur est opaque pour le client ; le lien vers
+la page suivante est envoyé dans l'en-tête Link (rel="next"), le corps reste la liste des taux.
+
+Les autres tris de l'historique (devise, taux) ne sont pas paginés : une plage qui dépasse
+une page y est refusée (400) plutôt que tronquée sans le signaler au client.
+"""
+
+import base64
+import json
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Q
+
+# Taille de page par défaut (et maximale) de l'historique
+DEFAULT_HISTORY_PAGE_SIZE = 500
+
+
+def history_page_size(limit=None):
+    """Taille de page : `limit` s'il est fourni, borné par API_HISTORY_PAGE_SIZE."""
+    max_size = getattr(settings, 'API_HISTORY_PAGE_SIZE', DEFAULT_HISTORY_PAGE_SIZE)
+    return min(limit, max_size) if limit else max_size
+
+
+def unpaginated_history(queryset, limit=None):
+    """
+    Historique trié autrement que par date : retourne au plus `limit` taux, ou None si la plage
+    (ou `limit`) dépasse la taille maximale d'une page.
+    """
+    max_size = history_page_size()
+    if limit and limit <= max_size:
+        return list(queryset[:limit])
+    rates = list(queryset[:max_size + 1])
+    return rates if len(rates) <= max_size else None
+
+
+def encode_cursor(rate):
+    payload = json.dumps([rate.date_publication.isoformat(), rate.devise_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Retourne (date_publication, code devise) ; ValueError si le curseur est invalide."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        date_str, devise_id = json.loads(payload)
+        return date.fromisoformat(date_str), str(devise_id)
+    except (TypeError, ValueError) as e: # binascii.Error et JSONDecodeError sont des ValueError
+        raise ValueError(f"Curseur invalide : {cursor}") from e
+
+
+def keyset_page(request, queryset, page_size, descending=True):
+    """
+    Retourne (taux de la page, URL de la page suivante ou None) pour un queryset
+    d'ExchangeRate filtré sur une zone, à partir du paramètre 'cursor' de la requête.
+    """
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        date_publication, devise_id = decode_cursor(cursor)
+        if descending:
+            after = Q(date_publication__lt=date_publication) | Q(date_publication=date_publication, devise_id__lt=devise_id)
+        else:
+            after = Q(date_publication__gt=date_publication) | Q(date_publication=date_publication, devise_id__gt=devise_id)
+        queryset = queryset.filter(after)
+    ordering = ['-date_publication', '-devise_id'] if descending else ['date_publication', 'devise_id']
+
+    # Une ligne de plus que la page : elle indique s'il existe une page suivante.
+    rates = list(queryset.order_by(*ordering)[:page_size + 1])
+    if len(rates) <= page_size:
+        return rates, None
+    rates = rates[:page_size]
+    params = request.query_params.copy()
+    params['cursor'] = encode_cursor(rates[-1])
+    return rates, request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+
+def add_next_link(response, next_url):
+    if next_url:
+        response['Link'] = f'<{next_url}>; rel="next"'
+    return response
@@ -1,11 +1,18 @@
 # api/tests.py
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from core.models.zone_monetaire import ZoneMonetaire
 from core.models.devise import Devise
 from core.models.exchange_rate import ExchangeRate
 from core.models.activated_currency import ActivatedCurrency
+from core.models.source import Source
+from core.models.scraped_currency_raw import ScrapedCurrencyRaw
+from core.models.devise_alias import DeviseAlias
+from core.alias_resolver import bump_alias_version
+from core.pipeline import refresh_latest_exchange_rates
+from logs.models import LogEntry
 from datetime import date
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -13,11 +20,14 @@ from rest_framework.test import APIClient # Import APIClient
 
 CustomUser = get_user_model()
 
+# Cache propre aux tests (derniers taux par zone, voir core/latest_rates_cache.py)
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
 class BaseAPITestCase(TestCase):
     """
     Base class for API test cases to handle user creation and authentication.
     """
     def setUp(self):
+        cache.clear()
         self.zone_tnd = ZoneMonetaire.objects.create(nom="TND")
         self.zone_dzd = ZoneMonetaire.objects.create(nom="DZD")
 
@@ -75,6 +85,7 @@ class ExchangeRatesAPITestCase(BaseAPITestCase):
             date_publication=date(2025, 7, 20),
             is_latest=False # This is an old rate
         )
+        refresh_latest_exchange_rates([self.zone_tnd.pk])
 
 
     def test_exchange_rates_latest(self):
@@ -100,6 +111,100 @@ class ExchangeRatesAPITestCase(BaseAPITestCase):
         self.assertTrue(all(item['deviseId'] == 'USD' for item in data))
 
 
+    def test_latest_rates_are_cached_until_pipeline_commit(self):
+        url = reverse('exchange_rates') + "?orderBy=taux_normalise&direction=asc"
+        self.assertEqual([item['deviseId'] for item in self.client.get(url).json()], ['USD', 'EUR'])
+
+        # Lecture suivante : aucune requête sur les taux, servie par le cache.
+        with self.assertNumQueries(2): # Utilisateur du jeton JWT et sa zone
+            data = self.client.get(url).json()
+        self.assertEqual([item['deviseId'] for item in data], ['USD', 'EUR'])
+
+        ExchangeRate.objects.filter(devise=self.devise_usd, is_latest=True).update(taux_normalise=4)
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_latest_exchange_rates([self.zone_tnd.pk])
+        data = self.client.get(url).json()
+        self.assertEqual([item['deviseId'] for item in data], ['EUR', 'USD'])
+        self.assertEqual(data[1]['tauxNormalise'], 4.0)
+
+    def test_raw_latest_rates_filter_and_limit(self):
+        url = reverse('raw_exchange_rates') + "?currency=EUR,USD&orderBy=devise__code&direction=desc&limit=1"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['deviseId'] for item in response.json()], ['USD'])
+
+
+    def test_conditional_get_with_etag(self):
+        url = reverse('exchange_rates') + "?currency=USD"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertNotIn('no-store', response['Cache-Control']) # Pas d'en-têtes never_cache sur l'API
+
+        # Validateur identique : 304 sans lecture des taux.
+        with self.assertNumQueries(2): # Utilisateur du jeton JWT et sa zone
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        # Autres paramètres, ou taux modifiés par le pipeline : nouvel ETag.
+        self.assertNotEqual(self.client.get(reverse('exchange_rates') + "?currency=EUR")['ETag'], etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_latest_exchange_rates([self.zone_tnd.pk])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_invalid_parameters_have_no_etag(self):
+        response = self.client.get(reverse('exchange_rates') + "?direction=sideways")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header('ETag'))
+
+
+    def test_history_cursor_pagination(self):
+        ExchangeRate.objects.create(
+            devise=self.devise_eur, zone=self.zone_tnd, taux_source=3.3, multiplicateur_source=1,
+            taux_normalise=3.3, date_publication=date(2025, 7, 20)
+        )
+        url = reverse('exchange_rates') + "?startDate=2025-07-01&limit=2"
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json()), 2)
+            seen += [(item['datePublication'], item['deviseId']) for item in response.json()]
+            url = response.get('Link', '').partition('<')[2].partition('>')[0] or None
+        self.assertEqual(seen, [
+            ('2025-07-24', 'USD'), ('2025-07-24', 'EUR'), ('2025-07-20', 'USD'), ('2025-07-20', 'EUR')
+        ])
+
+        # Ordre croissant : la page suivante reprend après la dernière ligne
+        response = self.client.get(reverse('raw_exchange_rates') + "?startDate=2025-07-01&direction=asc&limit=3")
+        self.assertEqual(len(response.json()), 3)
+        next_url = response['Link'].partition('<')[2].partition('>')[0]
+        self.assertEqual([item['deviseId'] for item in self.client.get(next_url).json()], ['USD'])
+
+        self.assertEqual(self.client.get(reverse('exchange_rates') + "?startDate=2025-07-01&cursor=abc").status_code, 400)
+        self.assertEqual(self.client.get(reverse('exchange_rates') + "?cursor=abc").status_code, 400)
+
+    @override_settings(API_HISTORY_PAGE_SIZE=2)
+    def test_history_with_other_ordering_is_not_truncated(self):
+        # 3 taux dans la plage, pages de 2 : refus explicite plutôt qu'une réponse tronquée
+        url = reverse('exchange_rates') + "?startDate=2025-07-01&orderBy=taux_normalise"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("orderBy=date_publication", response.json()['error'])
+        self.assertEqual(self.client.get(reverse('raw_exchange_rates') + "?startDate=2025-07-01&orderBy=devise__code").status_code, 400)
+
+        # Plage qui tient dans une page, ou limite explicite : réponse complète
+        response = self.client.get(url + "&limit=2")
+        self.assertEqual([item['tauxNormalise'] for item in response.json()], [3.3595, 2.9056])
+        response = self.client.get(reverse('exchange_rates') + "?startDate=2025-07-21&orderBy=devise__code")
+        self.assertEqual([item['deviseId'] for item in response.json()], ['USD', 'EUR'])
+
+
 class CurrencyConversionAPITestCase(BaseAPITestCase):
     def setUp(self):
         super().setUp() # Call the parent setUp
@@ -137,6 +242,7 @@ class CurrencyConversionAPITestCase(BaseAPITestCase):
             date_publication=date(2025, 7, 24),
             is_latest=True
         )
+        refresh_latest_exchange_rates([self.zone_tnd.pk])
 
 
     def test_conversion_api(self):
@@ -180,6 +286,85 @@ class CurrencyConversionAPITestCase(BaseAPITestCase):
         self.assertIn("Taux introuvable", response.json()['error'])
 
 
+    def test_batch_conversion(self):
+        items = [
+            {"amount": 320, "fromCurrency": "DZD", "toCurrency": "EUR"},
+            {"amount": "100", "fromCurrency": "USD", "toCurrency": "EUR", "date": "2025-07-24"},
+            {"amount": 50, "fromCurrency": "USD", "date": "2025-07-24"},
+            {"amount": 10, "fromCurrency": "GBP", "toCurrency": "EUR"},
+            {"amount": -5, "fromCurrency": "USD"},
+            {"amount": 5, "fromCurrency": "USD", "date": "24/07/2025"},
+        ]
+        self.client.get(reverse('exchange_rates')) # Derniers taux de la zone mis en cache
+        logs_before = LogEntry.objects.count()
+        # Utilisateur du jeton JWT, sa zone, taux datés (une requête pour tout le lot), puis log du lot
+        # (acteur, utilisateur cible, insertion)
+        with self.assertNumQueries(6):
+            response = self.client.post(reverse('convert_currency_batch'), {"items": items}, format='json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['count'], data['errors']), (6, 3))
+        results = data['results']
+
+        # Mêmes résultats que la conversion unitaire
+        single = self.client.get(reverse('convert_currency') + "?fromCurrency=USD&toCurrency=EUR&amount=100&date=2025-07-24").json()
+        self.assertEqual(results[1]['convertedAmount'], single['convertedAmount'])
+        self.assertEqual(results[1]['exchangeRateUsed'], single['exchangeRateUsed'])
+        self.assertEqual(results[2]['toCurrency'], 'TND')
+        self.assertIn("Taux introuvable", results[3]['error'])
+        self.assertIn("positif", results[4]['error'])
+        self.assertIn("YYYY-MM-DD", results[5]['error'])
+        self.assertEqual(LogEntry.objects.count() - logs_before, 2) # Le lot, puis la conversion unitaire
+        self.assertTrue(LogEntry.objects.filter(action='API_CURRENCY_BATCH_CONVERTED').exists())
+
+    def test_batch_conversion_isolates_oversized_amounts(self):
+        items = [
+            {"amount": "1e30", "fromCurrency": "USD", "toCurrency": "EUR"},
+            {"amount": 100, "fromCurrency": "USD", "toCurrency": "EUR"},
+        ]
+        response = self.client.post(reverse('convert_currency_batch'), {"items": items}, format='json')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertIn("trop grand", results[0]['error'])
+        self.assertIn("convertedAmount", results[1])
+
+    def test_batch_conversion_requires_items(self):
+        response = self.client.post(reverse('convert_currency_batch'), {"items": []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+    def test_rate_matrix(self):
+        response = self.client.get(reverse('rate_matrix'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['currencies'], ['DZD', 'EUR', 'TND', 'USD']) # Avec la devise de la zone
+        single = self.client.get(reverse('convert_currency') + "?fromCurrency=DZD&toCurrency=EUR&amount=1").json()
+        self.assertEqual(data['matrix']['DZD']['EUR'], single['exchangeRateUsed'])
+        self.assertEqual(data['matrix']['TND']['USD'], 2.9056)
+        self.assertEqual(data['matrix']['EUR']['EUR'], 1.0)
+
+        # Matrice datée mise en cache : seules l'authentification et la zone sont lues.
+        url = reverse('rate_matrix') + "?date=2025-07-24&currency=usd,eur"
+        self.assertEqual(self.client.get(url).json()['matrix'], {
+            'EUR': {'EUR': 1.0, 'USD': data['matrix']['EUR']['USD']},
+            'USD': {'EUR': data['matrix']['USD']['EUR'], 'USD': 1.0},
+        })
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(reverse('rate_matrix') + "?date=2025-07-24").json()['matrix'], data['matrix'])
+
+        self.assertEqual(self.client.get(reverse('rate_matrix') + "?date=2024-01-01").status_code, 404)
+
+    def test_dated_rate_matrix_is_recomputed_after_pipeline_commit(self):
+        url = reverse('rate_matrix') + "?date=2025-07-24"
+        self.assertEqual(self.client.get(url).json()['matrix']['TND']['USD'], 2.9056)
+
+        # Taux de la même date réécrits (pipeline relancé dans la journée)
+        ExchangeRate.objects.filter(devise=self.devise_usd, date_publication=date(2025, 7, 24)).update(taux_normalise=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_latest_exchange_rates([self.zone_tnd.pk])
+        self.assertEqual(self.client.get(url).json()['matrix']['TND']['USD'], 3.0)
+
+
 class MyZoneCurrenciesAPITestCase(BaseAPITestCase):
     def setUp(self):
         super().setUp() # Call the parent setUp
@@ -223,6 +408,7 @@ class MyZoneCurrenciesAPITestCase(BaseAPITestCase):
             date_publication=date(2025, 7, 20),
             is_latest=False
         )
+        refresh_latest_exchange_rates([self.zone_tnd.pk])
 
 
     def test_my_zone_currencies_latest(self):
@@ -251,3 +437,35 @@ class MyZoneCurrenciesAPITestCase(BaseAPITestCase):
         self.assertFalse(any(item['code'] == 'USD' for item in data))
         self.assertFalse(any(item['code'] == 'EUR' for item in data))
 
+
+class PipelinePreviewAPITestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.usd = Devise.objects.create(code="USD", nom="US Dollar")
+        ActivatedCurrency.objects.create(zone=self.zone_tnd, devise=self.usd, is_active=True)
+        DeviseAlias.objects.create(alias="USD", devise_officielle=self.usd)
+        bump_alias_version()
+        source = Source.objects.create(
+            zone=self.zone_tnd, nom="BCT", url_source="https://example.com", scraper_filename="bct_scraper.py"
+        )
+        ScrapedCurrencyRaw.objects.create(
+            source=source, date_publication_brut=date(2025, 7, 24), nom_devise_brut="DOLLAR DES USA",
+            code_iso_brut="USD", valeur_brute=2.9056, multiplicateur_brut=1
+        )
+        self.admin_tech = CustomUser.objects.create_user(
+            email="tech@example.com", password="testpassword", role="ADMIN_TECH"
+        )
+
+    def test_pipeline_preview_for_admin_tech(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin_tech).access_token}')
+        response = self.client.get(reverse('pipeline_preview', kwargs={'zone_id': self.zone_tnd.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([rate['devise'] for rate in response.data['new']], ["USD"])
+        self.assertFalse(ExchangeRate.objects.exists())
+
+        response = self.client.get(reverse('pipeline_preview', kwargs={'zone_id': self.zone_dzd.pk}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_pipeline_preview_forbidden_for_ws_user(self):
+        response = self.client.get(reverse('pipeline_preview', kwargs={'zone_id': self.zone_tnd.pk}))
+        self.assertEqual(response.status_code, 403)
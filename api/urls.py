@@ -1,8 +1,11 @@
 from django.urls import path
 from .views.exchange_rates_view import ExchangeRatesView
 from .views.currency_convert_view import CurrencyConvertView
+from .views.currency_convert_batch_view import CurrencyConvertBatchView
 from .views.my_zone_currencies_view import MyZoneCurrenciesView
 from .views.raw_exchange_rates_view import RawExchangeRatesView 
+from .views.pipeline_preview_view import PipelinePreviewView
+from .views.rate_matrix_view import RateMatrixView
  
 
 
@@ -14,6 +17,7 @@ urlpatterns = [
 
     # 2. Conversion de Devises
     path('convert/', CurrencyConvertView.as_view(), name='convert_currency'),
+    path('convert/batch/', CurrencyConvertBatchView.as_view(), name='convert_currency_batch'),
 
     # 3. Liste des Devises Actives (Par Zone Implicite)
     path('my-zone-currencies/', MyZoneCurrenciesView.as_view(), name='my_zone_currencies'),
@@ -21,4 +25,10 @@ urlpatterns = [
     # 4. Accès aux Taux Non Normalisés (Raw Exchange Rates)
     path('raw-exchange-rates/', RawExchangeRatesView.as_view(), name='raw_exchange_rates'),
 
+    # 5. Simulation du pipeline d'une zone (ADMIN_TECH)
+    path('pipeline-preview/<int:zone_id>/', PipelinePreviewView.as_view(), name='pipeline_preview'),
+
+    # 6. Matrice des taux croisés de la zone
+    path('rate-matrix/', RateMatrixView.as_view(), name='rate_matrix'),
+
 ]
\ No newline at end of file
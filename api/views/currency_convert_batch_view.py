@@ -0,0 +1,171 @@
+# api/views/currency_convert_batch_view.py
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from core.models import ExchangeRate
+from core.latest_rates_cache import get_latest_rate_map
+from users.permissions import IsWebServiceUserOnly
+from logs.utils import log_action
+from decimal import Decimal, DecimalException, InvalidOperation
+from drf_spectacular.utils import extend_schema, OpenApiExample
+from datetime import datetime
+
+# Nombre maximal de conversions par requête
+MAX_BATCH_ITEMS = 1000
+
+
+@extend_schema(
+    request=None,
+    responses={200: None},
+    examples=[
+        OpenApiExample(
+            'Lot de conversions',
+            value={"items": [
+                {"amount": 100, "fromCurrency": "USD", "toCurrency": "EUR"},
+                {"amount": "250.50", "fromCurrency": "EUR", "date": "2025-07-24"},
+            ]},
+            request_only=True
+        )
+    ]
+)
+class CurrencyConvertBatchView(APIView):
+    """
+    API de conversion de devises par lot pour utilisateurs WS_USER.
+    Chaque élément est converti comme par /api/convert/ (mêmes règles, même arithmétique
+    Decimal). Les taux de toutes les dates demandées sont lus en une seule requête, les
+    derniers taux depuis le cache de la zone. Les erreurs sont rapportées élément par
+    élément, et le lot est journalisé une seule fois.
+    """
+    permission_classes = [IsWebServiceUserOnly]
+
+    def post(self, request, *args, **kwargs):
+        user_zone = request.user.zone
+        if not user_zone:
+            return Response({"error": "Votre compte WS_USER n'est pas associé à une zone monétaire."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        items = request.data.get('items') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Le champ 'items' doit être une liste non vide de conversions."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BATCH_ITEMS:
+            return Response({"error": f"Au plus {MAX_BATCH_ITEMS} conversions par requête."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        base_currency_code = user_zone.nom.upper()
+        conversions = [self._parse_item(item, base_currency_code) for item in items]
+
+        # Taux nécessaires : une requête pour toutes les dates, le cache pour les derniers taux
+        dated = [c for c in conversions if 'error' not in c and c['date'] and c['from'] != c['to']]
+        rates_by_date = {}
+        if dated:
+            rows = ExchangeRate.objects.filter(
+                zone=user_zone,
+                date_publication__in={c['date'] for c in dated},
+                devise_id__in={code for c in dated for code in (c['from'], c['to'])}
+            ).order_by().values_list('date_publication', 'devise_id', 'taux_normalise')
+            for date_publication, devise_id, taux_normalise in rows:
+                rates_by_date.setdefault(date_publication, {})[devise_id] = taux_normalise
+        if any('error' not in c and not c['date'] and c['from'] != c['to'] for c in conversions):
+            rates_by_date[None] = get_latest_rate_map(user_zone)
+
+        results = []
+        for index, conversion in enumerate(conversions):
+            if 'error' not in conversion:
+                conversion = self._convert(conversion, rates_by_date, base_currency_code)
+            if 'error' in conversion:
+                results.append({"index": index, "error": conversion['error']})
+                continue
+            try:
+                converted_amount = conversion['converted'].quantize(Decimal('0.01'))
+                exchange_rate_used = conversion['rate'].quantize(Decimal('0.000000001'))
+            except DecimalException:
+                # Résultat hors de la précision Decimal (montant démesuré) : erreur de cet élément seulement
+                results.append({"index": index, "error": "Le montant 'amount' est trop grand pour être converti."})
+                continue
+            results.append({
+                "index": index,
+                "fromCurrency": conversion['from'],
+                "toCurrency": conversion['to'],
+                "amount": float(conversion['amount']),
+                "convertedAmount": float(converted_amount),
+                "exchangeRateUsed": float(exchange_rate_used),
+                "source": conversion['date_str'] if conversion['date'] else "Dernier taux disponible (is_latest)"
+            })
+
+        error_count = sum(1 for result in results if 'error' in result)
+        # Journalisation du lot (une seule entrée)
+        log_action(
+            actor_id=request.user.pk,
+            action='API_CURRENCY_BATCH_CONVERTED',
+            details=f"Conversion par lot via API: {len(results)} conversion(s) pour la zone '{user_zone.nom}', "
+                    f"dont {error_count} en erreur.",
+            level='info',
+            zone_obj=user_zone,
+            target_user_id=request.user.pk
+        )
+
+        return Response({
+            "count": len(results),
+            "errors": error_count,
+            "results": results
+        }, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def _parse_item(item, base_currency_code):
+        """Valide un élément du lot ; retourne la conversion à effectuer ou {'error': ...}."""
+        if not isinstance(item, dict):
+            return {"error": "Chaque élément doit être un objet."}
+        if item.get('amount') in (None, ''):
+            return {"error": "Le champ 'amount' est requis."}
+        try:
+            amount = Decimal(str(item['amount']))
+        except InvalidOperation:
+            return {"error": "Le montant 'amount' est invalide."}
+        if not amount.is_finite() or amount <= 0:
+            return {"error": "Le montant doit être un nombre positif."}
+
+        from_currency_code = str(item.get('fromCurrency') or '').upper()
+        to_currency_code = str(item.get('toCurrency') or '').upper()
+        if not from_currency_code and not to_currency_code:
+            return {"error": "Au moins un des champs 'fromCurrency' ou 'toCurrency' doit être spécifié."}
+
+        date_str = item.get('date') or None
+        date = None
+        if date_str:
+            try:
+                date = datetime.strptime(str(date_str), '%Y-%m-%d').date()
+            except ValueError:
+                return {"error": "Format de date invalide. Utilisez YYYY-MM-DD."}
+
+        return {
+            "amount": amount,
+            "from": from_currency_code or base_currency_code,
+            "to": to_currency_code or base_currency_code,
+            "date": date,
+            "date_str": date_str,
+        }
+
+    @staticmethod
+    def _convert(conversion, rates_by_date, base_currency_code):
+        if conversion['from'] == conversion['to']:
+            return {**conversion, "rate": Decimal('1.0'), "converted": conversion['amount']}
+
+        rates = rates_by_date.get(conversion['date'], {})
+        # Taux implicite de 1 pour la devise de base de la zone
+        from_rate = Decimal('1.0') if conversion['from'] == base_currency_code else rates.get(conversion['from'])
+        to_rate = Decimal('1.0') if conversion['to'] == base_currency_code else rates.get(conversion['to'])
+        if from_rate is None or to_rate is None:
+            message = f"Taux introuvable pour {conversion['from']} ou {conversion['to']} dans votre zone."
+            if conversion['date']:
+                message += f" pour la date {conversion['date_str']}."
+            else:
+                message += " (dernier taux disponible)."
+            return {"error": message + " Vérifiez les taux disponibles."}
+
+        try:
+            exchange_rate_used = to_rate / from_rate
+        except DecimalException: # Taux nul enregistré pour la devise source
+            return {"error": f"Taux invalide pour {conversion['from']} dans votre zone."}
+        return {**conversion, "rate": exchange_rate_used, "converted": conversion['amount'] * exchange_rate_used}
@@ -4,6 +4,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from core.models import ExchangeRate, Devise
+from core.latest_rates_cache import get_latest_rate_map
 from users.permissions import IsWebServiceUserOnly
 from logs.utils import log_action
 from decimal import Decimal, InvalidOperation
@@ -103,11 +104,8 @@ class CurrencyConvertView(APIView):
                         date_publication=date
                     ).first()
                 else:
-                    rate_obj = ExchangeRate.objects.filter(
-                        devise__code=currency_code,
-                        zone=zone,
-                        is_latest=True
-                    ).first()
+                    # Derniers taux de la zone : cache (Redis) de l'instantané, sans requête en base
+                    return get_latest_rate_map(zone).get(currency_code)
                 
                 return rate_obj.taux_normalise if rate_obj else None
 
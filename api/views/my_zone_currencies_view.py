@@ -3,8 +3,9 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from core.models import ActivatedCurrency, Devise, ExchangeRate
+from core.models import ActivatedCurrency, Devise, ExchangeRate, LatestExchangeRate
 from users.permissions import IsWebServiceUserOnly
+from api.conditional import zone_rates_conditional
 from datetime import datetime
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 
@@ -24,6 +25,7 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 class MyZoneCurrenciesView(APIView):
     permission_classes = [IsWebServiceUserOnly]
 
+    @zone_rates_conditional
     def get(self, request):
         target_date_str = request.query_params.get('date')
         user_zone = request.user.zone
@@ -50,11 +52,10 @@ class MyZoneCurrenciesView(APIView):
                 is_active=True
             ).select_related('devise').values_list('devise__code', flat=True)
 
-            devise_ids = ExchangeRate.objects.filter(
+            devise_ids = LatestExchangeRate.objects.filter(
                 zone=user_zone,
-                devise__code__in=active_devise_codes,
-                is_latest=True
-            ).values_list('devise__pk', flat=True).distinct()
+                devise__code__in=active_devise_codes
+            ).values_list('devise_id', flat=True)
 
             active_devises = Devise.objects.filter(pk__in=devise_ids)
 
@@ -0,0 +1,38 @@
+# api/views/pipeline_preview_view.py
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from core.models import Source
+from core.pipeline import preview_pipeline
+from users.permissions import IsAdminTechniqueOnly
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name='zone_id',
+            type=OpenApiTypes.INT,
+            location=OpenApiParameter.PATH,
+            description="Zone monétaire dont la source doit être simulée"
+        )
+    ],
+    responses={200: None}
+)
+class PipelinePreviewView(APIView):
+    """
+    Simulation du prochain passage du pipeline pour la source d'une zone (réservé aux ADMIN_TECH) :
+    taux nouveaux, modifiés et identiques, devises non mappées et inactives. Rien n'est écrit.
+    """
+    permission_classes = [IsAdminTechniqueOnly]
+
+    def get(self, request, zone_id):
+        source = Source.objects.filter(zone_id=zone_id).first()
+        if source is None:
+            return Response({"detail": "Aucune source configurée pour cette zone."}, status=status.HTTP_404_NOT_FOUND)
+
+        preview = preview_pipeline(source.pk)
+        if preview['status'] == 'error':
+            return Response({"detail": preview['message']}, status=status.HTTP_404_NOT_FOUND)
+        return Response(preview, status=status.HTTP_200_OK)
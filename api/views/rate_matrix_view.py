@@ -0,0 +1,68 @@
+# api/views/rate_matrix_view.py
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from core.rate_matrix import get_rate_matrix
+from users.permissions import IsWebServiceUserOnly
+from api.conditional import zone_rates_conditional
+from datetime import datetime
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name='date', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY,
+            description="Date des taux (YYYY-MM-DD). Si omis, les derniers taux disponibles sont utilisés."
+        ),
+        OpenApiParameter(
+            name='currency', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+            description="Codes ISO séparés par des virgules pour restreindre la matrice (ex: USD,EUR,TND)."
+        ),
+    ],
+    responses={200: None}
+)
+class RateMatrixView(APIView):
+    """
+    Matrice des taux croisés de la zone du WS_USER : matrix[from][to] est le taux
+    exchangeRateUsed que renverrait /api/convert/ pour cette paire.
+    """
+    permission_classes = [IsWebServiceUserOnly]
+
+    @zone_rates_conditional
+    def get(self, request):
+        date_str = request.query_params.get('date')
+        currency_codes_str = request.query_params.get('currency')
+
+        user_zone = request.user.zone
+        if not user_zone:
+            return Response({"detail": "Votre compte WS_USER n'est pas associé à une zone monétaire."}, status=status.HTTP_403_FORBIDDEN)
+
+        date = None
+        if date_str:
+            try:
+                date = datetime.strptime(date_str, "%Y-%m-%d").date()
+            except ValueError:
+                return Response({"error": "Format de date invalide. Utilisez YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+
+        currency_codes = None
+        if currency_codes_str:
+            currency_codes = [code.strip().upper() for code in currency_codes_str.split(',') if code.strip()]
+
+        matrix = get_rate_matrix(user_zone, date=date, currency_codes=currency_codes)
+        if not matrix:
+            message = "Aucun taux disponible dans votre zone"
+            message += f" pour la date {date_str}." if date_str else "."
+            return Response({"error": message}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "zoneId": user_zone.pk,
+            "zoneName": user_zone.nom,
+            "source": date_str if date_str else "Dernier taux disponible (is_latest)",
+            "currencies": sorted(matrix),
+            "matrix": {
+                from_code: {to_code: float(rate) for to_code, rate in row.items()}
+                for from_code, row in matrix.items()
+            }
+        }, status=status.HTTP_200_OK)
@@ -4,7 +4,10 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from core.models import ExchangeRate
+from core.latest_rates_cache import select_latest_rates
 from users.permissions import IsWebServiceUserOnly
+from api.conditional import zone_rates_conditional
+from api.pagination import history_page_size, keyset_page, unpaginated_history, add_next_link
 from datetime import datetime
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 
@@ -17,12 +20,14 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
         OpenApiParameter(name='limit', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY),
         OpenApiParameter(name='orderBy', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY),
         OpenApiParameter(name='direction', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY),
+        OpenApiParameter(name='cursor', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY),
     ],
     responses={200: None}
 )
 class RawExchangeRatesView(APIView):
     permission_classes = [IsWebServiceUserOnly]
 
+    @zone_rates_conditional
     def get(self, request):
         currency_codes_str = request.query_params.get('currency')
         start_date_str = request.query_params.get('startDate')
@@ -30,6 +35,7 @@ class RawExchangeRatesView(APIView):
         limit = request.query_params.get('limit')
         order_by = request.query_params.get('orderBy', 'date_publication')
         direction = request.query_params.get('direction', 'desc')
+        cursor = request.query_params.get('cursor')
 
         user_zone = request.user.zone
         if not user_zone:
@@ -37,6 +43,7 @@ class RawExchangeRatesView(APIView):
 
         queryset = ExchangeRate.objects.filter(zone=user_zone)
 
+        currency_codes = None
         if currency_codes_str:
             currency_codes = [code.strip().upper() for code in currency_codes_str.split(',')]
             queryset = queryset.filter(devise__code__in=currency_codes)
@@ -53,35 +60,54 @@ class RawExchangeRatesView(APIView):
                     queryset = queryset.filter(date_publication__lte=end_date)
                 except ValueError:
                     return Response({"error": "Date invalide pour 'endDate'."}, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            queryset = queryset.filter(is_latest=True)
 
         if order_by not in ['date_publication', 'devise__code', 'taux_source', 'multiplicateur_source']:
             return Response({"error": "Champ 'orderBy' invalide."}, status=status.HTTP_400_BAD_REQUEST)
-        if direction == 'desc':
-            order_by = f'-{order_by}'
-        elif direction != 'asc':
+        if direction not in ('asc', 'desc'):
             return Response({"error": "Direction invalide."}, status=status.HTTP_400_BAD_REQUEST)
 
-        queryset = queryset.order_by(order_by)
-
         if limit:
             try:
                 limit = int(limit)
                 if limit <= 0:
                     raise ValueError
-                queryset = queryset[:limit]
             except ValueError:
                 return Response({"error": "Valeur 'limit' invalide."}, status=status.HTTP_400_BAD_REQUEST)
 
+        if cursor and (not start_date_str or order_by != 'date_publication'):
+            return Response({"error": "Le paramètre 'cursor' n'est valable qu'avec 'startDate' et le tri par date_publication."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        next_url = None
+        if start_date_str and order_by == 'date_publication':
+            # Historique : pagination par curseur sur (date_publication, devise), lien 'next' dans l'en-tête Link
+            try:
+                queryset, next_url = keyset_page(request, queryset, history_page_size(limit), descending=direction == 'desc')
+            except ValueError:
+                return Response({"error": "Paramètre 'cursor' invalide."}, status=status.HTTP_400_BAD_REQUEST)
+        elif start_date_str:
+            queryset = unpaginated_history(queryset.order_by(f'-{order_by}' if direction == 'desc' else order_by), limit)
+            if queryset is None:
+                return Response(
+                    {"error": f"La plage demandée dépasse {history_page_size()} taux : utilisez orderBy=date_publication "
+                              "(pagination par curseur) ou réduisez la plage de dates."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            # Sans plage de dates : derniers taux de la zone, servis par le cache (Redis) de l'instantané
+            # LatestExchangeRate, invalidé par le pipeline (voir core/latest_rates_cache.py).
+            queryset = select_latest_rates(
+                user_zone, currency_codes, order_by=order_by, descending=direction == 'desc', limit=limit or None
+            )
+
         results = [{
-            "deviseId": rate.devise.code,
+            "deviseId": rate.devise_id, # La clé primaire de Devise est son code ISO
             "tauxSource": float(rate.taux_source),
             "multiplicateurSource": rate.multiplicateur_source,
             "datePublication": rate.date_publication.strftime("%Y-%m-%d"),
             "isLatest": rate.is_latest,
-            "zoneId": rate.zone.pk,
-            "zoneName": rate.zone.nom
+            "zoneId": user_zone.pk,
+            "zoneName": user_zone.nom
         } for rate in queryset]
 
-        return Response(results, status=status.HTTP_200_OK)
+        return add_next_link(Response(results, status=status.HTTP_200_OK), next_url)
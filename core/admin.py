@@ -1,8 +1,9 @@
 from django.contrib import admin
 from .models import (
     ZoneMonetaire, Source, Devise, DeviseAlias,
-    ScrapedCurrencyRaw, ActivatedCurrency, ExchangeRate
+    ScrapedCurrencyRaw, ActivatedCurrency, ExchangeRate, LatestExchangeRate, PipelineRun, SourceHealth
 )
+from .alias_resolver import bump_alias_version
 
 # Enregistrement des modèles dans l'interface d'administration
 
@@ -16,8 +17,8 @@ class ZoneMonetaireAdmin(admin.ModelAdmin):
 # Admin pour Source
 @admin.register(Source)
 class SourceAdmin(admin.ModelAdmin):
-    list_display = ('zone', 'nom', 'url_source', 'scraper_filename', 'periodic_task', 'date_creation')
-    list_filter = ('scraper_filename', 'date_creation')
+    list_display = ('zone', 'nom', 'url_source', 'scraper_filename', 'moteur_pipeline', 'periodic_task', 'date_creation')
+    list_filter = ('scraper_filename', 'moteur_pipeline', 'date_creation')
     search_fields = ('nom', 'url_source', 'zone__nom')
     raw_id_fields = ('periodic_task',) # Pour un sélecteur plus propre si beaucoup de tâches
 
@@ -34,6 +35,25 @@ class DeviseAliasAdmin(admin.ModelAdmin):
     list_filter = ('devise_officielle',)
     search_fields = ('alias', 'devise_officielle__code', 'devise_officielle__nom')
 
+    # Toute écriture sur les alias invalide l'index partagé par les workers et le web,
+    # ainsi que les empreintes des derniers lots scrapés.
+    def _aliases_changed(self):
+        from scrapers.tasks import reset_batch_fingerprints # Import local : scrapers dépend déjà de core
+        bump_alias_version()
+        reset_batch_fingerprints()
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self._aliases_changed()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self._aliases_changed()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        self._aliases_changed()
+
 # Admin pour ScrapedCurrencyRaw
 @admin.register(ScrapedCurrencyRaw)
 class ScrapedCurrencyRawAdmin(admin.ModelAdmin):
@@ -64,3 +84,25 @@ class ExchangeRateAdmin(admin.ModelAdmin):
     search_fields = ('zone__nom', 'devise__code', 'devise__nom')
     readonly_fields = ('date_creation_interne',) # Le taux final est créé automatiquement
     # Pour un graphique ou une vue plus complexe, on pourrait utiliser des filtres personnalisés ou un change_list_template
+
+# Admin pour l'instantané des derniers taux (maintenu par le pipeline, lecture seule)
+@admin.register(LatestExchangeRate)
+class LatestExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ('devise', 'zone', 'date_publication', 'taux_normalise', 'date_maj')
+    list_filter = ('zone',)
+    search_fields = ('zone__nom', 'devise__code', 'devise__nom')
+    readonly_fields = ('date_maj',)
+
+# Admin pour les traces d'exécution du pipeline (écrites automatiquement)
+@admin.register(PipelineRun)
+class PipelineRunAdmin(admin.ModelAdmin):
+    list_display = ('started_at', 'source', 'kind', 'status', 'duration_ms', 'query_count')
+    list_filter = ('kind', 'status', 'source')
+    readonly_fields = ('source', 'kind', 'status', 'started_at', 'duration_ms', 'query_count', 'stages', 'rows', 'message')
+
+# Admin pour la santé des sources (maintenue par les tâches des scrapers)
+@admin.register(SourceHealth)
+class SourceHealthAdmin(admin.ModelAdmin):
+    list_display = ('source', 'etat_circuit', 'echecs_consecutifs', 'derniere_reussite', 'latence_moyenne_ms', 'circuit_ouvert_jusqua')
+    list_filter = ('etat_circuit',)
+    readonly_fields = ('source', 'derniere_reussite', 'dernier_echec', 'derniere_erreur', 'latence_moyenne_ms')
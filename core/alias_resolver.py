@@ -0,0 +1,97 @@
+# core/alias_resolver.py
+
+import sys
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import DeviseAlias
+
+ALIAS_VERSION_CACHE_KEY = 'core:alias_index:version'
+
+# Index propre au processus (worker Celery ou worker gunicorn), partagé par tous les appels.
+_index_lock = threading.Lock()
+_alias_index = None
+_alias_index_version = None
+
+
+def _new_version_seed():
+    # Point de départ quand le compteur a disparu du cache (redémarrage, éviction) :
+    # toujours supérieur aux versions déjà distribuées, pour ne jamais en réutiliser une.
+    return time.time_ns()
+
+
+def get_alias_version():
+    """
+    Retourne la version courante de la table des alias, partagée entre tous les processus
+    via le cache (Redis). Retourne None si le cache est indisponible.
+    """
+    try:
+        version = cache.get(ALIAS_VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(ALIAS_VERSION_CACHE_KEY, _new_version_seed(), timeout=None)
+            version = cache.get(ALIAS_VERSION_CACHE_KEY)
+        return version
+    except Exception as e:
+        print(f"[alias_resolver]  Cache indisponible : {e}", file=sys.stderr)
+        return None
+
+
+def _increment_alias_version():
+    try:
+        try:
+            cache.incr(ALIAS_VERSION_CACHE_KEY)
+        except ValueError:
+            # Compteur absent du cache : on repart d'une valeur jamais distribuée.
+            cache.set(ALIAS_VERSION_CACHE_KEY, _new_version_seed(), timeout=None)
+    except Exception as e:
+        print(f"[alias_resolver]  Impossible d'incrémenter la version des alias : {e}", file=sys.stderr)
+
+
+def bump_alias_version():
+    """
+    Signale à tous les processus que la table DeviseAlias a changé.
+    À appeler après chaque écriture sur les alias (ManageAliasView, admin Django).
+    La version est incrémentée tout de suite puis à nouveau après le commit, pour qu'un
+    processus ayant rechargé l'index entre les deux ne garde pas une copie périmée.
+    """
+    _increment_alias_version()
+    transaction.on_commit(_increment_alias_version)
+
+
+def get_alias_index():
+    """
+    Retourne l'index {alias en MAJUSCULES: Devise officielle}.
+    L'index n'est rechargé depuis la base que si la version partagée a changé depuis
+    le dernier chargement de ce processus (ou si le cache est indisponible).
+    """
+    global _alias_index, _alias_index_version
+
+    # La version est lue AVANT le chargement : une écriture concurrente fera
+    # forcément changer la version et provoquera un rechargement au prochain appel.
+    version = get_alias_version()
+    with _index_lock:
+        if _alias_index is None or version is None or version != _alias_index_version:
+            _alias_index = {
+                alias.alias.upper(): alias.devise_officielle
+                for alias in DeviseAlias.objects.select_related('devise_officielle')
+            }
+            _alias_index_version = version
+        return _alias_index
+
+
+def resolve_alias(*raw_identifiers, alias_index=None):
+    """
+    Retourne la Devise officielle du premier identifiant brut (nom, code ISO...) connu
+    de l'index, ou None. La comparaison ignore la casse.
+    """
+    if alias_index is None:
+        alias_index = get_alias_index()
+    for raw_identifier in raw_identifiers:
+        if raw_identifier:
+            devise = alias_index.get(raw_identifier.upper())
+            if devise is not None:
+                return devise
+    return None
@@ -0,0 +1,130 @@
+# core/latest_rates_cache.py
+
+"""
+Cache (Redis) des derniers taux de chaque zone, lus par l'API sans plage de dates.
+
+Le contenu de l'instantané LatestExchangeRate d'une zone est mis en cache à la première
+lecture, sous une clé qui contient la version des derniers taux de la zone. Le pipeline
+incrémente cette version après le commit de chaque écriture de l'instantané
+(invalidate_latest_rates) : les lectures suivantes rechargent la zone depuis la base, et une
+lecture concurrente qui aurait lu l'ancien contenu l'enregistre sous l'ancienne version,
+qui n'est plus jamais lue. Si le cache est indisponible, les taux sont lus en base.
+
+La version et la date de la dernière invalidation servent aussi de validateurs HTTP
+(ETag, Last-Modified) aux réponses de l'API sur les taux de la zone (voir api/conditional.py) :
+elles changent aussi quand une devise est activée ou désactivée dans la zone.
+"""
+
+import sys
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import LatestExchangeRate
+
+LATEST_RATES_VERSION_KEY = 'core:latest_rates:version:{zone_id}'
+LATEST_RATES_MODIFIED_KEY = 'core:latest_rates:modified:{zone_id}'
+LATEST_RATES_KEY = 'core:latest_rates:{zone_id}:{version}'
+# Durée de vie des copies (filet de sécurité : elles sont invalidées par version)
+DEFAULT_LATEST_RATES_CACHE_TTL = 86400
+LATEST_RATE_FIELDS = ['devise_id', 'date_publication', 'taux_source', 'multiplicateur_source', 'taux_normalise']
+
+
+def _new_version_seed():
+    # Comme pour l'index des alias : jamais inférieure à une version déjà distribuée.
+    return time.time_ns()
+
+
+def get_latest_rates_state(zone_id):
+    """
+    Retourne (version, date de modification en secondes depuis l'epoch) des derniers taux de
+    la zone, partagées entre tous les processus via le cache, ou (None, None) si le cache est
+    indisponible. Sans trace dans le cache (redémarrage, éviction), la zone est considérée
+    modifiée maintenant : les clients rechargeront les taux, jamais l'inverse.
+    """
+    keys = [LATEST_RATES_VERSION_KEY.format(zone_id=zone_id), LATEST_RATES_MODIFIED_KEY.format(zone_id=zone_id)]
+    try:
+        state = cache.get_many(keys)
+        if len(state) < len(keys):
+            cache.add(keys[0], _new_version_seed(), timeout=None)
+            cache.add(keys[1], time.time(), timeout=None)
+            state = cache.get_many(keys)
+        return state.get(keys[0]), state.get(keys[1])
+    except Exception as e:
+        print(f"[latest_rates_cache]  Cache indisponible : {e}", file=sys.stderr)
+        return None, None
+
+
+def get_latest_rates_version(zone_id):
+    """Version courante des derniers taux de la zone (None si le cache est indisponible)."""
+    return get_latest_rates_state(zone_id)[0]
+
+
+def _increment_versions(zone_ids):
+    for zone_id in zone_ids:
+        key = LATEST_RATES_VERSION_KEY.format(zone_id=zone_id)
+        try:
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, _new_version_seed(), timeout=None)
+            cache.set(LATEST_RATES_MODIFIED_KEY.format(zone_id=zone_id), time.time(), timeout=None)
+        except Exception as e:
+            print(f"[latest_rates_cache]  Impossible d'invalider les taux de la zone {zone_id} : {e}", file=sys.stderr)
+
+
+def invalidate_latest_rates(zone_ids):
+    """
+    Signale que les taux de ces zones (instantané des derniers taux, devises actives) ont
+    changé. La version n'est incrémentée qu'après le commit de la transaction en cours (tout
+    de suite hors transaction) : un pipeline annulé n'invalide rien.
+    """
+    zone_ids = list(zone_ids)
+    if zone_ids:
+        transaction.on_commit(lambda: _increment_versions(zone_ids))
+
+
+def _load_latest_rates(zone_id):
+    return list(LatestExchangeRate.objects.filter(zone_id=zone_id).values(*LATEST_RATE_FIELDS))
+
+
+def get_latest_rates(zone):
+    """
+    Retourne les derniers taux de la zone (instances LatestExchangeRate non enregistrées,
+    sans ordre particulier), depuis le cache ou, à défaut, depuis la base.
+    """
+    version = get_latest_rates_version(zone.pk)
+    rows = None
+    if version is not None:
+        key = LATEST_RATES_KEY.format(zone_id=zone.pk, version=version)
+        try:
+            rows = cache.get(key)
+            if rows is None:
+                rows = _load_latest_rates(zone.pk)
+                cache.set(key, rows, timeout=getattr(settings, 'LATEST_RATES_CACHE_TTL', DEFAULT_LATEST_RATES_CACHE_TTL))
+        except Exception as e:
+            print(f"[latest_rates_cache]  Cache indisponible : {e}", file=sys.stderr)
+    if rows is None:
+        rows = _load_latest_rates(zone.pk)
+    return [LatestExchangeRate(zone=zone, **row) for row in rows]
+
+
+def select_latest_rates(zone, currency_codes=None, order_by='date_publication', descending=True, limit=None):
+    """
+    Derniers taux de la zone filtrés par devises, triés (champ de LatestExchangeRate, ou
+    'devise__code') et limités comme le ferait la requête équivalente sur LatestExchangeRate.
+    """
+    rates = get_latest_rates(zone)
+    if currency_codes:
+        currency_codes = set(currency_codes)
+        rates = [rate for rate in rates if rate.devise_id in currency_codes]
+    sort_field = 'devise_id' if order_by == 'devise__code' else order_by # Le code ISO est la clé de Devise
+    rates.sort(key=lambda rate: getattr(rate, sort_field), reverse=descending)
+    return rates[:limit] if limit else rates
+
+
+def get_latest_rate_map(zone):
+    """Retourne {code devise: dernier taux normalisé} pour la zone."""
+    return {rate.devise_id: rate.taux_normalise for rate in get_latest_rates(zone)}
@@ -0,0 +1,85 @@
+# core/management/commands/benchmark_pipeline.py
+
+import itertools
+import string
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from core.models import (
+    ZoneMonetaire, Source, Devise, DeviseAlias, ActivatedCurrency, ScrapedCurrencyRaw
+)
+from core.pipeline import process_and_inject_rates
+from core.alias_resolver import bump_alias_version
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le nombre de requêtes SQL et la durée de process_and_inject_rates "
+        "pour des lots de tailles croissantes, avec chaque moteur (Python, SQL). Les données sont créées dans une "
+        "transaction annulée à la fin : la base n'est pas modifiée."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='10,60,250,1000',
+            help="Tailles de lots séparées par des virgules (défaut: 10,60,250,1000)."
+        )
+        parser.add_argument(
+            '--engines', default=f"{Source.MOTEUR_PYTHON},{Source.MOTEUR_SQL}",
+            help="Moteurs du pipeline à comparer, séparés par des virgules (défaut: python,sql)."
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        engines = [engine.strip() for engine in options['engines'].split(',') if engine.strip()]
+        valid_engines = {value for value, _ in Source.MOTEUR_CHOICES}
+        if not set(engines) <= valid_engines:
+            raise CommandError(f"Moteurs invalides. Valeurs possibles : {', '.join(sorted(valid_engines))}.")
+        codes = [''.join(letters) for letters in itertools.product(string.ascii_uppercase, repeat=3)]
+
+        self.stdout.write(f"{'Moteur':>7} | {'Devises':>8} | {'Requêtes':>8} | {'Durée (ms)':>10} | Résultat")
+        try:
+            with transaction.atomic():
+                for run, (size, engine) in enumerate(itertools.product(sizes, engines)):
+                    zone = ZoneMonetaire.objects.create(nom=f"__BENCH_PIPELINE_{run}__")
+                    source = Source.objects.create(
+                        zone=zone, nom=f"Benchmark {size}", url_source="https://example.com",
+                        scraper_filename="benchmark.py", moteur_pipeline=engine
+                    )
+                    batch_codes = codes[:size]
+                    Devise.objects.bulk_create(
+                        [Devise(code=code, nom=f"Bench {code}") for code in batch_codes], ignore_conflicts=True
+                    )
+                    DeviseAlias.objects.bulk_create(
+                        [DeviseAlias(alias=code, devise_officielle_id=code) for code in batch_codes], ignore_conflicts=True
+                    )
+                    bump_alias_version()
+                    ActivatedCurrency.objects.bulk_create(
+                        [ActivatedCurrency(zone=zone, devise_id=code, is_active=True) for code in batch_codes]
+                    )
+                    ScrapedCurrencyRaw.objects.bulk_create([
+                        ScrapedCurrencyRaw(
+                            source=source, date_publication_brut=date(2025, 1, 1), nom_devise_brut=code,
+                            code_iso_brut=code, valeur_brute=Decimal('1.5') + index, multiplicateur_brut=1
+                        )
+                        for index, code in enumerate(batch_codes)
+                    ])
+
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        result = process_and_inject_rates(source.pk)
+                        elapsed_ms = (time.perf_counter() - started) * 1000
+
+                    self.stdout.write(f"{engine:>7} | {size:>8} | {len(queries):>8} | {elapsed_ms:>10.1f} | {result}")
+                raise _Rollback()
+        except _Rollback:
+            pass
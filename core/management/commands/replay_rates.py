@@ -0,0 +1,47 @@
+# core/management/commands/replay_rates.py
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.pipeline import REPLAY_DEFAULT_CHUNK_SIZE, replay_source_history
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Date invalide '{value}'. Utilisez YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Rejoue le pipeline sur l'historique des données brutes d'une source (toutes les dates "
+        "de publication de la période), puis recalcule 'is_latest' une seule fois."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source_id', type=int, help="ID de la source à rejouer.")
+        parser.add_argument('--from', dest='date_from', help="Première date de publication (YYYY-MM-DD).")
+        parser.add_argument('--to', dest='date_to', help="Dernière date de publication (YYYY-MM-DD).")
+        parser.add_argument(
+            '--chunk-size', type=int, default=REPLAY_DEFAULT_CHUNK_SIZE,
+            help=f"Nombre de dates traitées par paquet (défaut: {REPLAY_DEFAULT_CHUNK_SIZE})."
+        )
+
+    def handle(self, *args, **options):
+        date_from = _parse_date(options['date_from']) if options['date_from'] else None
+        date_to = _parse_date(options['date_to']) if options['date_to'] else None
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size doit être supérieur ou égal à 1.")
+
+        result = replay_source_history(
+            options['source_id'], date_from=date_from, date_to=date_to, chunk_size=options['chunk_size']
+        )
+        if result['status'] == 'error':
+            raise CommandError(result['message'])
+        self.stdout.write(result['message'])
+        if result['unmapped']:
+            self.stdout.write(f"Devises non mappées : {', '.join(result['unmapped'])}")
+        if result['inactive']:
+            self.stdout.write(f"Devises inactives : {', '.join(result['inactive'])}")
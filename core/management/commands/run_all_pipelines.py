@@ -0,0 +1,27 @@
+# core/management/commands/run_all_pipelines.py
+
+from django.core.management.base import BaseCommand
+
+from core.pipeline_runner import (
+    DEFAULT_MAX_WORKERS, run_pipelines_for_active_zones, format_pipeline_report
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Relance process_and_inject_rates pour toutes les zones actives ayant une source, "
+        "en parallèle, puis affiche un rapport par zone (durée, taux écrits, échecs)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=DEFAULT_MAX_WORKERS,
+            help=f"Nombre de zones traitées en parallèle (défaut: {DEFAULT_MAX_WORKERS})."
+        )
+
+    def handle(self, *args, **options):
+        report = run_pipelines_for_active_zones(max_workers=options['workers'])
+        if not report:
+            self.stdout.write("Aucune zone active avec une source configurée.")
+            return
+        self.stdout.write(format_pipeline_report(report))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='source',
+            name='date_empreinte',
+            field=models.DateField(blank=True, null=True, verbose_name="Date de publication de l'empreinte"),
+        ),
+        migrations.AddField(
+            model_name='source',
+            name='empreinte_donnees',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Empreinte du dernier lot scrapé'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_latest_exchange_rates(apps, schema_editor):
+    ExchangeRate = apps.get_model('core', 'ExchangeRate')
+    LatestExchangeRate = apps.get_model('core', 'LatestExchangeRate')
+    LatestExchangeRate.objects.bulk_create(
+        (
+            LatestExchangeRate(
+                zone_id=rate.zone_id,
+                devise_id=rate.devise_id,
+                date_publication=rate.date_publication,
+                taux_source=rate.taux_source,
+                multiplicateur_source=rate.multiplicateur_source,
+                taux_normalise=rate.taux_normalise,
+            )
+            for rate in ExchangeRate.objects.filter(is_latest=True).iterator()
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_source_empreinte_donnees'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_publication', models.DateField()),
+                ('taux_source', models.DecimalField(decimal_places=6, max_digits=18, verbose_name='Taux brut de la source')),
+                ('multiplicateur_source', models.IntegerField(default=1, verbose_name='Multiplicateur de la source')),
+                ('taux_normalise', models.DecimalField(decimal_places=9, max_digits=18, verbose_name='Taux normalisé (par unité)')),
+                ('date_maj', models.DateTimeField(auto_now=True, verbose_name='Date de mise à jour')),
+                ('devise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='latest_rates', to='core.devise')),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='latest_rates', to='core.zonemonetaire')),
+            ],
+            options={
+                'verbose_name': 'Dernier Taux de Change',
+                'verbose_name_plural': 'Derniers Taux de Change',
+                'ordering': ['devise'],
+                'unique_together': {('zone', 'devise')},
+            },
+        ),
+        migrations.RunPython(populate_latest_exchange_rates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_latestexchangerate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='source',
+            name='moteur_pipeline',
+            field=models.CharField(choices=[('python', 'Python'), ('sql', 'SQL (PostgreSQL)')], default='python', max_length=10, verbose_name='Moteur du pipeline'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_source_moteur_pipeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('scraper', 'Scraper + pipeline'), ('pipeline', 'Pipeline seul')], max_length=20, verbose_name="Type d'exécution")),
+                ('status', models.CharField(default='ok', max_length=20, verbose_name='Résultat')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Début')),
+                ('duration_ms', models.FloatField(default=0, verbose_name='Durée totale (ms)')),
+                ('query_count', models.PositiveIntegerField(default=0, verbose_name='Requêtes SQL')),
+                ('stages', models.JSONField(blank=True, default=dict, verbose_name='Étapes')),
+                ('rows', models.JSONField(blank=True, default=dict, verbose_name='Volumes')),
+                ('message', models.TextField(blank=True, verbose_name='Message')),
+                ('source', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pipeline_runs', to='core.source')),
+            ],
+            options={
+                'verbose_name': 'Exécution du Pipeline',
+                'verbose_name_plural': 'Exécutions du Pipeline',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['source', 'started_at'], name='core_pipeli_source__4a45c1_idx')],
+            },
+        ),
+    ]
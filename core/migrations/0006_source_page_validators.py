@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_pipelinerun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='source',
+            name='empreinte_page',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Empreinte de la dernière page'),
+        ),
+        migrations.AddField(
+            model_name='source',
+            name='etag_page',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='ETag de la dernière page'),
+        ),
+        migrations.AddField(
+            model_name='source',
+            name='last_modified_page',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Last-Modified de la dernière page'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_source_page_validators'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceHealth',
+            fields=[
+                ('source', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='health', serialize=False, to='core.source')),
+                ('echecs_consecutifs', models.PositiveIntegerField(default=0, verbose_name='Échecs consécutifs')),
+                ('derniere_reussite', models.DateTimeField(blank=True, null=True, verbose_name='Dernière récupération réussie')),
+                ('dernier_echec', models.DateTimeField(blank=True, null=True, verbose_name='Dernier échec')),
+                ('derniere_erreur', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('latence_moyenne_ms', models.FloatField(blank=True, null=True, verbose_name='Latence moyenne (ms)')),
+                ('etat_circuit', models.CharField(choices=[('ferme', 'Fermé'), ('ouvert', 'Ouvert')], default='ferme', max_length=10, verbose_name='Disjoncteur')),
+                ('circuit_ouvert_jusqua', models.DateTimeField(blank=True, null=True, verbose_name="Disjoncteur ouvert jusqu'à")),
+            ],
+            options={
+                'verbose_name': 'Santé de la Source',
+                'verbose_name_plural': 'Santé des Sources',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_sourcehealth'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exchangerate',
+            index=models.Index(fields=['zone', 'date_publication', 'devise'], name='core_exrate_zone_date_devise'),
+        ),
+    ]
@@ -5,3 +5,6 @@ from .scraped_currency_raw import ScrapedCurrencyRaw
 from .devise_alias import DeviseAlias
 from .activated_currency import ActivatedCurrency
 from .exchange_rate import ExchangeRate
+from .latest_exchange_rate import LatestExchangeRate
+from .pipeline_run import PipelineRun
+from .source_health import SourceHealth
@@ -32,6 +32,8 @@ class ExchangeRate(models.Model):
         verbose_name_plural = "Taux de Change Finals"
         unique_together = ('devise', 'zone', 'date_publication')
         ordering = ['-date_publication', 'devise']
+        # Historique d'une zone parcouru par curseur (date_publication, devise) : voir api/pagination.py
+        indexes = [models.Index(fields=['zone', 'date_publication', 'devise'], name='core_exrate_zone_date_devise')]
 
     def __str__(self):
         return (f"{self.devise.code} | {self.zone.nom} | {self.date_publication} | "
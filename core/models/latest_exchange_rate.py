@@ -0,0 +1,34 @@
+from django.db import models
+from .zone_monetaire import ZoneMonetaire
+from .devise import Devise
+
+class LatestExchangeRate(models.Model):
+    """
+    Instantané compact du dernier taux connu pour chaque couple (zone, devise).
+    Maintenu par le pipeline dans la même transaction que ExchangeRate, il sert
+    toutes les lectures "dernier taux" sans parcourir l'historique.
+    """
+    zone = models.ForeignKey(ZoneMonetaire, on_delete=models.CASCADE, related_name='latest_rates')
+    devise = models.ForeignKey(Devise, on_delete=models.CASCADE, related_name='latest_rates')
+
+    date_publication = models.DateField()
+    taux_source = models.DecimalField(max_digits=18, decimal_places=6, verbose_name="Taux brut de la source")
+    multiplicateur_source = models.IntegerField(verbose_name="Multiplicateur de la source", default=1)
+    taux_normalise = models.DecimalField(max_digits=18, decimal_places=9, verbose_name="Taux normalisé (par unité)")
+
+    date_maj = models.DateTimeField(auto_now=True, verbose_name="Date de mise à jour")
+
+    class Meta:
+        verbose_name = "Dernier Taux de Change"
+        verbose_name_plural = "Derniers Taux de Change"
+        unique_together = ('zone', 'devise')
+        ordering = ['devise']
+
+    @property
+    def is_latest(self):
+        # Un instantané est par définition le taux le plus récent (compatibilité avec ExchangeRate)
+        return True
+
+    def __str__(self):
+        return (f"{self.devise_id} | {self.zone.nom} | {self.date_publication} | "
+                f"Norm: {self.taux_normalise} (Latest)")
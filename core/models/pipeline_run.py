@@ -0,0 +1,37 @@
+from django.db import models
+from django.utils import timezone
+from .source import Source
+
+class PipelineRun(models.Model):
+    """
+    Trace d'une exécution du scraper et/ou du pipeline pour une source : durée et nombre
+    de requêtes SQL de chaque étape, volumes traités et résultat.
+    Écrite par run_scraper_for_source et run_pipeline (voir core/run_metrics.py).
+    """
+    KIND_SCRAPER = 'scraper'
+    KIND_PIPELINE = 'pipeline'
+    KIND_CHOICES = [
+        (KIND_SCRAPER, 'Scraper + pipeline'),
+        (KIND_PIPELINE, 'Pipeline seul'),
+    ]
+
+    source = models.ForeignKey(Source, on_delete=models.CASCADE, null=True, blank=True, related_name='pipeline_runs')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Type d'exécution")
+    status = models.CharField(max_length=20, default='ok', verbose_name="Résultat")
+    started_at = models.DateTimeField(default=timezone.now, verbose_name="Début")
+    duration_ms = models.FloatField(default=0, verbose_name="Durée totale (ms)")
+    query_count = models.PositiveIntegerField(default=0, verbose_name="Requêtes SQL")
+    # {étape: {"ms": durée, "queries": nombre de requêtes}}
+    stages = models.JSONField(default=dict, blank=True, verbose_name="Étapes")
+    # Volumes traités, ex: {"raw_rows": 40, "rates_written": 3, "rates_identical": 37}
+    rows = models.JSONField(default=dict, blank=True, verbose_name="Volumes")
+    message = models.TextField(blank=True, verbose_name="Message")
+
+    class Meta:
+        verbose_name = "Exécution du Pipeline"
+        verbose_name_plural = "Exécutions du Pipeline"
+        ordering = ['-started_at']
+        indexes = [models.Index(fields=['source', 'started_at'])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} | {self.source_id} | {self.started_at:%Y-%m-%d %H:%M:%S} | {self.status} ({self.duration_ms:.0f} ms)"
@@ -5,6 +5,14 @@ from .zone_monetaire import ZoneMonetaire
 from django_celery_beat.models import PeriodicTask
 
 class Source(models.Model):
+    # Moteurs du pipeline : normalisation en Python (historique) ou entièrement dans PostgreSQL.
+    MOTEUR_PYTHON = 'python'
+    MOTEUR_SQL = 'sql'
+    MOTEUR_CHOICES = [
+        (MOTEUR_PYTHON, 'Python'),
+        (MOTEUR_SQL, 'SQL (PostgreSQL)'),
+    ]
+
     zone = models.OneToOneField(
         ZoneMonetaire,
         on_delete=models.CASCADE,
@@ -33,9 +41,45 @@ class Source(models.Model):
         help_text="La tâche planifiée Celery Beat pour ce scraper."
     )
 
+    # Empreinte (SHA-256) du dernier lot scrapé et injecté, pour sa date de publication.
+    # Permet de court-circuiter l'ingestion et le pipeline quand la page n'a pas changé.
+    empreinte_donnees = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        verbose_name="Empreinte du dernier lot scrapé"
+    )
+    date_empreinte = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Date de publication de l'empreinte"
+    )
+
+    # Validateurs HTTP de la dernière page récupérée (requêtes conditionnelles) et empreinte
+    # SHA-256 de son contenu : une réponse 304 ou un contenu identique évite analyse, ingestion et pipeline.
+    etag_page = models.CharField(max_length=255, blank=True, default='', verbose_name="ETag de la dernière page")
+    last_modified_page = models.CharField(
+        max_length=64, blank=True, default='', verbose_name="Last-Modified de la dernière page"
+    )
+    empreinte_page = models.CharField(
+        max_length=64, blank=True, default='', verbose_name="Empreinte de la dernière page"
+    )
+
+    moteur_pipeline = models.CharField(
+        max_length=10,
+        choices=MOTEUR_CHOICES,
+        default=MOTEUR_PYTHON,
+        verbose_name="Moteur du pipeline"
+    )
+
     class Meta:
         verbose_name = "Source de Données"
         verbose_name_plural = "Sources de Données"
 
     def __str__(self):
         return self.nom
+
+    @property
+    def page_validators(self):
+        """Validateurs de la dernière page, au format attendu par scrapers.runtime."""
+        return {'etag': self.etag_page, 'last_modified': self.last_modified_page, 'hash': self.empreinte_page}
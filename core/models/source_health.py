@@ -0,0 +1,39 @@
+from django.db import models
+from .source import Source
+
+class SourceHealth(models.Model):
+    """
+    État de santé du scraper d'une source : échecs consécutifs, dernière réussite, latence
+    moyenne de récupération et disjoncteur. Quand le disjoncteur est ouvert, les exécutions
+    sont ignorées jusqu'à `circuit_ouvert_jusqua` ; la suivante sert alors de test (sonde).
+    Maintenu par scrapers.tasks (voir scrapers/health.py).
+    """
+    CIRCUIT_FERME = 'ferme'
+    CIRCUIT_OUVERT = 'ouvert'
+    CIRCUIT_CHOICES = [
+        (CIRCUIT_FERME, 'Fermé'),
+        (CIRCUIT_OUVERT, 'Ouvert'),
+    ]
+
+    source = models.OneToOneField(Source, on_delete=models.CASCADE, primary_key=True, related_name='health')
+    echecs_consecutifs = models.PositiveIntegerField(default=0, verbose_name="Échecs consécutifs")
+    derniere_reussite = models.DateTimeField(null=True, blank=True, verbose_name="Dernière récupération réussie")
+    dernier_echec = models.DateTimeField(null=True, blank=True, verbose_name="Dernier échec")
+    derniere_erreur = models.TextField(blank=True, verbose_name="Dernière erreur")
+    # Moyenne mobile exponentielle de la durée de récupération des pages réussies
+    latence_moyenne_ms = models.FloatField(null=True, blank=True, verbose_name="Latence moyenne (ms)")
+    etat_circuit = models.CharField(
+        max_length=10, choices=CIRCUIT_CHOICES, default=CIRCUIT_FERME, verbose_name="Disjoncteur"
+    )
+    circuit_ouvert_jusqua = models.DateTimeField(null=True, blank=True, verbose_name="Disjoncteur ouvert jusqu'à")
+
+    class Meta:
+        verbose_name = "Santé de la Source"
+        verbose_name_plural = "Santé des Sources"
+
+    @property
+    def circuit_ouvert(self):
+        return self.etat_circuit == self.CIRCUIT_OUVERT
+
+    def __str__(self):
+        return f"{self.source_id} | {self.get_etat_circuit_display()} | {self.echecs_consecutifs} échec(s)"
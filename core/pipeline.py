@@ -1,20 +1,303 @@
 # core/pipeline.py
 
-from .models import Source, DeviseAlias, ActivatedCurrency, ExchangeRate, Devise
+from .models import Source, ActivatedCurrency, ExchangeRate, LatestExchangeRate, Devise, PipelineRun
+from .alias_resolver import get_alias_index, resolve_alias
+from .latest_rates_cache import invalidate_latest_rates
+from .pipeline_sql import find_unresolved_raw_rates, inject_rates_sql, upsert_latest_exchange_rates_sql
+from .run_metrics import recording_run, record_run, run_stage
 from datetime import datetime
+from collections import Counter, defaultdict
 from decimal import Decimal
 import sys
-from logs.utils import log_action
+from logs.utils import log_action, buffered_logs
 from django.db import transaction, IntegrityError # Import IntegrityError and transaction
-from django.db.models import Q # Import Q for complex queries
+from django.db.models import Q, Case, When, Value, BooleanField, OuterRef, Subquery
+
+NORMALISATION_QUANTUM = Decimal('0.000000001')
+
+
+def compute_normalized_rate(valeur_brute, multiplicateur_brut):
+    """
+    Calcule le taux normalisé (par unité) à partir de la valeur brute et du multiplicateur
+    de la source, arrondi à 9 décimales. Un multiplicateur nul ou négatif vaut 1.
+    """
+    multiplicateur = Decimal(multiplicateur_brut) if multiplicateur_brut > 0 else Decimal('1')
+    return (valeur_brute / multiplicateur).quantize(NORMALISATION_QUANTUM)
+
+LATEST_SNAPSHOT_FIELDS = ['date_publication', 'taux_source', 'multiplicateur_source', 'taux_normalise']
+
+
+def upsert_latest_exchange_rates(zone, rates):
+    """
+    Reporte des taux (ExchangeRate) dans l'instantané LatestExchangeRate de la zone.
+    Seuls les couples (zone, devise) absents ou différents sont écrits, en un seul upsert ;
+    le cache des derniers taux de la zone est alors invalidé après le commit.
+    """
+    rates = list(rates)
+    if not rates:
+        return 0
+
+    current_snapshot = {
+        snapshot.devise_id: snapshot
+        for snapshot in LatestExchangeRate.objects.filter(zone=zone, devise_id__in=[rate.devise_id for rate in rates])
+    }
+    snapshots_to_write = [
+        LatestExchangeRate(
+            zone=zone,
+            devise_id=rate.devise_id,
+            date_publication=rate.date_publication,
+            taux_source=rate.taux_source,
+            multiplicateur_source=rate.multiplicateur_source,
+            taux_normalise=rate.taux_normalise
+        )
+        for rate in rates
+        if rate.devise_id not in current_snapshot or any(
+            getattr(current_snapshot[rate.devise_id], field) != getattr(rate, field) for field in LATEST_SNAPSHOT_FIELDS
+        )
+    ]
+    if snapshots_to_write:
+        LatestExchangeRate.objects.bulk_create(
+            snapshots_to_write,
+            update_conflicts=True,
+            unique_fields=['zone', 'devise'],
+            update_fields=LATEST_SNAPSHOT_FIELDS + ['date_maj'],
+        )
+        invalidate_latest_rates([zone.pk])
+    return len(snapshots_to_write)
+
+
+def refresh_latest_exchange_rates(zone_ids):
+    """
+    Reconstruit entièrement l'instantané LatestExchangeRate des zones données
+    à partir des lignes 'is_latest' de l'historique ExchangeRate.
+    """
+    LatestExchangeRate.objects.filter(zone_id__in=zone_ids).delete()
+    LatestExchangeRate.objects.bulk_create(
+        [
+            LatestExchangeRate(
+                zone_id=rate['zone_id'],
+                devise_id=rate['devise_id'],
+                **{field: rate[field] for field in LATEST_SNAPSHOT_FIELDS}
+            )
+            for rate in ExchangeRate.objects.filter(zone_id__in=zone_ids, is_latest=True).values(
+                'zone_id', 'devise_id', *LATEST_SNAPSHOT_FIELDS
+            )
+        ],
+        batch_size=1000,
+    )
+    invalidate_latest_rates(zone_ids)
+
+
+def _pipeline_result(status, message, injected=0, identical=0):
+    return {'status': status, 'message': message, 'injected': injected, 'identical': identical}
+
+
+def _flip_is_latest(zone, devise_codes, latest_date):
+    """
+    Bascule ensembliste de 'is_latest' pour ces devises de la zone : seules les lignes
+    dont l'état doit changer sont touchées (y compris pour les taux identiques ignorés).
+    """
+    ExchangeRate.objects.filter(
+        zone=zone,
+        devise_id__in=devise_codes
+    ).filter(
+        (Q(is_latest=True) & ~Q(date_publication=latest_date)) |
+        Q(is_latest=False, date_publication=latest_date)
+    ).update(
+        is_latest=Case(
+            When(date_publication=latest_date, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField()
+        )
+    )
+
+
+def _log_write_failure(source, error, rates_count=None):
+    # Cas rare (transactions concurrentes ou données inattendues) : tout le lot est annulé.
+    rates_label = f"de {rates_count} taux" if rates_count is not None else "du lot"
+    if isinstance(error, IntegrityError):
+        log_action(
+            actor_id=None,
+            action='PIPELINE_DB_INTEGRITY_ERROR',
+            details=f"Erreur d'intégrité de la base de données lors de l'injection groupée {rates_label} dans la zone '{source.zone.nom}'. Erreur: {error}. Output trace: {sys.exc_info()}",
+            level='error',
+            source_obj=source,
+            zone_obj=source.zone
+        )
+    else:
+        log_action(
+            actor_id=None,
+            action='PIPELINE_UNEXPECTED_DB_ERROR',
+            details=f"Erreur inattendue lors de l'injection groupée {rates_label} dans la zone '{source.zone.nom}'. Erreur: {error}. Output trace: {sys.exc_info()}",
+            level='critical',
+            source_obj=source,
+            zone_obj=source.zone
+        )
+
+
+def _complete_pipeline(source, injected_count, skipped_identical_count, write_failed):
+    log_action(
+        actor_id=None,
+        action='PIPELINE_EXECUTION_COMPLETED',
+        details=f"Pipeline terminé pour la source '{source.nom}' (ID: {source.pk}) dans la zone '{source.zone.nom}' (ID: {source.zone.pk}). {injected_count} taux injectés/mis à jour. {skipped_identical_count} taux identiques ignorés.",
+        level='info',
+        source_obj=source,
+        zone_obj=source.zone
+    )
+    return _pipeline_result(
+        'error' if write_failed else 'ok',
+        f"Traitement terminé. {injected_count} taux injectés/mis à jour. {skipped_identical_count} taux identiques ignorés.",
+        injected=injected_count,
+        identical=skipped_identical_count
+    )
+
+
+def _log_unmapped_currency(source, nom_devise_brut, code_iso_brut):
+    log_action(
+        actor_id=None,
+        action='PIPELINE_UNMAPPED_CURRENCY',
+        details=f"Devise brute non mappée '{nom_devise_brut or code_iso_brut}' (Code ISO: {code_iso_brut}) pour la source '{source.nom}' (ID: {source.pk}) dans la zone '{source.zone.nom}' (ID: {source.zone.pk}).",
+        level='info',
+        source_obj=source,
+        zone_obj=source.zone,
+        currency_code=code_iso_brut
+    )
+
+
+def _log_inactive_currency(source, devise_code, devise_nom):
+    log_action(
+        actor_id=None,
+        action='PIPELINE_INACTIVE_CURRENCY',
+        details=f"Devise officielle '{devise_code}' (Nom: {devise_nom}) pour la source '{source.nom}' (ID: {source.pk}) n'est pas active dans la zone '{source.zone.nom}' (ID: {source.zone.pk}).",
+        level='info',
+        source_obj=source,
+        zone_obj=source.zone,
+        currency_code=devise_code
+    )
+
+
+def _latest_raw_date(source):
+    # Date de publication la plus récente des données brutes de la source, ou None.
+    latest_raw_data_entry = source.raw_data.filter(date_publication_brut__isnull=False).order_by('-date_publication_brut', '-date_scraping').first()
+    return latest_raw_data_entry.date_publication_brut if latest_raw_data_entry else None
+
+
+def _raw_batch_for(source, latest_date):
+    # Ordre explicite (celui du modèle, plus l'id) : la règle de _resolve_raw_batch() (la dernière
+    # ligne parcourue, donc la plus ancienne, l'emporte) doit être déterministe et identique à
+    # celle du moteur SQL (DISTINCT ON ... ORDER BY date_scraping, id).
+    return list(source.raw_data.filter(date_publication_brut=latest_date).order_by('-date_scraping', '-pk'))
+
+
+def _resolve_raw_batch(source, latest_date, raw_currencies):
+    """
+    Résout tout un lot brut en mémoire (alias, activation, calcul), sans écrire ni journaliser.
+    Si deux lignes brutes pointent vers la même devise, la dernière parcourue l'emporte, comme
+    avec les update_or_create successifs de l'ancienne boucle. Les lignes étant parcourues de la
+    plus récente à la plus ancienne (_raw_batch_for : '-date_scraping', '-pk'), c'est la plus
+    ancienne qui est retenue, comme par le moteur SQL : ne pas inverser l'ordre.
+    Retourne un dict :
+    - resolved : {code devise: ExchangeRate non sauvegardé, is_latest=True} ;
+    - unmapped : lignes brutes sans alias ;
+    - inactive : couples (ligne brute, Devise) dont la devise n'est pas active dans la zone ;
+    - errors : couples (ligne brute, exception) dont le calcul a échoué.
+    """
+    aliases_dict = get_alias_index()
+
+    # La clé primaire de Devise est son code : pas besoin de charger chaque devise.
+    active_codes_for_zone = set(
+        ActivatedCurrency.objects.filter(zone=source.zone, is_active=True).values_list('devise_id', flat=True)
+    )
+
+    batch = {'resolved': {}, 'unmapped': [], 'inactive': [], 'errors': []}
+    for raw_currency in raw_currencies:
+        official_devise = resolve_alias(
+            raw_currency.nom_devise_brut, raw_currency.code_iso_brut, alias_index=aliases_dict
+        )
+        if not official_devise:
+            batch['unmapped'].append(raw_currency)
+            continue
+
+        if official_devise.code not in active_codes_for_zone:
+            batch['inactive'].append((raw_currency, official_devise))
+            continue
+
+        try:
+            taux_normalise_calcule = compute_normalized_rate(raw_currency.valeur_brute, raw_currency.multiplicateur_brut)
+        except Exception as e:
+            batch['errors'].append((raw_currency, e))
+            continue
+
+        batch['resolved'][official_devise.code] = ExchangeRate(
+            devise=official_devise,
+            zone=source.zone,
+            date_publication=latest_date,
+            taux_source=raw_currency.valeur_brute,
+            multiplicateur_source=raw_currency.multiplicateur_brut,
+            taux_normalise=taux_normalise_calcule,
+            is_latest=True
+        )
+    return batch
+
+
+def _existing_rates_for(zone, latest_date, devise_codes):
+    # Une seule lecture des taux déjà présents pour cette date.
+    return {
+        rate.devise_id: rate
+        for rate in ExchangeRate.objects.filter(
+            zone=zone,
+            date_publication=latest_date,
+            devise_id__in=devise_codes
+        )
+    }
+
+
+def _is_identical(current_rate, new_rate):
+    return (current_rate is not None and
+            current_rate.taux_source == new_rate.taux_source and
+            current_rate.multiplicateur_source == new_rate.multiplicateur_source and
+            current_rate.taux_normalise == new_rate.taux_normalise)
+
+
+def process_and_inject_rates(source_id: int, raw_changes=None):
+    """
+    Exécute le pipeline pour une source et retourne le message de résultat.
+    Voir run_pipeline() pour le détail du traitement et les compteurs.
+    """
+    return run_pipeline(source_id, raw_changes=raw_changes)['message']
+
+
+def run_pipeline(source_id: int, raw_changes=None):
+    """
+    Exécute le pipeline pour une source. Les logs de l'exécution sont écrits en une fois,
+    après la transaction (et même si elle échoue) : voir _run_pipeline() pour le traitement.
+    L'exécution est tracée dans PipelineRun (ou dans celle du scraper qui l'a lancée).
+    `raw_changes` : compteurs de l'ingestion brute qui précède (inserted, updated, unchanged,
+    deleted). Si aucune ligne brute n'a été écrite, le pipeline n'a rien à recalculer et s'arrête.
+    """
+    with recording_run(PipelineRun.KIND_PIPELINE):
+        with buffered_logs():
+            result = _run_pipeline(source_id, raw_changes)
+        record_run(
+            status=result['status'], message=result['message'],
+            rates_written=result['injected'], rates_identical=result['identical']
+        )
+        return result
+
 
 @transaction.atomic
-def process_and_inject_rates(source_id: int):
+def _run_pipeline(source_id: int, raw_changes=None):
     """
     Le cœur du pipeline. Cette fonction prend les données brutes les plus récentes
     pour une source, les filtre, les calcule et les injecte dans la table finale ExchangeRate.
     Elle gère l'état 'is_latest' pour assurer qu'il n'y ait qu'un seul taux 'is_latest=True'
     par devise et par zone, et met à jour uniquement si les données changent réellement.
+    Tout le lot du jour est résolu en mémoire puis écrit en un seul upsert groupé, suivi
+    d'une seule bascule ensembliste de 'is_latest' : le nombre de requêtes ne dépend pas
+    du nombre de devises.
+    Le calcul est fait en Python, ou par PostgreSQL si la source utilise le moteur SQL
+    (voir _run_sql_engine()).
+    Retourne un dict : status ('ok', 'no_data' ou 'error'), message, injected, identical.
     """
     try:
         source = Source.objects.select_related('zone').get(pk=source_id)
@@ -26,10 +309,23 @@ def process_and_inject_rates(source_id: int):
             level='critical',
             source_id=source_id # Pass source_id here, as source_obj is None
         )
-        return "Erreur : Source non trouvée."
+        return _pipeline_result('error', "Erreur : Source non trouvée.")
 
-    latest_raw_data_entry = source.raw_data.filter(date_publication_brut__isnull=False).order_by('-date_publication_brut', '-date_scraping').first()
-    if not latest_raw_data_entry:
+    record_run(source=source)
+    if raw_changes is not None and not (raw_changes['inserted'] or raw_changes['updated'] or raw_changes['deleted']):
+        log_action(
+            actor_id=None,
+            action='PIPELINE_SKIPPED_RAW_UNCHANGED',
+            details=f"Pipeline ignoré pour la source '{source.nom}' (ID: {source.pk}) : aucune des {raw_changes['unchanged']} devises brutes n'a changé.",
+            level='info',
+            source_obj=source,
+            zone_obj=source.zone
+        )
+        return _pipeline_result('ok', "Données brutes inchangées : pipeline ignoré.")
+
+    with run_stage('resolution'):
+        latest_date = _latest_raw_date(source)
+    if latest_date is None:
         log_action(
             actor_id=None,
             action='PIPELINE_NO_RAW_DATA',
@@ -38,12 +334,15 @@ def process_and_inject_rates(source_id: int):
             source_obj=source,
             zone_obj=source.zone
         )
-        return "Aucune donnée brute récente à traiter."
+        return _pipeline_result('no_data', "Aucune donnée brute récente à traiter.")
     
-    latest_date = latest_raw_data_entry.date_publication_brut
-    raw_currencies_for_today = source.raw_data.filter(date_publication_brut=latest_date)
+    if source.moteur_pipeline == Source.MOTEUR_SQL:
+        return _run_sql_engine(source, latest_date)
 
-    if not raw_currencies_for_today.exists():
+    with run_stage('resolution'):
+        raw_currencies_for_today = _raw_batch_for(source, latest_date)
+    record_run(raw_rows=len(raw_currencies_for_today))
+    if not raw_currencies_for_today:
         log_action(
             actor_id=None,
             action='PIPELINE_NO_DATA_FOR_DATE',
@@ -52,144 +351,378 @@ def process_and_inject_rates(source_id: int):
             source_obj=source,
             zone_obj=source.zone
         )
-        return f"Aucune donnée brute pour la date {latest_date} à traiter pour la source {source.nom}."
+        return _pipeline_result('no_data', f"Aucune donnée brute pour la date {latest_date} à traiter pour la source {source.nom}.")
 
-    aliases_dict = {
-        alias.alias: alias.devise_officielle
-        for alias in DeviseAlias.objects.select_related('devise_officielle').all()
-    }
-
-    active_codes_for_zone = set(
-        ac.devise.code
-        for ac in ActivatedCurrency.objects.filter(zone=source.zone, is_active=True)
-    )
+    # Étape 1 : résolution de tout le lot du jour en mémoire (alias, activation, calcul).
+    with run_stage('resolution'):
+        batch = _resolve_raw_batch(source, latest_date, raw_currencies_for_today)
+    resolved_rates = batch['resolved']
+    record_run(rates_resolved=len(resolved_rates), unmapped=len(batch['unmapped']), inactive=len(batch['inactive']))
+    for raw_currency in batch['unmapped']:
+        _log_unmapped_currency(source, raw_currency.nom_devise_brut, raw_currency.code_iso_brut)
+    for raw_currency, official_devise in batch['inactive']:
+        _log_inactive_currency(source, official_devise.code, official_devise.nom)
+    for raw_currency, e in batch['errors']:
+        log_action(
+            actor_id=None,
+            action='PIPELINE_CALCULATION_ERROR',
+            details=f"Erreur de calcul pour '{raw_currency.nom_devise_brut or raw_currency.code_iso_brut}' (Code ISO: {raw_currency.code_iso_brut}) dans la source '{source.nom}' (ID: {source.pk}) de la zone '{source.zone.nom}' (ID: {source.zone.pk}). Erreur: {e}",
+            level='error',
+            source_obj=source,
+            zone_obj=source.zone,
+            currency_code=raw_currency.code_iso_brut
+        )
 
     injected_count = 0
     skipped_identical_count = 0
+    write_failed = False
 
-    for raw_currency in raw_currencies_for_today:
-        official_devise = aliases_dict.get(raw_currency.nom_devise_brut) or \
-                          aliases_dict.get(raw_currency.code_iso_brut)
-        
-        if not official_devise:
-            log_action(
-                actor_id=None,
-                action='PIPELINE_UNMAPPED_CURRENCY',
-                details=f"Devise brute non mappée '{raw_currency.nom_devise_brut or raw_currency.code_iso_brut}' (Code ISO: {raw_currency.code_iso_brut}) pour la source '{source.nom}' (ID: {source.pk}) dans la zone '{source.zone.nom}' (ID: {source.zone.pk}).",
-                level='info',
-                source_obj=source,
-                zone_obj=source.zone,
-                currency_code=raw_currency.code_iso_brut
-            )
-            continue
+    if resolved_rates:
+        # Étape 2 : une seule lecture des taux déjà présents pour cette date,
+        # afin de ne réécrire que les taux réellement nouveaux ou modifiés.
+        with run_stage('resolution'):
+            existing_rates = _existing_rates_for(source.zone, latest_date, resolved_rates.keys())
 
-        if official_devise.code not in active_codes_for_zone:
-            log_action(
-                actor_id=None,
-                action='PIPELINE_INACTIVE_CURRENCY',
-                details=f"Devise officielle '{official_devise.code}' (Nom: {official_devise.nom}) pour la source '{source.nom}' (ID: {source.pk}) n'est pas active dans la zone '{source.zone.nom}' (ID: {source.zone.pk}).",
-                level='info',
-                source_obj=source,
-                zone_obj=source.zone,
-                currency_code=official_devise.code
-            )
-            continue
+        rates_to_write = []
+        for devise_code, new_rate in resolved_rates.items():
+            if _is_identical(existing_rates.get(devise_code), new_rate):
+                skipped_identical_count += 1
+            else:
+                rates_to_write.append(new_rate)
 
         try:
-            valeur_brute_source = raw_currency.valeur_brute
-            multiplicateur_brut_source = Decimal(raw_currency.multiplicateur_brut) if raw_currency.multiplicateur_brut > 0 else Decimal('1')
-            taux_normalise_calcule = valeur_brute_source / multiplicateur_brut_source
-            taux_normalise_calcule = taux_normalise_calcule.quantize(Decimal('0.000000001'))
+            # Savepoint : une erreur d'écriture ne doit pas empêcher la journalisation qui suit.
+            with run_stage('rate_writes'), transaction.atomic():
+                # Étape 3 : un seul INSERT ... ON CONFLICT (devise, zone, date_publication) DO UPDATE.
+                if rates_to_write:
+                    ExchangeRate.objects.bulk_create(
+                        rates_to_write,
+                        update_conflicts=True,
+                        unique_fields=['devise', 'zone', 'date_publication'],
+                        update_fields=['taux_source', 'multiplicateur_source', 'taux_normalise', 'is_latest'],
+                    )
+
+                # Étape 4 : bascule ensembliste de 'is_latest' pour la zone.
+                _flip_is_latest(source.zone, resolved_rates.keys(), latest_date)
+
+                # Étape 5 : mise à jour de l'instantané LatestExchangeRate dans la même transaction.
+                upsert_latest_exchange_rates(source.zone, resolved_rates.values())
+            injected_count = len(rates_to_write)
 
         except Exception as e:
-            log_action(
-                actor_id=None,
-                action='PIPELINE_CALCULATION_ERROR',
-                details=f"Erreur de calcul pour '{raw_currency.nom_devise_brut or raw_currency.code_iso_brut}' (Code ISO: {raw_currency.code_iso_brut}) dans la source '{source.nom}' (ID: {source.pk}) de la zone '{source.zone.nom}' (ID: {source.zone.pk}). Erreur: {e}",
-                level='error',
-                source_obj=source,
-                zone_obj=source.zone,
-                currency_code=raw_currency.code_iso_brut
-            )
-            continue
+            _log_write_failure(source, e, len(rates_to_write))
+            skipped_identical_count = 0
+            write_failed = True
 
-        try:
-            # Step 1: Set is_latest=False for ALL existing rates for this devise+zone.
-            # This is critical to ensure the unique_latest_rate_per_zone_devise constraint is not violated
-            # when we make the current rate 'is_latest=True'.
-            ExchangeRate.objects.filter(
-                devise=official_devise,
-                zone=source.zone
-            ).update(is_latest=False)
+    return _complete_pipeline(source, injected_count, skipped_identical_count, write_failed)
+
+
+def _run_sql_engine(source, latest_date):
+    """
+    Moteur SQL : le lot du jour est injecté par une seule requête INSERT ... SELECT exécutée
+    par PostgreSQL (voir core/pipeline_sql.py). Les devises non mappées ou inactives sont
+    obtenues par une anti-jointure et journalisées comme avec le moteur Python ; 'is_latest'
+    et l'instantané LatestExchangeRate sont mis à jour dans le même savepoint.
+    """
+    with run_stage('resolution'):
+        unresolved_rows = find_unresolved_raw_rates(source, latest_date)
+    record_run(
+        unmapped=sum(1 for row in unresolved_rows if row['devise_id'] is None),
+        inactive=sum(1 for row in unresolved_rows if row['devise_id'] is not None)
+    )
+    for row in unresolved_rows:
+        if row['devise_id'] is None:
+            _log_unmapped_currency(source, row['nom_devise_brut'], row['code_iso_brut'])
+        else:
+            _log_inactive_currency(source, row['devise_id'], row['devise_nom'])
+
+    injected_count = 0
+    skipped_identical_count = 0
+    write_failed = False
+    try:
+        with run_stage('rate_writes'), transaction.atomic():
+            written_by_devise = inject_rates_sql(source, latest_date)
+            if written_by_devise:
+                _flip_is_latest(source.zone, written_by_devise.keys(), latest_date)
+                upsert_latest_exchange_rates_sql(source, latest_date, written_by_devise.keys())
+        injected_count = sum(1 for written in written_by_devise.values() if written)
+        skipped_identical_count = len(written_by_devise) - injected_count
+    except Exception as e:
+        _log_write_failure(source, e)
+        write_failed = True
+
+    return _complete_pipeline(source, injected_count, skipped_identical_count, write_failed)
+
+
+
+def _preview_rate(rate):
+    return {
+        'devise': rate.devise_id,
+        'devise_nom': rate.devise.nom,
+        'taux_source': rate.taux_source,
+        'multiplicateur_source': rate.multiplicateur_source,
+        'taux_normalise': rate.taux_normalise,
+    }
+
+
+def preview_pipeline(source_id: int):
+    """
+    Simulation (dry-run) du pipeline pour une source : le lot brut le plus récent est résolu
+    comme par le moteur Python (le moteur SQL applique les mêmes règles) et comparé aux taux
+    existants, sans rien écrire ni journaliser. Le nombre de requêtes ne dépend pas de la
+    taille du lot : la page de zone peut l'appeler après chaque modification d'alias.
+    Retourne un dict : status ('ok', 'no_data' ou 'error'), message, date_publication et les
+    listes new, changed, identical, unmapped, inactive, errors.
+    """
+    preview = {
+        'status': 'ok', 'message': '', 'date_publication': None,
+        'new': [], 'changed': [], 'identical': [], 'unmapped': [], 'inactive': [], 'errors': [],
+    }
+    source = Source.objects.select_related('zone').filter(pk=source_id).first()
+    if source is None:
+        return dict(preview, status='error', message="Erreur : Source non trouvée.")
+
+    latest_date = _latest_raw_date(source)
+    if latest_date is None:
+        return dict(preview, status='no_data', message="Aucune donnée brute récente à traiter.")
+    preview['date_publication'] = latest_date
+
+    batch = _resolve_raw_batch(source, latest_date, _raw_batch_for(source, latest_date))
+    existing_rates = _existing_rates_for(source.zone, latest_date, batch['resolved'].keys())
+
+    for devise_code, new_rate in sorted(batch['resolved'].items()):
+        current_rate = existing_rates.get(devise_code)
+        if current_rate is None:
+            preview['new'].append(_preview_rate(new_rate))
+        elif _is_identical(current_rate, new_rate):
+            preview['identical'].append(_preview_rate(new_rate))
+        else:
+            preview['changed'].append(dict(
+                _preview_rate(new_rate),
+                ancien_taux_source=current_rate.taux_source,
+                ancien_multiplicateur_source=current_rate.multiplicateur_source,
+                ancien_taux_normalise=current_rate.taux_normalise,
+            ))
+    preview['unmapped'] = [
+        {'raw_id': raw.pk, 'nom_devise_brut': raw.nom_devise_brut, 'code_iso_brut': raw.code_iso_brut}
+        for raw in batch['unmapped']
+    ]
+    preview['inactive'] = [
+        {'devise': devise.code, 'devise_nom': devise.nom, 'nom_devise_brut': raw.nom_devise_brut, 'code_iso_brut': raw.code_iso_brut}
+        for raw, devise in batch['inactive']
+    ]
+    preview['errors'] = [
+        {'nom_devise_brut': raw.nom_devise_brut, 'code_iso_brut': raw.code_iso_brut, 'error': str(e)}
+        for raw, e in batch['errors']
+    ]
+    preview['message'] = (
+        f"Simulation pour le {latest_date} : {len(preview['new'])} nouveaux, {len(preview['changed'])} modifiés, "
+        f"{len(preview['identical'])} identiques, {len(preview['unmapped'])} non mappés, {len(preview['inactive'])} inactifs."
+    )
+    return preview
+
+
+REPLAY_DEFAULT_CHUNK_SIZE = 30
+
+
+def recompute_is_latest(zone):
+    """
+    Recalcule 'is_latest' pour toute une zone en deux UPDATE ensemblistes : pour chaque devise,
+    seul le taux de date_publication la plus récente est marqué. Seules les lignes dont l'état
+    change sont écrites. Retourne le nombre de lignes modifiées.
+    """
+    most_recent_date = Subquery(
+        ExchangeRate.objects.filter(zone=zone, devise=OuterRef('devise'))
+        .order_by('-date_publication')
+        .values('date_publication')[:1]
+    )
+    unset = ExchangeRate.objects.filter(zone=zone, is_latest=True).exclude(
+        date_publication=most_recent_date
+    ).update(is_latest=False)
+    set_ = ExchangeRate.objects.filter(
+        zone=zone, is_latest=False, date_publication=most_recent_date
+    ).update(is_latest=True)
+    return unset + set_
+
+
+def replay_source_history(source_id: int, date_from=None, date_to=None, chunk_size=REPLAY_DEFAULT_CHUNK_SIZE):
+    """
+    Rejoue le pipeline sur l'historique des données brutes d'une source (par exemple après
+    l'ajout ou la correction d'un alias). Voir _replay_source_history() pour le traitement.
+    """
+    with buffered_logs():
+        return _replay_source_history(source_id, date_from, date_to, chunk_size)
+
+
+@transaction.atomic
+def _replay_source_history(source_id, date_from, date_to, chunk_size):
+    """
+    Traite toutes les dates de publication brutes de la source comprises entre date_from et
+    date_to (bornes incluses, facultatives), par paquets de 'chunk_size' dates : chaque paquet
+    est lu en flux, résolu en mémoire puis écrit en un seul upsert groupé. 'is_latest' et
+    l'instantané LatestExchangeRate ne sont recalculés qu'une fois, à la fin.
+    Les devises non mappées ou inactives sont journalisées une seule fois chacune.
+    Retourne un dict : status, message, dates, injected, identical, unmapped, inactive.
+    """
+    try:
+        source = Source.objects.select_related('zone').get(pk=source_id)
+    except Source.DoesNotExist:
+        log_action(
+            actor_id=None,
+            action='PIPELINE_ERROR',
+            details=f"Erreur Rejeu: La source avec l'ID {source_id} n'a pas été trouvée.",
+            level='critical',
+            source_id=source_id
+        )
+        return {'status': 'error', 'message': "Erreur : Source non trouvée.", 'dates': 0,
+                'injected': 0, 'identical': 0, 'unmapped': [], 'inactive': []}
+
+    raw_data = source.raw_data.filter(date_publication_brut__isnull=False)
+    if date_from:
+        raw_data = raw_data.filter(date_publication_brut__gte=date_from)
+    if date_to:
+        raw_data = raw_data.filter(date_publication_brut__lte=date_to)
+    # order_by() explicite : l'ordre par défaut du modèle ajouterait date_scraping au DISTINCT.
+    dates = list(
+        raw_data.order_by('date_publication_brut').values_list('date_publication_brut', flat=True).distinct()
+    )
+
+    aliases_dict = get_alias_index()
+    active_codes_for_zone = set(
+        ActivatedCurrency.objects.filter(zone=source.zone, is_active=True).values_list('devise_id', flat=True)
+    )
+
+    injected_count = 0
+    skipped_identical_count = 0
+    unmapped = Counter()
+    inactive = Counter()
+    calculation_errors = defaultdict(list)
 
-            # Step 2: Now, create or update the rate for the specific date.
-            # This record will now be the *only* one with is_latest=True for this devise+zone
-            # because we just set all others to False.
-            rate_obj, created = ExchangeRate.objects.update_or_create(
+    for start in range(0, len(dates), chunk_size):
+        chunk_dates = dates[start:start + chunk_size]
+
+        # Même règle que le pipeline quotidien : pour une date et une devise, la dernière ligne brute l'emporte.
+        resolved_rates = {}
+        chunk_rows = raw_data.filter(date_publication_brut__in=chunk_dates).order_by(
+            'date_publication_brut', '-date_scraping', '-pk'
+        )
+        for raw_currency in chunk_rows.iterator(chunk_size=2000):
+            official_devise = resolve_alias(
+                raw_currency.nom_devise_brut, raw_currency.code_iso_brut, alias_index=aliases_dict
+            )
+            if not official_devise:
+                unmapped[raw_currency.nom_devise_brut or raw_currency.code_iso_brut] += 1
+                continue
+            if official_devise.code not in active_codes_for_zone:
+                inactive[official_devise.code] += 1
+                continue
+            try:
+                taux_normalise_calcule = compute_normalized_rate(raw_currency.valeur_brute, raw_currency.multiplicateur_brut)
+            except Exception as e:
+                # Comme dans le pipeline quotidien : la ligne est écartée, le rejeu continue.
+                calculation_errors[raw_currency.nom_devise_brut or raw_currency.code_iso_brut].append(
+                    (raw_currency.date_publication_brut, raw_currency.code_iso_brut, e)
+                )
+                continue
+            resolved_rates[(raw_currency.date_publication_brut, official_devise.code)] = ExchangeRate(
                 devise=official_devise,
                 zone=source.zone,
-                date_publication=latest_date, # This is the key for uniqueness on date
-                defaults={
-                    'taux_source': valeur_brute_source,
-                    'multiplicateur_source': raw_currency.multiplicateur_brut,
-                    'taux_normalise': taux_normalise_calcule,
-                    'is_latest': True # This record is now the latest
-                }
+                date_publication=raw_currency.date_publication_brut,
+                taux_source=raw_currency.valeur_brute,
+                multiplicateur_source=raw_currency.multiplicateur_brut,
+                taux_normalise=taux_normalise_calcule,
+                is_latest=False
             )
 
-            if created:
-                injected_count += 1
-            else:
-                # If 'created' is False, it means an existing record was found and updated.
-                # update_or_create updates automatically if defaults differ from existing.
-                # So, we just need to check if the update_or_create *actually changed* any fields
-                # besides potentially 'is_latest' (which we always want true for the latest).
-                
-                # We compare the numerical values that were input. If they match the values
-                # in the object *after* update_or_create, it means no numerical change occurred.
-                if (rate_obj.taux_source == valeur_brute_source and
-                    rate_obj.multiplicateur_source == raw_currency.multiplicateur_brut and
-                    rate_obj.taux_normalise == taux_normalise_calcule):
-                    # Values are identical to what we wanted to set, means no actual numerical change.
-                    # This rate was already there with these values (and now its is_latest is True).
-                    skipped_identical_count += 1
-                else:
-                    # Values were different and got updated. Count as injected/updated.
-                    injected_count += 1
-                    
-        except IntegrityError as e:
-            # This catch block is for any remaining IntegrityErrors,
-            # which should be very rare with the above logic, unless
-            # there are concurrent transactions or other unexpected data issues.
-            log_action(
-                actor_id=None,
-                action='PIPELINE_DB_INTEGRITY_ERROR',
-                details=f"Erreur d'intégrité de la base de données lors de l'injection du taux pour '{official_devise.code}' dans la zone '{source.zone.nom}'. Erreur: {e}. Output trace: {sys.exc_info()}",
-                level='error',
-                source_obj=source,
-                zone_obj=source.zone,
-                currency_code=official_devise.code
-            )
+        if not resolved_rates:
             continue
-        except Exception as e:
-            # Catch any other unexpected errors during DB operation
-            log_action(
-                actor_id=None,
-                action='PIPELINE_UNEXPECTED_DB_ERROR',
-                details=f"Erreur inattendue lors de l'injection/mise à jour du taux pour '{official_devise.code}' dans la zone '{source.zone.nom}'. Erreur: {e}. Output trace: {sys.exc_info()}",
-                level='critical',
-                source_obj=source,
-                zone_obj=source.zone,
-                currency_code=official_devise.code
+
+        existing_rates = {
+            (rate.date_publication, rate.devise_id): rate
+            for rate in ExchangeRate.objects.filter(
+                zone=source.zone,
+                date_publication__in=chunk_dates,
+                devise_id__in={code for _, code in resolved_rates}
             )
-            continue
+        }
+        rates_to_write = []
+        for key, new_rate in resolved_rates.items():
+            if _is_identical(existing_rates.get(key), new_rate):
+                skipped_identical_count += 1
+            else:
+                rates_to_write.append(new_rate)
+
+        # 'is_latest' n'est pas touché ici : il est recalculé une seule fois après le dernier paquet.
+        if rates_to_write:
+            ExchangeRate.objects.bulk_create(
+                rates_to_write,
+                update_conflicts=True,
+                unique_fields=['devise', 'zone', 'date_publication'],
+                update_fields=['taux_source', 'multiplicateur_source', 'taux_normalise'],
+                batch_size=1000,
+            )
+            injected_count += len(rates_to_write)
+
+    if injected_count:
+        recompute_is_latest(source.zone)
+        refresh_latest_exchange_rates([source.zone.pk])
+
+    for label, count in unmapped.items():
+        log_action(
+            actor_id=None,
+            action='PIPELINE_UNMAPPED_CURRENCY',
+            details=f"Rejeu : devise brute non mappée '{label}' ({count} ligne(s)) pour la source '{source.nom}' (ID: {source.pk}) dans la zone '{source.zone.nom}' (ID: {source.zone.pk}).",
+            level='info',
+            source_obj=source,
+            zone_obj=source.zone
+        )
+    for code, count in inactive.items():
+        log_action(
+            actor_id=None,
+            action='PIPELINE_INACTIVE_CURRENCY',
+            details=f"Rejeu : devise officielle '{code}' ({count} ligne(s)) pour la source '{source.nom}' (ID: {source.pk}) n'est pas active dans la zone '{source.zone.nom}' (ID: {source.zone.pk}).",
+            level='info',
+            source_obj=source,
+            zone_obj=source.zone,
+            currency_code=code
+        )
+
+    for label, errors in calculation_errors.items():
+        first_date, code_iso, first_error = errors[0]
+        log_action(
+            actor_id=None,
+            action='PIPELINE_CALCULATION_ERROR',
+            details=f"Rejeu : erreur de calcul pour '{label}' (Code ISO: {code_iso}, {len(errors)} ligne(s), première au {first_date}) dans la source '{source.nom}' (ID: {source.pk}) de la zone '{source.zone.nom}' (ID: {source.zone.pk}). Erreur: {first_error}",
+            level='error',
+            source_obj=source,
+            zone_obj=source.zone,
+            currency_code=code_iso
+        )
+    error_count = sum(len(errors) for errors in calculation_errors.values())
+
+    period = f"du {dates[0]} au {dates[-1]}" if dates else "(aucune date)"
+    message = (
+        f"Rejeu terminé : {len(dates)} date(s) {period}. {injected_count} taux injectés/mis à jour. "
+        f"{skipped_identical_count} taux identiques ignorés."
+    )
+    if error_count:
+        message += f" {error_count} ligne(s) en erreur de calcul ignorée(s)."
 
     log_action(
         actor_id=None,
-        action='PIPELINE_EXECUTION_COMPLETED',
-        details=f"Pipeline terminé pour la source '{source.nom}' (ID: {source.pk}) dans la zone '{source.zone.nom}' (ID: {source.zone.pk}). {injected_count} taux injectés/mis à jour. {skipped_identical_count} taux identiques ignorés.",
+        action='PIPELINE_REPLAY_COMPLETED',
+        details=f"{message} Source '{source.nom}' (ID: {source.pk}), zone '{source.zone.nom}' (ID: {source.zone.pk}).",
         level='info',
         source_obj=source,
         zone_obj=source.zone
     )
-    return f"Traitement terminé. {injected_count} taux injectés/mis à jour. {skipped_identical_count} taux identiques ignorés."
\ No newline at end of file
+    return {
+        'status': 'ok' if dates else 'no_data',
+        'message': message,
+        'dates': len(dates),
+        'injected': injected_count,
+        'identical': skipped_identical_count,
+        'errors': error_count,
+        'unmapped': sorted(unmapped),
+        'inactive': sorted(inactive),
+    }
@@ -0,0 +1,90 @@
+# core/pipeline_runner.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+from .models import ZoneMonetaire
+from .pipeline import run_pipeline
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def run_pipeline_for_zone(zone_id, zone_nom):
+    """
+    Exécute le pipeline de la source d'une zone (la clé primaire de Source est la zone)
+    dans sa propre transaction, et retourne une ligne de rapport.
+    Prévue pour être appelée dans un thread : la connexion du thread est fermée à la fin.
+    """
+    started = time.perf_counter()
+    try:
+        result = run_pipeline(zone_id)
+        status = result['status']
+        message = result['message']
+        rows_written = result['injected']
+        identical = result['identical']
+    except Exception as e:
+        status = 'error'
+        message = f"Erreur inattendue : {e}"
+        rows_written = 0
+        identical = 0
+    finally:
+        connection.close()
+
+    return {
+        'zone_id': zone_id,
+        'zone_nom': zone_nom,
+        'status': status,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        'rows_written': rows_written,
+        'identical': identical,
+        'message': message,
+    }
+
+
+def run_pipelines_for_active_zones(max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Exécute le pipeline de toutes les zones actives ayant une source, en parallèle
+    sur un pool de threads (une connexion et une transaction courte par zone).
+    Retourne le rapport trié par nom de zone.
+    """
+    zones = list(
+        ZoneMonetaire.objects.filter(is_active=True, source__isnull=False)
+        .order_by('nom')
+        .values_list('pk', 'nom')
+    )
+    if not zones:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(zones)))) as executor:
+        report = list(executor.map(lambda zone: run_pipeline_for_zone(*zone), zones))
+
+    return sorted(report, key=lambda line: line['zone_nom'])
+
+
+def summarize_pipeline_report(report):
+    """
+    Retourne un résumé d'une ligne du rapport : zones traitées, échecs, lignes écrites.
+    """
+    failures = [line for line in report if line['status'] == 'error']
+    rows_written = sum(line['rows_written'] for line in report)
+    total_ms = sum(line['duration_ms'] for line in report)
+    return (
+        f"{len(report)} zone(s) traitée(s), {len(failures)} échec(s), "
+        f"{rows_written} taux écrits, {total_ms:.0f} ms cumulés."
+    )
+
+
+def format_pipeline_report(report):
+    """
+    Met en forme le rapport sous forme de tableau texte (commande de gestion, logs).
+    """
+    lines = [f"{'Zone':<20} | {'Statut':<8} | {'Durée (ms)':>10} | {'Écrits':>6} | {'Identiques':>10} | Message"]
+    for line in report:
+        lines.append(
+            f"{line['zone_nom'][:20]:<20} | {line['status']:<8} | {line['duration_ms']:>10.1f} | "
+            f"{line['rows_written']:>6} | {line['identical']:>10} | {line['message']}"
+        )
+    lines.append(summarize_pipeline_report(report))
+    return "\n".join(lines)
@@ -0,0 +1,170 @@
+# core/pipeline_sql.py
+
+"""
+Moteur SQL du pipeline : la résolution des alias, le filtre des devises actives, le calcul
+du taux normalisé et l'upsert dans ExchangeRate sont faits par PostgreSQL, en une seule
+requête INSERT ... SELECT, sans charger les données brutes en Python.
+
+Les règles sont celles du moteur Python (core/pipeline.py) :
+- l'alias est cherché d'abord sur le nom brut, puis sur le code ISO brut (les alias sont
+  stockés en MAJUSCULES, voir DeviseAlias.save) ;
+- si plusieurs lignes brutes pointent vers la même devise, la ligne la plus ancienne
+  (date_scraping, puis id) l'emporte, comme dans la boucle Python ;
+- taux_normalise = valeur_brute / multiplicateur (1 si <= 0), arrondi à 9 décimales
+  « au pair le plus proche », comme Decimal.quantize.
+"""
+
+from django.db import connection
+
+from .models import (
+    ScrapedCurrencyRaw, DeviseAlias, Devise, ActivatedCurrency, ExchangeRate, LatestExchangeRate
+)
+from .latest_rates_cache import invalidate_latest_rates
+
+_TABLES = {
+    'raw': ScrapedCurrencyRaw._meta.db_table,
+    'alias': DeviseAlias._meta.db_table,
+    'devise': Devise._meta.db_table,
+    'activated': ActivatedCurrency._meta.db_table,
+    'rate': ExchangeRate._meta.db_table,
+    'latest': LatestExchangeRate._meta.db_table,
+}
+
+# Lignes brutes du lot avec la devise officielle résolue (NULL si aucun alias ne correspond).
+_RAW_WITH_DEVISE = """
+    SELECT r.id, r.date_scraping, r.nom_devise_brut, r.code_iso_brut, r.valeur_brute, r.multiplicateur_brut,
+           COALESCE(a_nom.devise_officielle_id, a_code.devise_officielle_id) AS devise_id
+    FROM {raw} r
+    LEFT JOIN {alias} a_nom ON r.nom_devise_brut <> '' AND a_nom.alias = upper(r.nom_devise_brut)
+    LEFT JOIN {alias} a_code ON r.code_iso_brut <> '' AND a_code.alias = upper(r.code_iso_brut)
+    WHERE r.source_id = %(source_id)s AND r.date_publication_brut = %(date_publication)s
+"""
+
+# round() de PostgreSQL arrondit les demis « loin de zéro » : les demis exacts sont
+# ramenés au chiffre pair pour rester identiques à Decimal.quantize (ROUND_HALF_EVEN).
+_NORMALIZED_RATE = """
+    CASE
+        WHEN q.quotient * 1000000000 - trunc(q.quotient * 1000000000) = 0.5
+             AND mod(trunc(q.quotient * 1000000000), 2) = 0
+        THEN trunc(q.quotient, 9)
+        ELSE round(q.quotient, 9)
+    END
+"""
+
+# Le résultat final liste chaque devise résolue avec un indicateur « écrite ». Le NOT IN sur
+# 'written' est exécuté en sous-plan haché ; une LEFT JOIN entre les deux CTE (sans statistiques)
+# donnait une boucle imbriquée quadratique sur les gros lots.
+_INJECT_SQL = """
+    WITH raw AS ({raw_with_devise}),
+    resolved AS (
+        SELECT DISTINCT ON (raw.devise_id)
+               raw.devise_id, raw.valeur_brute, raw.multiplicateur_brut, {normalized_rate} AS taux_normalise
+        FROM raw
+        JOIN {activated} ac ON ac.zone_id = %(zone_id)s AND ac.devise_id = raw.devise_id AND ac.is_active
+        CROSS JOIN LATERAL (
+            SELECT raw.valeur_brute / (CASE WHEN raw.multiplicateur_brut > 0 THEN raw.multiplicateur_brut ELSE 1 END) AS quotient
+        ) q
+        ORDER BY raw.devise_id, raw.date_scraping, raw.id
+    ),
+    written AS (
+        INSERT INTO {rate} AS er (devise_id, zone_id, date_publication, taux_source, multiplicateur_source,
+                                  taux_normalise, is_latest, date_creation_interne)
+        SELECT devise_id, %(zone_id)s, %(date_publication)s, valeur_brute, multiplicateur_brut,
+               taux_normalise, TRUE, now()
+        FROM resolved
+        ON CONFLICT (devise_id, zone_id, date_publication) DO UPDATE SET
+            taux_source = EXCLUDED.taux_source,
+            multiplicateur_source = EXCLUDED.multiplicateur_source,
+            taux_normalise = EXCLUDED.taux_normalise,
+            is_latest = TRUE
+        WHERE (er.taux_source, er.multiplicateur_source, er.taux_normalise)
+              IS DISTINCT FROM (EXCLUDED.taux_source, EXCLUDED.multiplicateur_source, EXCLUDED.taux_normalise)
+        RETURNING devise_id
+    )
+    SELECT devise_id, TRUE FROM written
+    UNION ALL
+    SELECT devise_id, FALSE FROM resolved WHERE devise_id NOT IN (SELECT devise_id FROM written)
+"""
+
+# Anti-jointure compagnon : lignes du lot sans alias, ou dont la devise n'est pas active dans la zone.
+_UNRESOLVED_SQL = """
+    WITH raw AS ({raw_with_devise})
+    SELECT raw.nom_devise_brut, raw.code_iso_brut, raw.devise_id, d.nom
+    FROM raw
+    LEFT JOIN {devise} d ON d.code = raw.devise_id
+    WHERE raw.devise_id IS NULL OR NOT EXISTS (
+        SELECT 1 FROM {activated} ac
+        WHERE ac.zone_id = %(zone_id)s AND ac.devise_id = raw.devise_id AND ac.is_active
+    )
+    ORDER BY raw.date_scraping DESC, raw.id DESC
+"""
+
+_UPSERT_LATEST_SQL = """
+    INSERT INTO {latest} AS snap (zone_id, devise_id, date_publication, taux_source, multiplicateur_source,
+                                  taux_normalise, date_maj)
+    SELECT zone_id, devise_id, date_publication, taux_source, multiplicateur_source, taux_normalise, now()
+    FROM {rate}
+    WHERE zone_id = %(zone_id)s AND date_publication = %(date_publication)s AND devise_id = ANY(%(devise_ids)s)
+    ON CONFLICT (zone_id, devise_id) DO UPDATE SET
+        date_publication = EXCLUDED.date_publication,
+        taux_source = EXCLUDED.taux_source,
+        multiplicateur_source = EXCLUDED.multiplicateur_source,
+        taux_normalise = EXCLUDED.taux_normalise,
+        date_maj = EXCLUDED.date_maj
+    WHERE (snap.date_publication, snap.taux_source, snap.multiplicateur_source, snap.taux_normalise)
+          IS DISTINCT FROM (EXCLUDED.date_publication, EXCLUDED.taux_source, EXCLUDED.multiplicateur_source, EXCLUDED.taux_normalise)
+"""
+
+
+def _sql(template):
+    return template.format(
+        raw_with_devise=_RAW_WITH_DEVISE.format(**_TABLES),
+        normalized_rate=_NORMALIZED_RATE,
+        **_TABLES
+    )
+
+
+def _params(source, date_publication, **extra):
+    return {'source_id': source.pk, 'zone_id': source.zone_id, 'date_publication': date_publication, **extra}
+
+
+def find_unresolved_raw_rates(source, date_publication):
+    """
+    Retourne les lignes brutes du lot qui ne seront pas injectées, sous forme de dicts :
+    nom_devise_brut, code_iso_brut, devise_id (None si non mappée) et devise_nom.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_sql(_UNRESOLVED_SQL), _params(source, date_publication))
+        return [
+            {'nom_devise_brut': nom, 'code_iso_brut': code, 'devise_id': devise_id, 'devise_nom': devise_nom}
+            for nom, code, devise_id, devise_nom in cursor.fetchall()
+        ]
+
+
+def inject_rates_sql(source, date_publication):
+    """
+    Injecte le lot de la date donnée en une seule requête INSERT ... SELECT ... ON CONFLICT DO UPDATE.
+    Les taux identiques ne sont pas réécrits. Retourne {code devise: True si écrit, False si identique}
+    pour toutes les devises résolues et actives du lot.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_sql(_INJECT_SQL), _params(source, date_publication))
+        return dict(cursor.fetchall())
+
+
+def upsert_latest_exchange_rates_sql(source, date_publication, devise_ids):
+    """
+    Reporte dans l'instantané LatestExchangeRate les taux de la date donnée pour ces devises,
+    sans réécrire les lignes déjà à jour (le cache des derniers taux de la zone est invalidé
+    après le commit si des lignes ont changé).
+    """
+    if not devise_ids:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _sql(_UPSERT_LATEST_SQL), _params(source, date_publication, devise_ids=list(devise_ids))
+        )
+        written = cursor.rowcount
+    if written:
+        invalidate_latest_rates([source.zone_id])
+    return written
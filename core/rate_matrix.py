@@ -0,0 +1,97 @@
+# core/rate_matrix.py
+
+"""
+Matrice des taux croisés d'une zone : pour chaque paire de devises (dont la devise de la
+zone, de taux 1), le taux to_rate / from_rate utilisé par la conversion de l'API.
+
+La matrice est calculée à partir du vecteur des taux normalisés de la zone (une requête,
+ou le cache des derniers taux) et mise en cache par (zone, date), sous la version des
+derniers taux de la zone (voir core/latest_rates_cache.py). Les taux d'une date peuvent
+encore changer (pipeline relancé dans la journée, taux reçus en plusieurs fois, rejeu de
+l'historique) : chaque commit du pipeline, qui incrémente la version, rend donc toutes les
+matrices de la zone obsolètes, y compris celles des dates passées.
+"""
+
+import sys
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .latest_rates_cache import DEFAULT_LATEST_RATES_CACHE_TTL, get_latest_rate_map, get_latest_rates_version
+from .models import ExchangeRate
+
+RATE_MATRIX_KEY = 'core:rate_matrix:{zone_id}:{date}:{version}'
+# Même précision que exchangeRateUsed dans /api/convert/
+RATE_MATRIX_QUANTUM = Decimal('0.000000001')
+
+
+def _rate_vector(zone, date=None):
+    if date is None:
+        rates = get_latest_rate_map(zone)
+    else:
+        rates = dict(
+            ExchangeRate.objects.filter(zone=zone, date_publication=date)
+            .order_by().values_list('devise_id', 'taux_normalise')
+        )
+    # Taux implicite de 1 pour la devise de base de la zone (si la zone a des taux à cette date)
+    if rates:
+        rates.setdefault(zone.nom.upper(), Decimal('1.0'))
+    return rates
+
+
+def compute_rate_matrix(rates):
+    """
+    Retourne {from: {to: to_rate / from_rate}} pour toutes les paires du vecteur
+    {code: taux normalisé} (les devises sans taux sont ignorées).
+    """
+    codes = sorted(code for code, rate in rates.items() if rate)
+    vector = [rates[code] for code in codes]
+    return {
+        from_code: {
+            to_code: to_rate / from_rate if to_code != from_code else Decimal(1)
+            for to_code, to_rate in zip(codes, vector)
+        }
+        for from_code, from_rate in zip(codes, vector)
+    }
+
+
+def _cache_key(zone, date):
+    version = get_latest_rates_version(zone.pk)
+    if version is None:
+        return None
+    return RATE_MATRIX_KEY.format(zone_id=zone.pk, date=date.isoformat() if date else 'latest', version=version)
+
+
+def get_rate_matrix(zone, date=None, currency_codes=None):
+    """
+    Matrice des taux croisés de la zone à une date (None = derniers taux), depuis le cache
+    ou, à défaut, calculée. Les valeurs sont des Decimal quantifiés. `currency_codes`
+    restreint les lignes et colonnes aux devises demandées.
+    """
+    key = _cache_key(zone, date)
+    matrix = None
+    if key is not None:
+        try:
+            matrix = cache.get(key)
+        except Exception as e:
+            print(f"[rate_matrix]  Cache indisponible : {e}", file=sys.stderr)
+            key = None
+    if matrix is None:
+        matrix = {
+            from_code: {to_code: rate.quantize(RATE_MATRIX_QUANTUM) for to_code, rate in row.items()}
+            for from_code, row in compute_rate_matrix(_rate_vector(zone, date)).items()
+        }
+        # Pas de matrice vide en cache : les taux de cette date peuvent encore arriver.
+        if key is not None and matrix:
+            try:
+                cache.set(key, matrix, timeout=getattr(settings, 'LATEST_RATES_CACHE_TTL', DEFAULT_LATEST_RATES_CACHE_TTL))
+            except Exception as e:
+                print(f"[rate_matrix]  Impossible de mettre en cache la matrice : {e}", file=sys.stderr)
+    if currency_codes:
+        currency_codes = set(currency_codes)
+        matrix = {
+            from_code: {to_code: rate for to_code, rate in row.items() if to_code in currency_codes}
+            for from_code, row in matrix.items() if from_code in currency_codes
+        }
+    return matrix
@@ -0,0 +1,122 @@
+# core/run_metrics.py
+
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import PipelineRun
+
+# Étapes mesurées, dans l'ordre d'une exécution complète (scraper puis pipeline).
+RUN_STAGES = [
+    ('fetch', "Scraper (téléchargement)"),
+    ('parse', "Analyse des taux du scraper"),
+    ('raw_ingest', "Écriture des données brutes"),
+    ('resolution', "Lecture et résolution des alias"),
+    ('rate_writes', "Écriture des taux"),
+    ('logging', "Écriture des logs"),
+]
+
+# Exécution instrumentée en cours (None = pas de mesure). Propre à chaque thread,
+# comme le tampon de logs : les zones traitées en parallèle ne se mélangent pas.
+_current_run = ContextVar('pipeline_run', default=None)
+
+
+class RunRecorder:
+    """
+    Accumule les mesures d'une exécution : durée et requêtes SQL par étape, volumes, résultat.
+    Une étape peut être ouverte plusieurs fois : ses mesures s'additionnent.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.source = None
+        self.status = 'ok'
+        self.message = ''
+        self.stages = {}
+        self.rows = {}
+        self.query_count = 0
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.query_count += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        queries_before = self.query_count
+        try:
+            yield
+        finally:
+            measures = self.stages.setdefault(name, {'ms': 0.0, 'queries': 0})
+            measures['ms'] = round(measures['ms'] + (time.perf_counter() - started) * 1000, 3)
+            measures['queries'] += self.query_count - queries_before
+
+
+@contextmanager
+def recording_run(kind):
+    """
+    Mesure l'exécution du bloc et l'enregistre dans PipelineRun à la sortie, y compris en cas
+    d'exception. Un bloc imbriqué (pipeline lancé par le scraper) rejoint l'exécution englobante,
+    qui reste seule à écrire. À ouvrir en dehors de buffered_logs() pour que l'écriture des logs
+    soit mesurée, et en dehors de toute transaction atomique.
+    """
+    if _current_run.get() is not None:
+        yield _current_run.get()
+        return
+
+    recorder = RunRecorder(kind)
+    token = _current_run.set(recorder)
+    started_at = timezone.now()
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(recorder._count_query):
+            yield recorder
+    except Exception as e:
+        recorder.status = 'error'
+        recorder.message = recorder.message or str(e)
+        raise
+    finally:
+        _current_run.reset(token)
+        try:
+            PipelineRun.objects.create(
+                source=recorder.source,
+                kind=kind,
+                status=recorder.status,
+                started_at=started_at,
+                duration_ms=round((time.perf_counter() - started) * 1000, 3),
+                query_count=recorder.query_count,
+                stages=recorder.stages,
+                rows=recorder.rows,
+                message=recorder.message[:2000],
+            )
+        except Exception as e:
+            print(f"[run_metrics]  Impossible d'enregistrer l'exécution : {e}", file=sys.stderr)
+
+
+def run_stage(name):
+    """
+    Mesure une étape de l'exécution en cours ; sans effet hors d'un bloc recording_run().
+    """
+    recorder = _current_run.get()
+    return recorder.stage(name) if recorder is not None else nullcontext()
+
+
+def record_run(source=None, status=None, message=None, **rows):
+    """
+    Complète l'exécution en cours : source traitée, résultat et volumes (ex: raw_rows=40).
+    Sans effet hors d'un bloc recording_run().
+    """
+    recorder = _current_run.get()
+    if recorder is None:
+        return
+    if source is not None:
+        recorder.source = source
+    if status is not None:
+        recorder.status = status
+    if message is not None:
+        recorder.message = message
+    recorder.rows.update(rows)
@@ -0,0 +1,34 @@
+# core/tasks.py
+
+from celery import shared_task
+from logs.utils import log_action
+from .pipeline import replay_source_history
+from .pipeline_runner import DEFAULT_MAX_WORKERS, run_pipelines_for_active_zones, summarize_pipeline_report
+
+
+@shared_task(name="core.tasks.run_pipelines_for_all_zones")
+def run_pipelines_for_all_zones(max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Tâche Celery qui relance le pipeline de toutes les zones actives en parallèle
+    et retourne le rapport par zone.
+    """
+    report = run_pipelines_for_active_zones(max_workers=max_workers)
+    failures = [line['zone_nom'] for line in report if line['status'] == 'error']
+
+    log_action(
+        actor_id=None,
+        action='PIPELINE_ALL_ZONES_COMPLETED',
+        details=f"Pipeline relancé pour toutes les zones actives. {summarize_pipeline_report(report)}"
+                + (f" Zones en échec : {', '.join(failures)}." if failures else ""),
+        level='warning' if failures else 'info'
+    )
+    return report
+
+
+@shared_task(name="core.tasks.replay_source_history")
+def replay_source_history_task(source_id, date_from=None, date_to=None):
+    """
+    Tâche Celery qui rejoue l'historique brut d'une source (dates au format YYYY-MM-DD).
+    Retourne le message de résultat.
+    """
+    return replay_source_history(source_id, date_from=date_from, date_to=date_to)['message']
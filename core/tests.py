@@ -1,3 +1,360 @@
-from django.test import TestCase
+# core/tests.py
 
-# Create your tests here.
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.models import (
+    ZoneMonetaire, Source, Devise, DeviseAlias, ActivatedCurrency,
+    ScrapedCurrencyRaw, ExchangeRate, LatestExchangeRate, PipelineRun
+)
+from core.pipeline import (
+    compute_normalized_rate, process_and_inject_rates, replay_source_history, run_pipeline, preview_pipeline
+)
+from logs.models import LogEntry
+from core.alias_resolver import bump_alias_version, get_alias_index, resolve_alias
+from core.pipeline_runner import run_pipelines_for_active_zones
+
+# Cache propre au test : l'index des alias et sa version ne doivent pas venir du Redis partagé.
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class PipelineTestMixin:
+    """
+    Crée une zone, sa source et un lot de devises brutes mappées et actives.
+    """
+
+    def create_zone_with_source(self, nom="TND"):
+        zone = ZoneMonetaire.objects.create(nom=nom)
+        source = Source.objects.create(
+            zone=zone,
+            nom=f"Source {nom}",
+            url_source="https://example.com/cours",
+            scraper_filename="bct_scraper.py"
+        )
+        return zone, source
+
+    def create_raw_batch(self, source, size, date_publication, valeur=Decimal('2.500000'), active=True):
+        for i in range(size):
+            code = f"C{i:02d}"
+            devise, _ = Devise.objects.get_or_create(code=code, defaults={'nom': f"Devise {code}"})
+            DeviseAlias.objects.get_or_create(alias=code, defaults={'devise_officielle': devise})
+            ActivatedCurrency.objects.get_or_create(zone=source.zone, devise=devise, defaults={'is_active': active})
+            ScrapedCurrencyRaw.objects.create(
+                source=source,
+                date_publication_brut=date_publication,
+                nom_devise_brut=code,
+                code_iso_brut=code,
+                valeur_brute=valeur + i,
+                multiplicateur_brut=10 if i % 2 else 1
+            )
+        bump_alias_version()
+
+
+class ProcessAndInjectRatesTestCase(PipelineTestMixin, TestCase):
+
+    def test_injects_normalized_rates_and_counts_identical(self):
+        zone, source = self.create_zone_with_source()
+        self.create_raw_batch(source, 4, date(2025, 7, 24))
+
+        result = process_and_inject_rates(source.pk)
+        self.assertIn("4 taux injectés/mis à jour. 0 taux identiques ignorés.", result)
+
+        rate = ExchangeRate.objects.get(zone=zone, devise_id="C01")
+        self.assertEqual(rate.taux_normalise, Decimal('0.350000000'))
+        self.assertTrue(rate.is_latest)
+
+        result = process_and_inject_rates(source.pk)
+        self.assertIn("0 taux injectés/mis à jour. 4 taux identiques ignorés.", result)
+
+    def test_new_publication_date_flips_is_latest(self):
+        zone, source = self.create_zone_with_source()
+        self.create_raw_batch(source, 3, date(2025, 7, 23))
+        process_and_inject_rates(source.pk)
+        self.create_raw_batch(source, 3, date(2025, 7, 24), valeur=Decimal('3.000000'))
+        process_and_inject_rates(source.pk)
+
+        latest = ExchangeRate.objects.filter(zone=zone, is_latest=True)
+        self.assertEqual(latest.count(), 3)
+        self.assertTrue(all(rate.date_publication == date(2025, 7, 24) for rate in latest))
+        self.assertEqual(ExchangeRate.objects.filter(zone=zone, is_latest=False).count(), 3)
+
+    def test_run_is_recorded_with_stage_timings_and_counts(self):
+        zone, source = self.create_zone_with_source()
+        self.create_raw_batch(source, 4, date(2025, 7, 24))
+        ScrapedCurrencyRaw.objects.create(
+            source=source, date_publication_brut=date(2025, 7, 24), nom_devise_brut="INCONNUE", code_iso_brut="XXX"
+        )
+        process_and_inject_rates(source.pk)
+
+        run = PipelineRun.objects.get()
+        self.assertEqual((run.source, run.kind, run.status), (source, PipelineRun.KIND_PIPELINE, 'ok'))
+        self.assertEqual(set(run.stages), {'resolution', 'rate_writes', 'logging'})
+        self.assertEqual(run.rows, {
+            'raw_rows': 5, 'rates_resolved': 4, 'unmapped': 1, 'inactive': 0,
+            'rates_written': 4, 'rates_identical': 0,
+        })
+
+    def test_latest_snapshot_follows_is_latest(self):
+        zone, source = self.create_zone_with_source()
+        self.create_raw_batch(source, 3, date(2025, 7, 23))
+        process_and_inject_rates(source.pk)
+        self.create_raw_batch(source, 3, date(2025, 7, 24), valeur=Decimal('3.000000'))
+        process_and_inject_rates(source.pk)
+
+        snapshot = {
+            (row.devise_id, row.date_publication, row.taux_normalise)
+            for row in LatestExchangeRate.objects.filter(zone=zone)
+        }
+        latest = {
+            (rate.devise_id, rate.date_publication, rate.taux_normalise)
+            for rate in ExchangeRate.objects.filter(zone=zone, is_latest=True)
+        }
+        self.assertEqual(snapshot, latest)
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        query_counts = []
+        for nom, size in (("SMALL", 5), ("LARGE", 60)):
+            zone, source = self.create_zone_with_source(nom)
+            self.create_raw_batch(source, size, date(2025, 7, 24))
+            with CaptureQueriesContext(connection) as queries:
+                process_and_inject_rates(source.pk)
+            query_counts.append(len(queries))
+            self.assertEqual(ExchangeRate.objects.filter(zone=zone, is_latest=True).count(), size)
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PreviewPipelineTestCase(PipelineTestMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_preview_reports_diff_without_writing(self):
+        zone, source = self.create_zone_with_source()
+        self.create_raw_batch(source, 4, date(2025, 7, 24))
+        process_and_inject_rates(source.pk)
+
+        ScrapedCurrencyRaw.objects.filter(source=source, code_iso_brut="C01").update(valeur_brute=Decimal('9.000000'))
+        ActivatedCurrency.objects.filter(zone=zone, devise_id="C02").update(is_active=False)
+        ExchangeRate.objects.filter(zone=zone, devise_id="C03").delete()
+        ScrapedCurrencyRaw.objects.create(
+            source=source, date_publication_brut=date(2025, 7, 24), nom_devise_brut="INCONNUE", code_iso_brut="XXX"
+        )
+        rates_before = list(ExchangeRate.objects.filter(zone=zone).values_list('devise_id', 'taux_normalise'))
+        logs_before = LogEntry.objects.count()
+
+        # Source, date la plus récente, lot brut, activations, taux existants (index des alias en cache).
+        with self.assertNumQueries(5):
+            preview = preview_pipeline(source.pk)
+
+        self.assertEqual(preview['status'], 'ok')
+        self.assertEqual([rate['devise'] for rate in preview['new']], ["C03"])
+        self.assertEqual([rate['devise'] for rate in preview['changed']], ["C01"])
+        self.assertEqual(preview['changed'][0]['ancien_taux_normalise'], Decimal('0.350000000'))
+        self.assertEqual(preview['changed'][0]['taux_normalise'], Decimal('0.900000000'))
+        self.assertEqual([rate['devise'] for rate in preview['identical']], ["C00"])
+        self.assertEqual([raw['code_iso_brut'] for raw in preview['unmapped']], ["XXX"])
+        self.assertEqual([item['devise'] for item in preview['inactive']], ["C02"])
+
+        self.assertEqual(list(ExchangeRate.objects.filter(zone=zone).values_list('devise_id', 'taux_normalise')), rates_before)
+        self.assertEqual(LogEntry.objects.count(), logs_before)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PipelineEngineParityTestCase(PipelineTestMixin, TestCase):
+    """
+    Le moteur SQL doit produire exactement les mêmes taux, compteurs et journaux que le moteur Python.
+    """
+    # (nom brut, code ISO brut, valeur brute, multiplicateur)
+    RAW_ROWS = [
+        ("DOLLAR DES USA", "USD", Decimal('2.905600'), 1),        # alias sur le nom
+        ("EURO ZONE", "EUR", Decimal('3.359500'), 0),             # repli sur le code, multiplicateur nul
+        ("YEN JAPONAIS", "JPY", Decimal('2.120000'), 100),        # non mappée
+        ("LIVRE STERLING", "GBP", Decimal('3.900000'), 1),        # inactive
+        ("FRANC SUISSE", "CHF", Decimal('3.100000'), 1),          # deux lignes pour la même devise
+        ("SUISSE", "CHF", Decimal('3.200000'), 1),
+        ("DINAR KOWEITIEN", "KWD", Decimal('1.000001'), 16),      # demi exact à la 10e décimale
+    ]
+
+    def setUp(self):
+        cache.clear()
+        for code in ("USD", "EUR", "GBP", "CHF", "KWD"):
+            Devise.objects.create(code=code, nom=f"Devise {code}")
+            DeviseAlias.objects.create(alias=code, devise_officielle_id=code)
+        DeviseAlias.objects.create(alias="DOLLAR DES USA", devise_officielle_id="USD")
+        bump_alias_version()
+
+    def create_engine_source(self, nom, moteur, date_publication=date(2025, 7, 24), offset=Decimal('0')):
+        zone = ZoneMonetaire.objects.filter(nom=nom).first()
+        if zone is None:
+            zone, source = self.create_zone_with_source(nom)
+            source.moteur_pipeline = moteur
+            source.save()
+            for code in ("USD", "EUR", "GBP", "CHF", "KWD"):
+                ActivatedCurrency.objects.create(zone=zone, devise_id=code, is_active=code != "GBP")
+        source = zone.source
+        ScrapedCurrencyRaw.objects.bulk_create([
+            ScrapedCurrencyRaw(
+                source=source, date_publication_brut=date_publication, nom_devise_brut=nom_brut,
+                code_iso_brut=code, valeur_brute=valeur + offset, multiplicateur_brut=multiplicateur
+            )
+            for nom_brut, code, valeur, multiplicateur in self.RAW_ROWS
+        ])
+        return zone, source
+
+    def snapshot(self, zone):
+        rates = sorted(
+            ExchangeRate.objects.filter(zone=zone).values_list(
+                'devise_id', 'date_publication', 'taux_source', 'multiplicateur_source', 'taux_normalise', 'is_latest'
+            )
+        )
+        latest = sorted(
+            LatestExchangeRate.objects.filter(zone=zone).values_list(
+                'devise_id', 'date_publication', 'taux_source', 'multiplicateur_source', 'taux_normalise'
+            )
+        )
+        logs = sorted(
+            LogEntry.objects.filter(zone=zone).exclude(action='PIPELINE_EXECUTION_COMPLETED').values_list(
+                'action', 'currency_code'
+            )
+        )
+        return rates, latest, logs
+
+    def run_both_engines(self, **kwargs):
+        results = []
+        for nom, moteur in (("PY", Source.MOTEUR_PYTHON), ("SQL", Source.MOTEUR_SQL)):
+            zone, source = self.create_engine_source(nom, moteur, **kwargs)
+            result = run_pipeline(source.pk)
+            results.append(((result['status'], result['injected'], result['identical']), self.snapshot(zone)))
+        return results
+
+    def test_engines_produce_identical_rates_counters_and_logs(self):
+        python_run, sql_run = self.run_both_engines()
+        self.assertEqual(python_run, sql_run)
+        self.assertEqual(python_run[0], ('ok', 4, 0))
+        rates = {rate[0]: rate for rate in python_run[1][0]}
+        self.assertEqual(rates["KWD"][4], Decimal('0.062500062'))
+        self.assertEqual(rates["EUR"][4], Decimal('3.359500000'))
+
+        for zone in ZoneMonetaire.objects.all():
+            result = run_pipeline(zone.source.pk)
+            self.assertEqual((result['injected'], result['identical']), (0, 4))
+
+    def test_engines_agree_on_new_publication_date(self):
+        self.run_both_engines(date_publication=date(2025, 7, 23))
+        python_run, sql_run = self.run_both_engines(date_publication=date(2025, 7, 24), offset=Decimal('0.5'))
+        self.assertEqual(python_run, sql_run)
+        self.assertEqual(
+            {rate[1] for rate in sql_run[1][0] if rate[5]}, {date(2025, 7, 24)}
+        )
+        self.assertEqual({row[1] for row in sql_run[1][1]}, {date(2025, 7, 24)})
+
+
+class ReplaySourceHistoryTestCase(PipelineTestMixin, TestCase):
+
+    def test_replays_every_date_after_alias_fix(self):
+        zone, source = self.create_zone_with_source()
+        for day in (22, 23, 24):
+            self.create_raw_batch(source, 3, date(2025, 7, day), valeur=Decimal(day))
+        ScrapedCurrencyRaw.objects.filter(source=source, code_iso_brut="C00").update(
+            nom_devise_brut="INCONNUE", code_iso_brut="XXX"
+        )
+        process_and_inject_rates(source.pk)
+        self.assertFalse(ExchangeRate.objects.filter(zone=zone, devise_id="C00").exists())
+
+        DeviseAlias.objects.create(alias="XXX", devise_officielle_id="C00")
+        bump_alias_version()
+        result = replay_source_history(source.pk, chunk_size=2)
+
+        self.assertEqual((result['dates'], result['injected'], result['identical']), (3, 7, 2))
+        latest = ExchangeRate.objects.filter(zone=zone, is_latest=True)
+        self.assertEqual(latest.count(), 3)
+        self.assertTrue(all(rate.date_publication == date(2025, 7, 24) for rate in latest))
+        self.assertEqual(LatestExchangeRate.objects.get(zone=zone, devise_id="C00").taux_normalise, Decimal(24))
+
+        result = replay_source_history(source.pk, date_from=date(2025, 7, 23))
+        self.assertEqual((result['dates'], result['injected'], result['identical']), (2, 0, 6))
+
+    def test_calculation_error_skips_row_and_replay_continues(self):
+        zone, source = self.create_zone_with_source()
+        for day in (23, 24):
+            self.create_raw_batch(source, 2, date(2025, 7, day))
+        ScrapedCurrencyRaw.objects.filter(source=source, code_iso_brut="C01", date_publication_brut=date(2025, 7, 23)).update(
+            valeur_brute=Decimal('-1')
+        )
+
+        def compute(valeur_brute, multiplicateur_brut):
+            if valeur_brute < 0:
+                raise InvalidOperation("valeur négative")
+            return compute_normalized_rate(valeur_brute, multiplicateur_brut)
+
+        with patch('core.pipeline.compute_normalized_rate', side_effect=compute):
+            result = replay_source_history(source.pk)
+
+        self.assertEqual((result['dates'], result['injected'], result['errors']), (2, 3, 1))
+        self.assertFalse(ExchangeRate.objects.filter(zone=zone, devise_id="C01", date_publication=date(2025, 7, 23)).exists())
+        self.assertEqual(ExchangeRate.objects.filter(zone=zone, is_latest=True).count(), 2)
+        self.assertTrue(LogEntry.objects.filter(action='PIPELINE_CALCULATION_ERROR', currency_code="C01").exists())
+
+    def test_query_count_does_not_depend_on_number_of_rows_per_chunk(self):
+        query_counts = []
+        for nom, size in (("SMALL", 2), ("LARGE", 20)):
+            zone, source = self.create_zone_with_source(nom)
+            for day in (23, 24):
+                self.create_raw_batch(source, size, date(2025, 7, day))
+            with CaptureQueriesContext(connection) as queries:
+                replay_source_history(source.pk)
+            query_counts.append(len(queries))
+            self.assertEqual(ExchangeRate.objects.filter(zone=zone, is_latest=True).count(), size)
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AliasResolverTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.usd = Devise.objects.create(code="USD", nom="Dollar US")
+        DeviseAlias.objects.create(alias="dollar des usa", devise_officielle=self.usd)
+        bump_alias_version()
+
+    def test_resolution_ignores_case_and_falls_back_to_next_identifier(self):
+        self.assertEqual(resolve_alias("Dollar des USA", "XXX"), self.usd)
+        self.assertEqual(resolve_alias("", "dollar des usa"), self.usd)
+        self.assertIsNone(resolve_alias("YEN", "JPY"))
+
+    def test_index_is_reused_until_version_is_bumped(self):
+        get_alias_index()
+        with self.assertNumQueries(0):
+            get_alias_index()
+
+        DeviseAlias.objects.create(alias="USD", devise_officielle=self.usd)
+        bump_alias_version()
+        with self.assertNumQueries(1):
+            self.assertIn("USD", get_alias_index())
+
+
+class RunPipelinesForActiveZonesTestCase(PipelineTestMixin, TransactionTestCase):
+
+    def test_runs_every_active_zone_and_reports_per_zone(self):
+        for nom, size in (("TND", 3), ("DZD", 5)):
+            zone, source = self.create_zone_with_source(nom)
+            self.create_raw_batch(source, size, date(2025, 7, 24))
+        inactive_zone, _ = self.create_zone_with_source("XOF")
+        inactive_zone.is_active = False
+        inactive_zone.save()
+
+        report = run_pipelines_for_active_zones(max_workers=2)
+
+        self.assertEqual([line['zone_nom'] for line in report], ["DZD", "TND"])
+        self.assertEqual([line['rows_written'] for line in report], [5, 3])
+        self.assertTrue(all(line['status'] == 'ok' for line in report))
+        self.assertEqual(ExchangeRate.objects.filter(is_latest=True).count(), 8)
@@ -1,12 +1,9 @@
-import os
-import json
-import subprocess
-from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from users.permissions import IsAdminTechniqueOnly
 from core.models import Source, ScrapedCurrencyRaw, ZoneMonetaire
+from scrapers.runtime import run_scraper, ScraperNotFound, ScraperTimeout, ScraperExecutionError, ScraperInvalidOutput
 from decimal import Decimal # Ajout de l'import pour Decimal
 from datetime import datetime # Importation nécessaire pour datetime.strptime
 
@@ -40,19 +37,8 @@ class SourceTauxCreateView(APIView):
             scraper_filename=scraper_filename
         )
 
-        script_path = os.path.join(settings.BASE_DIR, 'scrapers', 'scrapers', scraper_filename)
-        if not os.path.exists(script_path):
-            source.delete() # Supprimer la source si le script n'est pas trouvé
-            return Response(
-                {"error": f"Le script du scraper '{scraper_filename}' est introuvable."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
         try:
-            result = subprocess.run(
-                ['python', script_path], capture_output=True, text=True, check=True, timeout=60
-            )
-            scraped_data = json.loads(result.stdout)
+            scraped_data = run_scraper(scraper_filename, timeout=60)
             
             raw_entries = []
             for item in scraped_data:
@@ -86,15 +72,18 @@ class SourceTauxCreateView(APIView):
             message = f"Source créée et {len(raw_entries)} devises récupérées avec succès."
 
         # Exceptions plus spécifiques pour l'exécution du scraper et le traitement des données
-        except subprocess.TimeoutExpired as e:
+        except ScraperNotFound as e:
+            source.delete() # Supprimer la source si le script n'est pas trouvé
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ScraperTimeout as e:
             source.delete() # Supprimer la source si le scraper échoue au timeout
             message = f"Erreur: L'exécution du scraper a dépassé le temps imparti : {e}"
             return Response({"error": message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except subprocess.CalledProcessError as e:
+        except ScraperExecutionError as e:
             source.delete() # Supprimer la source si le scraper échoue
-            message = f"Erreur d'exécution du scraper (code {e.returncode}): {e.stderr}"
+            message = f"Erreur d'exécution du scraper : {e}"
             return Response({"error": message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except json.JSONDecodeError as e:
+        except ScraperInvalidOutput as e:
             source.delete() # Supprimer la source si le JSON est invalide
             message = f"Erreur: Le scraper n'a pas renvoyé de JSON valide : {e}"
             return Response({"error": message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
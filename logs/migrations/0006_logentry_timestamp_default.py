@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0005_logentry_currency_code'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='logentry',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -1,6 +1,7 @@
 # logs/models.py
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from core.models import ZoneMonetaire, Source
 
 class LogEntry(models.Model):
@@ -23,7 +24,9 @@ class LogEntry(models.Model):
 
     action = models.CharField(max_length=100)
     details = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Horodatage pris à l'émission du log (et non à l'insertion) pour rester exact
+    # quand les logs d'une exécution sont écrits en une fois (voir logs.utils.buffered_logs).
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     level = models.CharField(max_length=20, default='info')
     currency_code = models.CharField(max_length=10, null=True, blank=True) # <-- ADD THIS LINE
 
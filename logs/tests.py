@@ -1,3 +1,43 @@
+# logs/tests.py
+
 from django.test import TestCase
 
-# Create your tests here.
+from core.models import ZoneMonetaire
+from logs.models import LogEntry
+from logs.utils import log_action, buffered_logs
+
+
+class BufferedLogsTestCase(TestCase):
+
+    def setUp(self):
+        self.zone = ZoneMonetaire.objects.create(nom="TND")
+
+    def test_entries_are_written_in_one_query_at_block_exit(self):
+        with self.assertNumQueries(1):
+            with buffered_logs():
+                for i in range(5):
+                    log_action(action='PIPELINE_TEST', details=f"Ligne {i}", zone_obj=self.zone)
+
+        entries = list(LogEntry.objects.order_by('timestamp'))
+        self.assertEqual([entry.details for entry in entries], [f"Ligne {i}" for i in range(5)])
+        self.assertTrue(all(entry.zone == self.zone and entry.level == 'info' for entry in entries))
+
+    def test_nested_block_joins_outer_buffer(self):
+        with buffered_logs():
+            log_action(action='SCRAPER_TEST', details="Extérieur")
+            with buffered_logs():
+                log_action(action='PIPELINE_TEST', details="Intérieur")
+            self.assertFalse(LogEntry.objects.exists())
+        self.assertEqual(LogEntry.objects.count(), 2)
+
+    def test_entries_are_flushed_on_failure(self):
+        with self.assertRaises(RuntimeError):
+            with buffered_logs():
+                log_action(action='PIPELINE_TEST', details="Avant l'erreur")
+                raise RuntimeError("échec")
+        self.assertTrue(LogEntry.objects.filter(details="Avant l'erreur").exists())
+
+    def test_noisy_info_logs_are_still_ignored(self):
+        with buffered_logs():
+            log_action(action='PIPELINE_UNMAPPED_CURRENCY', details="Bruit", level='info')
+        self.assertFalse(LogEntry.objects.exists())
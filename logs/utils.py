@@ -1,8 +1,53 @@
 from logs.models import LogEntry
 from users.models import CustomUser
 from core.models import ZoneMonetaire, Source
+from core.run_metrics import run_stage
+from contextlib import contextmanager
+from contextvars import ContextVar
 import sys
 
+# Tampon de logs de l'exécution en cours (None = écriture immédiate).
+# Un ContextVar est propre à chaque thread : les exécutions parallèles ne se mélangent pas.
+_log_buffer = ContextVar('log_buffer', default=None)
+
+
+@contextmanager
+def buffered_logs():
+    """
+    Regroupe tous les log_action() émis dans le bloc et les écrit en un seul bulk_create
+    à la sortie du bloc, y compris en cas d'exception. Les entrées sont identiques à celles
+    écrites une par une (horodatage compris).
+    Un bloc imbriqué rejoint le tampon du bloc englobant, qui reste seul à écrire.
+    À ouvrir en dehors de toute transaction atomique, pour que les logs survivent à un rollback
+    et ne prolongent pas la durée des verrous.
+    """
+    if _log_buffer.get() is not None:
+        yield
+        return
+
+    token = _log_buffer.set([])
+    try:
+        yield
+    finally:
+        entries = _log_buffer.get()
+        _log_buffer.reset(token)
+        with run_stage('logging'):
+            flush_log_entries(entries)
+
+
+def flush_log_entries(entries):
+    """
+    Écrit un lot d'entrées de log en une seule requête.
+    """
+    if not entries:
+        return
+    try:
+        LogEntry.objects.bulk_create(entries)
+    except Exception as e:
+        actions = ", ".join(sorted(set(entry.action for entry in entries)))
+        print(f"[log_action]  Erreur BD : {e} – {len(entries)} entrée(s) perdue(s), Actions={actions}", file=sys.stderr)
+
+
 def log_action(actor_id=None, action=None, details=None, level='info',
                zone_id=None, source_id=None, target_user_id=None, impersonator_id=None,
                currency_code=None, zone_obj=None, source_obj=None):
@@ -50,18 +95,26 @@ def log_action(actor_id=None, action=None, details=None, level='info',
         except Source.DoesNotExist:
             print(f"[log_action]  Source ID {source_id} not found", file=sys.stderr)
 
+    entry = LogEntry(
+        actor=actor,
+        impersonator=impersonator,
+        target_user=target_user,
+        zone=zone_obj,
+        source=source_obj,
+        action=action,
+        details=details,
+        level=level,
+        currency_code=currency_code
+    )
+
+    # Dans un bloc buffered_logs(), l'entrée sera écrite avec les autres à la fin de l'exécution
+    pending_entries = _log_buffer.get()
+    if pending_entries is not None:
+        pending_entries.append(entry)
+        return
+
     # Enregistrement en base
     try:
-        LogEntry.objects.create(
-            actor=actor,
-            impersonator=impersonator,
-            target_user=target_user,
-            zone=zone_obj,
-            source=source_obj,
-            action=action,
-            details=details,
-            level=level,
-            currency_code=currency_code
-        )
+        entry.save(force_insert=True)
     except Exception as e:
         print(f"[log_action]  Erreur BD : {e} – Action={action}", file=sys.stderr)
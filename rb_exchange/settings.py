@@ -133,6 +133,20 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 
 
+# Cache partagé entre les processus web et les workers (même instance Redis que le broker)
+REDIS_URL = config("REDIS_URL", default=CELERY_BROKER_URL)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'rb_exchange',
+    }
+}
+# Copies en cache des derniers taux d'une zone (invalidées par le pipeline) : durée de vie maximale, en secondes.
+LATEST_RATES_CACHE_TTL = config("LATEST_RATES_CACHE_TTL", default=86400, cast=int)
+# Taille maximale d'une page de l'historique des taux de l'API (pagination par curseur).
+API_HISTORY_PAGE_SIZE = config("API_HISTORY_PAGE_SIZE", default=500, cast=int)
+
 # Configuration Django Celery Beat
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler' # 
 
@@ -164,6 +178,24 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 WHITENOISE_AUTOREFRESH = DEBUG
 WHITENOISE_MAX_AGE = 31536000  # 1 an en prod
 SCRAPERS_DIR = BASE_DIR / 'scrapers' / 'scrapers'
+# Les scrapers sont importés une fois et appelés dans le worker (voir scrapers/runtime.py).
+# True = un processus Python séparé par scraping, pour isoler un scraper instable.
+SCRAPERS_SUBPROCESS_ISOLATION = config("SCRAPERS_SUBPROCESS_ISOLATION", default=False, cast=bool)
+SCRAPERS_TIMEOUT = config("SCRAPERS_TIMEOUT", default=120, cast=int)  # secondes par scraping
+# Récupération groupée (scrapers.tasks.run_scrapers_batch) : connexions du client partagé, requêtes simultanées par hôte.
+SCRAPERS_FETCH_MAX_CONNECTIONS = config("SCRAPERS_FETCH_MAX_CONNECTIONS", default=20, cast=int)
+SCRAPERS_FETCH_MAX_PER_HOST = config("SCRAPERS_FETCH_MAX_PER_HOST", default=2, cast=int)
+# Taux renvoyés par un scraper repris du cache (Redis) pendant ce délai, en secondes (0 = désactivé).
+SCRAPERS_RESULT_CACHE_TTL = config("SCRAPERS_RESULT_CACHE_TTL", default=300, cast=int)
+# Expiration du verrou par source (une exécution à la fois), en secondes : au-delà de SCRAPERS_TIMEOUT et du pipeline.
+SCRAPERS_LOCK_TIMEOUT = config("SCRAPERS_LOCK_TIMEOUT", default=600, cast=int)
+# Échecs de récupération (voir scrapers/health.py) : nouvelles tentatives avec délai exponentiel
+# (secondes, plafonné) puis disjoncteur ouvert après N échecs consécutifs, pendant le délai donné.
+SCRAPERS_RETRY_MAX = config("SCRAPERS_RETRY_MAX", default=3, cast=int)
+SCRAPERS_RETRY_BACKOFF = config("SCRAPERS_RETRY_BACKOFF", default=30, cast=int)
+SCRAPERS_RETRY_BACKOFF_MAX = config("SCRAPERS_RETRY_BACKOFF_MAX", default=600, cast=int)
+SCRAPERS_CIRCUIT_THRESHOLD = config("SCRAPERS_CIRCUIT_THRESHOLD", default=5, cast=int)
+SCRAPERS_CIRCUIT_COOLDOWN = config("SCRAPERS_CIRCUIT_COOLDOWN", default=1800, cast=int)
 SESSION_COOKIE_AGE = 3600
 SESSION_SAVE_EVERY_REQUEST = True
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
@@ -0,0 +1,92 @@
+# scrapers/fetch_engine.py
+
+"""
+Récupération concurrente des pages de plusieurs sources depuis un seul worker.
+
+Toutes les requêtes passent par un même httpx.AsyncClient (pool de connexions partagé),
+avec une limite de requêtes simultanées par hôte : plusieurs sources derrière ScraperAPI
+ne saturent pas le service. Un scraper qui expose build_request() et parse(content) est
+récupéré par le client asynchrone (requête conditionnelle, voir runtime.page_validators)
+puis analysé dans un thread ; les autres sont appelés via scrape() dans un thread
+(voir scrapers/runtime.py).
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+
+import httpx
+from django.conf import settings
+
+from .runtime import (
+    load_scraper, run_scraper_in_process, check_records, supports_conditional_fetch, conditional_headers,
+    page_validators, ScraperError, ScraperExecutionError, ScraperTimeout, DEFAULT_SCRAPER_TIMEOUT
+)
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_PER_HOST = 2
+
+
+async def _fetch_with_client(client, host_limits, scraper_filename, module, validators, timeout):
+    request = module.build_request()
+    host = httpx.URL(request['url']).host
+    async with host_limits[host]:
+        try:
+            response = await client.get(
+                request['url'], params=request.get('params'), headers=conditional_headers(request, validators),
+                timeout=request.get('timeout', timeout)
+            )
+            new_validators = page_validators(scraper_filename, response, validators)
+        except httpx.TimeoutException as e:
+            raise ScraperTimeout(f"Le scraper '{scraper_filename}' a dépassé le délai sur {host} : {e}") from e
+        except httpx.HTTPError as e:
+            raise ScraperExecutionError(f"Erreur: Échec de la requête vers {host} : {e}") from e
+    try:
+        records = await asyncio.to_thread(module.parse, response.content)
+    except Exception as e:
+        raise ScraperExecutionError(f"Erreur: {e}") from e
+    return check_records(scraper_filename, records), new_validators
+
+
+async def _fetch_one(client, host_limits, source_id, scraper_filename, validators, timeout):
+    started = time.perf_counter()
+    try:
+        module = load_scraper(scraper_filename)
+        if supports_conditional_fetch(module):
+            outcome = await _fetch_with_client(client, host_limits, scraper_filename, module, validators, timeout)
+        else:
+            outcome = await asyncio.to_thread(run_scraper_in_process, scraper_filename, timeout)
+    except ScraperError as e:
+        outcome = e
+    except Exception as e: # Erreur imprévue dans build_request() : rapportée comme une erreur du scraper
+        outcome = ScraperExecutionError(f"Erreur: {e}")
+    return source_id, outcome, round((time.perf_counter() - started) * 1000, 3)
+
+
+async def _fetch_all(scrapers_by_source, validators_by_source, timeout, max_connections, max_per_host):
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    host_limits = defaultdict(lambda: asyncio.Semaphore(max_per_host))
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True) as client:
+        return await asyncio.gather(*(
+            _fetch_one(client, host_limits, source_id, scraper_filename, validators_by_source.get(source_id), timeout)
+            for source_id, scraper_filename in scrapers_by_source.items()
+        ))
+
+
+def fetch_sources(scrapers_by_source, validators_by_source=None, timeout=None, max_connections=None,
+                  max_per_host=None):
+    """
+    Récupère et analyse en parallèle les pages de plusieurs sources ({source_id: scraper_filename}),
+    en requêtes conditionnelles si les validateurs de la page précédente sont fournis.
+    Retourne {source_id: ((taux, validateurs) ou ScraperError, durée en ms)} ; une source en
+    échec ou inchangée n'interrompt pas les autres.
+    """
+    if not scrapers_by_source:
+        return {}
+    timeout = timeout or getattr(settings, 'SCRAPERS_TIMEOUT', DEFAULT_SCRAPER_TIMEOUT)
+    max_connections = max_connections or getattr(settings, 'SCRAPERS_FETCH_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS)
+    max_per_host = max_per_host or getattr(settings, 'SCRAPERS_FETCH_MAX_PER_HOST', DEFAULT_MAX_PER_HOST)
+    results = asyncio.run(
+        _fetch_all(scrapers_by_source, validators_by_source or {}, timeout, max_connections, max_per_host)
+    )
+    return {source_id: (outcome, elapsed_ms) for source_id, outcome, elapsed_ms in results}
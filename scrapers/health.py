@@ -0,0 +1,98 @@
+# scrapers/health.py
+
+"""
+Santé des sources (core.models.SourceHealth) : nouvelles tentatives et disjoncteur.
+
+Une récupération en échec (ScraperExecutionError : site injoignable, erreur HTTP, délai
+dépassé) est retentée jusqu'à SCRAPERS_RETRY_MAX fois, après un délai exponentiel avec
+gigue (SCRAPERS_RETRY_BACKOFF × 2^tentative, plafonné à SCRAPERS_RETRY_BACKOFF_MAX). La
+tentative suivante est une nouvelle tâche planifiée : le worker n'attend pas.
+
+Après SCRAPERS_CIRCUIT_THRESHOLD échecs consécutifs, le disjoncteur s'ouvre : les exécutions
+sont ignorées pendant SCRAPERS_CIRCUIT_COOLDOWN secondes, sans requête vers le site. La
+première exécution après ce délai sert de sonde : une réussite referme le disjoncteur, un
+échec le rouvre pour un nouveau délai.
+"""
+
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.models import SourceHealth
+
+DEFAULT_RETRY_MAX = 3
+DEFAULT_RETRY_BACKOFF = 30
+DEFAULT_RETRY_BACKOFF_MAX = 600
+DEFAULT_CIRCUIT_THRESHOLD = 5
+DEFAULT_CIRCUIT_COOLDOWN = 1800
+# Poids de la dernière mesure dans la latence moyenne (moyenne mobile exponentielle)
+LATENCY_SMOOTHING = 0.2
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def circuit_open_until(source):
+    """
+    Retourne la fin du délai du disjoncteur si celui-ci est ouvert et que le délai court
+    encore (exécution à ignorer), None sinon (disjoncteur fermé, ou exécution de sonde).
+    """
+    health = SourceHealth.objects.filter(source=source).first()
+    if health is None or not health.circuit_ouvert:
+        return None
+    if health.circuit_ouvert_jusqua and health.circuit_ouvert_jusqua > timezone.now():
+        return health.circuit_ouvert_jusqua
+    return None
+
+
+def record_success(source, latency_ms=None):
+    """Enregistre une récupération réussie : échecs remis à zéro, disjoncteur refermé."""
+    health, _ = SourceHealth.objects.get_or_create(source=source)
+    health.echecs_consecutifs = 0
+    health.derniere_reussite = timezone.now()
+    health.etat_circuit = SourceHealth.CIRCUIT_FERME
+    health.circuit_ouvert_jusqua = None
+    if latency_ms is not None:
+        if health.latence_moyenne_ms is None:
+            health.latence_moyenne_ms = latency_ms
+        else:
+            health.latence_moyenne_ms += LATENCY_SMOOTHING * (latency_ms - health.latence_moyenne_ms)
+    health.save()
+    return health
+
+
+def record_failure(source, message):
+    """
+    Enregistre un échec de récupération et ouvre le disjoncteur si le seuil d'échecs
+    consécutifs est atteint (ou si la sonde a échoué). Retourne le SourceHealth.
+    """
+    health, _ = SourceHealth.objects.get_or_create(source=source)
+    now = timezone.now()
+    health.echecs_consecutifs += 1
+    health.dernier_echec = now
+    health.derniere_erreur = message[:2000]
+    if health.echecs_consecutifs >= _setting('SCRAPERS_CIRCUIT_THRESHOLD', DEFAULT_CIRCUIT_THRESHOLD):
+        health.etat_circuit = SourceHealth.CIRCUIT_OUVERT
+        health.circuit_ouvert_jusqua = now + timedelta(
+            seconds=_setting('SCRAPERS_CIRCUIT_COOLDOWN', DEFAULT_CIRCUIT_COOLDOWN)
+        )
+    health.save()
+    return health
+
+
+def retry_delay(attempt):
+    """
+    Délai (secondes) avant la tentative suivant la tentative n° `attempt` (0 = première
+    exécution), ou None si le nombre maximal de nouvelles tentatives est atteint.
+    """
+    if attempt >= _setting('SCRAPERS_RETRY_MAX', DEFAULT_RETRY_MAX):
+        return None
+    ceiling = min(
+        _setting('SCRAPERS_RETRY_BACKOFF', DEFAULT_RETRY_BACKOFF) * 2 ** attempt,
+        _setting('SCRAPERS_RETRY_BACKOFF_MAX', DEFAULT_RETRY_BACKOFF_MAX)
+    )
+    # Gigue : les sources en échec au même moment ne réessaient pas ensemble.
+    return round(random.uniform(ceiling / 2, ceiling), 1)
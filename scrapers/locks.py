@@ -0,0 +1,78 @@
+# scrapers/locks.py
+
+"""
+Verrou (Redis) par source : une seule exécution du scraper et de l'ingestion à la fois pour
+une même source, entre tous les workers. Une exécution lancée pendant qu'une autre est en
+cours (tâche planifiée et clic manuel, tentatives qui s'empilent) est abandonnée : elle
+profitera du résultat de la première via le cache des taux (scrapers/result_cache.py).
+
+Le verrou expire après SCRAPERS_LOCK_TIMEOUT secondes, pour qu'un worker arrêté en cours
+d'exécution ne bloque pas la source. Si le cache est indisponible, l'exécution a lieu sans verrou.
+La libération ne supprime le verrou que s'il porte encore le jeton de l'exécution : sur Redis,
+la comparaison et la suppression se font en un seul script Lua (atomique).
+"""
+
+import sys
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+
+DEFAULT_LOCK_TIMEOUT = 600
+SOURCE_LOCK_KEY = 'scrapers:lock:{source_id}'
+
+# Supprime la clé seulement si elle contient encore le jeton donné.
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _release(key, token):
+    """Libère le verrou s'il porte encore `token` (il a pu expirer et être pris par une autre exécution)."""
+    backend = caches['default']
+    if isinstance(backend, RedisCache):
+        redis_key = backend.make_and_validate_key(key)
+        client = backend._cache.get_client(redis_key, write=True)
+        client.eval(RELEASE_SCRIPT, 1, redis_key, backend._cache._serializer.dumps(token))
+    elif backend.get(key) == token:
+        # Autres backends (cache local des tests) : pas de concurrence entre processus.
+        backend.delete(key)
+
+
+def is_source_locked(source_id):
+    """Une exécution est en cours pour la source (False si le cache est indisponible)."""
+    try:
+        return cache.get(SOURCE_LOCK_KEY.format(source_id=source_id)) is not None
+    except Exception as e:
+        print(f"[locks]  Cache indisponible : {e}", file=sys.stderr)
+        return False
+
+
+@contextmanager
+def source_run_lock(source_id):
+    """
+    Prend le verrou de la source pour la durée du bloc. Produit True si le verrou est pris
+    (ou si le cache est indisponible), False si une autre exécution le détient.
+    """
+    key = SOURCE_LOCK_KEY.format(source_id=source_id)
+    token = uuid.uuid4().hex
+    locked = False
+    try:
+        locked = cache.add(key, token, timeout=getattr(settings, 'SCRAPERS_LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT))
+        acquired = locked
+    except Exception as e:
+        print(f"[locks]  Cache indisponible, exécution sans verrou : {e}", file=sys.stderr)
+        acquired = True
+    try:
+        yield acquired
+    finally:
+        if locked:
+            try:
+                _release(key, token)
+            except Exception as e:
+                print(f"[locks]  Impossible de libérer le verrou de la source {source_id} : {e}", file=sys.stderr)
@@ -0,0 +1,229 @@
+# scrapers/management/commands/benchmark_ingestion.py
+
+import itertools
+import os
+import statistics
+import string
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.test.utils import override_settings
+
+from core.alias_resolver import bump_alias_version
+from core.models import (
+    ZoneMonetaire, Source, Devise, DeviseAlias, ActivatedCurrency, ExchangeRate, PipelineRun
+)
+from logs.models import LogEntry
+from scrapers.runtime import load_scraper
+from scrapers.tasks import scrape_and_ingest
+from .benchmark_scraper_parsing import FIXTURES_DIR
+
+# Scraper testé, variable d'environnement qui redirige sa requête, page enregistrée
+SCRAPERS = {
+    'bct': ('bct_scraper.py', 'BCT_SCRAPER_URL', 'bct_cours.html'),
+    'boa': ('boa_scraper.py', 'SCRAPER_API_URL', 'boa_taux.html'),
+}
+# Colonnes du rapport : (titre, étapes du PipelineRun additionnées, étapes soustraites).
+# L'analyse de la page (scraper_parse) est mesurée à l'intérieur de l'étape 'fetch' : elle en
+# est retirée et comptée avec la conversion des taux en lignes brutes (parse).
+STAGE_COLUMNS = [
+    ('fetch', ['fetch'], ['scraper_parse']),
+    ('parse', ['scraper_parse', 'parse'], []),
+    ('ingest', ['raw_ingest'], []),
+    ('pipeline', ['resolution', 'rate_writes'], []),
+    ('logs', ['logging'], []),
+]
+SYNTHETIC_CODES = [''.join(letters) for letters in itertools.product(string.ascii_uppercase, repeat=3)]
+
+
+def build_bct_page(codes):
+    """Page au format de la BCT (date « Journée du » et table désignation / code / unité / valeur)."""
+    rows = "".join(
+        f"<tr><td>Devise {code}</td><td>{code}</td><td>1</td><td>{1 + index / 1000:.4f}</td></tr>"
+        for index, code in enumerate(codes)
+    )
+    return (
+        "<html><body><h3>Journée du 24/07/2025</h3><table>"
+        "<tr><th>Désignation</th><th>Code</th><th>Unité</th><th>Valeur</th></tr>"
+        f"{rows}</table></body></html>"
+    ).encode('utf-8')
+
+
+def build_boa_page(codes):
+    """Page au format de la Banque d'Algérie (une colonne par date, la plus récente en premier)."""
+    rows = "".join(
+        f"<tr><td>{code}</td><td>{100 + index / 100:.4f}</td><td>{99 + index / 100:.4f}</td></tr>".replace('.', ',')
+        for index, code in enumerate(codes)
+    )
+    return (
+        "<html><body><table><thead><tr><th>Devise</th><th>24-07-2025</th><th>23-07-2025</th></tr></thead>"
+        f"<tbody>{rows}</tbody></table></body></html>"
+    ).encode('utf-8')
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure l'ingestion de bout en bout (scrape_and_ingest : récupération, analyse, données brutes, "
+        "pipeline, jusqu'aux ExchangeRate enregistrés) des scrapers BCT et BOA sur des pages servies en local : "
+        "pages enregistrées de scrapers/fixtures/ et pages synthétiques de plusieurs centaines de devises. "
+        "Aucun accès réseau. Les zones, sources et taux créés sont supprimés à la fin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help="Exécutions par scénario, médiane rapportée (défaut: 3).")
+        parser.add_argument(
+            '--sizes', default='300,1000',
+            help="Nombre de devises des pages synthétiques, séparés par des virgules (défaut: 300,1000)."
+        )
+        parser.add_argument(
+            '--scrapers', default=','.join(SCRAPERS),
+            help=f"Scrapers à mesurer, séparés par des virgules (défaut: {','.join(SCRAPERS)})."
+        )
+        parser.add_argument(
+            '--engine', default=Source.MOTEUR_PYTHON, choices=[value for value, _ in Source.MOTEUR_CHOICES],
+            help="Moteur du pipeline des sources de test (défaut: python)."
+        )
+        parser.add_argument('--isolated', action='store_true', help="Scrapers en sous-processus (SCRAPERS_SUBPROCESS_ISOLATION).")
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['scrapers'].split(',') if name.strip()]
+        unknown = set(names) - set(SCRAPERS)
+        if unknown:
+            raise CommandError(f"Scrapers inconnus : {', '.join(sorted(unknown))}.")
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        if any(size > len(SYNTHETIC_CODES) for size in sizes):
+            raise CommandError(f"Au plus {len(SYNTHETIC_CODES)} devises par page synthétique.")
+
+        # Pages servies : /<scraper>/fixture (page enregistrée) et /<scraper>/<taille> (synthétique)
+        pages = {}
+        for name in names:
+            pages[f"/{name}/fixture"] = (FIXTURES_DIR / SCRAPERS[name][2]).read_bytes()
+            for size in sizes:
+                builder = build_bct_page if name == 'bct' else build_boa_page
+                pages[f"/{name}/{size}"] = builder(SYNTHETIC_CODES[:size])
+        server = self._serve(pages)
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+        env_names = {SCRAPERS[name][1] for name in names}
+        previous_env = {env_name: os.environ.get(env_name) for env_name in env_names}
+        created = {'zones': [], 'devises': set(), 'aliases': set()}
+        settings_override = override_settings(
+            SCRAPERS_SUBPROCESS_ISOLATION=options['isolated'],
+            SCRAPERS_RESULT_CACHE_TTL=0, # Chaque exécution télécharge la page
+            SCRAPERS_RETRY_MAX=0,
+        )
+        try:
+            settings_override.enable()
+            self.stdout.write(
+                f"Moteur du pipeline : {options['engine']} | "
+                f"{'sous-processus' if options['isolated'] else 'worker'} | médiane de {options['runs']} exécution(s)"
+            )
+            self.stdout.write(
+                f"{'Scénario':<14} | {'Taux':>5} | {'Total (ms)':>10} | "
+                + " | ".join(f"{title:>9}" for title, _, _ in STAGE_COLUMNS)
+                + f" | {'Requêtes':>8}"
+            )
+            for path in pages:
+                name = path.split('/')[1]
+                os.environ[SCRAPERS[name][1]] = f"{base_url}{path}"
+                measures = [
+                    self._run_once(name, pages[path], options['engine'], created, run)
+                    for run in range(options['runs'])
+                ]
+                row = {key: statistics.median(measure[key] for measure in measures) for key in measures[0]}
+                self.stdout.write(
+                    f"{path.strip('/'):<14} | {int(row['rates']):>5} | {row['total']:>10.1f} | "
+                    + " | ".join(f"{row[title]:>9.1f}" for title, _, _ in STAGE_COLUMNS)
+                    + f" | {int(row['queries']):>8}"
+                )
+        finally:
+            settings_override.disable()
+            server.shutdown()
+            for env_name, value in previous_env.items():
+                if value is None:
+                    os.environ.pop(env_name, None)
+                else:
+                    os.environ[env_name] = value
+            self._cleanup(created)
+
+    def _serve(self, pages):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                page = pages.get(self.path.split('?')[0])
+                if page is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(page)))
+                self.end_headers()
+                self.wfile.write(page)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def _run_once(self, name, page, engine, created, run):
+        """Crée une zone et une source neuves, exécute scrape_and_ingest et retourne les mesures (ms)."""
+        scraper_filename = SCRAPERS[name][0]
+        codes = sorted({record['code_iso'].upper() for record in load_scraper(scraper_filename).parse(page)})
+
+        zone = ZoneMonetaire.objects.create(nom=f"__BENCH_INGESTION_{name}_{len(created['zones'])}__")
+        created['zones'].append(zone.pk)
+        source = Source.objects.create(
+            zone=zone, nom=f"Benchmark {name} {run}", url_source="http://127.0.0.1/",
+            scraper_filename=scraper_filename, moteur_pipeline=engine
+        )
+        self._ensure_devises(codes, created)
+        ActivatedCurrency.objects.bulk_create(
+            [ActivatedCurrency(zone=zone, devise_id=code, is_active=True) for code in codes]
+        )
+
+        started = time.perf_counter()
+        result = scrape_and_ingest(source.pk, force_refresh=True)
+        total_ms = (time.perf_counter() - started) * 1000
+        if not result.startswith("Succès"):
+            raise CommandError(f"Exécution en échec pour {name} : {result}")
+
+        pipeline_run = PipelineRun.objects.filter(source=source).latest('started_at')
+        def stage_ms(stage):
+            return pipeline_run.stages.get(stage, {}).get('ms', 0)
+
+        measures = {
+            title: sum(map(stage_ms, stages)) - sum(map(stage_ms, subtracted))
+            for title, stages, subtracted in STAGE_COLUMNS
+        }
+        measures.update(
+            total=total_ms,
+            rates=ExchangeRate.objects.filter(zone=zone).count(),
+            queries=pipeline_run.query_count,
+        )
+        return measures
+
+    def _ensure_devises(self, codes, created):
+        existing_devises = set(Devise.objects.filter(code__in=codes).values_list('code', flat=True))
+        new_devises = [code for code in codes if code not in existing_devises]
+        Devise.objects.bulk_create([Devise(code=code, nom=f"Bench {code}") for code in new_devises])
+        created['devises'].update(new_devises)
+
+        existing_aliases = set(DeviseAlias.objects.filter(alias__in=codes).values_list('alias', flat=True))
+        new_aliases = [code for code in codes if code not in existing_aliases]
+        DeviseAlias.objects.bulk_create([DeviseAlias(alias=code, devise_officielle_id=code) for code in new_aliases])
+        created['aliases'].update(new_aliases)
+        if new_aliases:
+            bump_alias_version()
+
+    def _cleanup(self, created):
+        # Les logs des sources de test ne sont pas supprimés par cascade (SET_NULL). Source.pk = zone.pk.
+        LogEntry.objects.filter(Q(zone_id__in=created['zones']) | Q(source_id__in=created['zones'])).delete()
+        ZoneMonetaire.objects.filter(pk__in=created['zones']).delete()
+        DeviseAlias.objects.filter(alias__in=created['aliases']).delete()
+        Devise.objects.filter(code__in=created['devises']).delete()
+        if created['aliases']:
+            bump_alias_version()
@@ -0,0 +1,75 @@
+# scrapers/management/commands/benchmark_scraper_parsing.py
+
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand, CommandError
+
+from scrapers.runtime import load_scraper, ScraperError
+from scrapers.scrapers import _parsing
+
+FIXTURES_DIR = Path(__file__).resolve().parents[2] / 'fixtures'
+
+# Page enregistrée utilisée pour chaque scraper
+FIXTURES = {
+    'bct_scraper.py': 'bct_cours.html',
+    'boa_scraper.py': 'boa_taux.html',
+}
+
+
+def _measure(func, content, runs):
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func(content)
+        durations.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    try:
+        func(content)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, statistics.median(durations), peak / 1024
+
+
+def _full_tree(content):
+    # Référence : arbre complet de la page avec html.parser, comme les scrapers le faisaient.
+    return BeautifulSoup(content, 'html.parser').find('table')
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la fonction parse() de chaque scraper sur les pages enregistrées dans scrapers/fixtures/ "
+        "(durée médiane et pic d'allocations), comparée à l'arbre complet de la page."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=50, help="Nombre d'analyses par page (défaut: 50).")
+        parser.add_argument('scrapers', nargs='*', help="Fichiers de scrapers à mesurer (défaut: tous).")
+
+    def handle(self, *args, **options):
+        names = options['scrapers'] or list(FIXTURES)
+        unknown = set(names) - set(FIXTURES)
+        if unknown:
+            raise CommandError(f"Aucune page enregistrée pour : {', '.join(sorted(unknown))}.")
+
+        self.stdout.write(f"Parseur : {_parsing.PARSER}")
+        self.stdout.write(
+            f"{'Scraper':<16} | {'Taux':>5} | {'parse (ms)':>10} | {'Alloc (Ko)':>10} | "
+            f"{'Arbre complet (ms)':>18} | {'Alloc (Ko)':>10}"
+        )
+        for name in names:
+            try:
+                module = load_scraper(name)
+            except ScraperError as e:
+                raise CommandError(str(e))
+            content = (FIXTURES_DIR / FIXTURES[name]).read_bytes()
+            records, parse_ms, parse_kb = _measure(module.parse, content, options['runs'])
+            _, full_ms, full_kb = _measure(_full_tree, content, options['runs'])
+            self.stdout.write(
+                f"{name:<16} | {len(records):>5} | {parse_ms:>10.2f} | {parse_kb:>10.0f} | "
+                f"{full_ms:>18.2f} | {full_kb:>10.0f}"
+            )
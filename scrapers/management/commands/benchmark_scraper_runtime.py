@@ -0,0 +1,75 @@
+# scrapers/management/commands/benchmark_scraper_runtime.py
+
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from scrapers.runtime import run_scraper
+
+SCRAPER_FILENAME = 'bct_scraper.py'
+
+
+def build_bct_page(size):
+    """Page au format de la BCT (date « Journée du » et table nom / code / unité / valeur)."""
+    rows = "".join(
+        f"<tr><td>Devise {index}</td><td>C{index:02d}</td><td>1</td><td>{1 + index / 1000:.4f}</td></tr>"
+        for index in range(size)
+    )
+    return (
+        "<html><body><h3>Journée du 24/07/2025</h3><table>"
+        "<tr><th>Nom</th><th>Code</th><th>Unité</th><th>Valeur</th></tr>"
+        f"{rows}</table></body></html>"
+    ).encode('utf-8')
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le coût par exécution du scraper BCT dans le worker et en sous-processus "
+        "(SCRAPERS_SUBPROCESS_ISOLATION). La page est servie en local : aucun accès réseau."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=20, help="Nombre d'exécutions par mode (défaut: 20).")
+        parser.add_argument('--rows', type=int, default=60, help="Nombre de devises de la page servie (défaut: 60).")
+
+    def handle(self, *args, **options):
+        page = build_bct_page(options['rows'])
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(page)))
+                self.end_headers()
+                self.wfile.write(page)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        previous_url = os.environ.get('BCT_SCRAPER_URL')
+        os.environ['BCT_SCRAPER_URL'] = f"http://127.0.0.1:{server.server_port}/"
+        try:
+            self.stdout.write(f"{'Mode':>12} | {'Exécutions':>10} | {'Moyenne (ms)':>12} | {'Médiane (ms)':>12} | {'Max (ms)':>9}")
+            for label, isolated in (('sous-process', True), ('worker', False)):
+                durations = []
+                for _ in range(options['runs']):
+                    started = time.perf_counter()
+                    records = list(run_scraper(SCRAPER_FILENAME, isolated=isolated))
+                    durations.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(
+                    f"{label:>12} | {len(durations):>10} | {statistics.mean(durations):>12.1f} | "
+                    f"{statistics.median(durations):>12.1f} | {max(durations):>9.1f}"
+                )
+            self.stdout.write(f"{len(records)} taux renvoyés par exécution.")
+        finally:
+            server.shutdown()
+            if previous_url is None:
+                os.environ.pop('BCT_SCRAPER_URL', None)
+            else:
+                os.environ['BCT_SCRAPER_URL'] = previous_url
@@ -0,0 +1,27 @@
+# scrapers/management/commands/run_scrapers_batch.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from scrapers.tasks import run_scrapers_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Récupère en parallèle les pages de toutes les sources des zones actives (ou des sources "
+        "indiquées) avec un client HTTP asynchrone partagé, puis ingère chaque lot."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source_ids', nargs='*', type=int, help="Identifiants des sources (défaut: toutes).")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        results = run_scrapers_batch(options['source_ids'] or None)
+        if not results:
+            self.stdout.write("Aucune source à récupérer.")
+            return
+        for source_id, message in sorted(results.items()):
+            self.stdout.write(f"Source {source_id} : {message}")
+        self.stdout.write(f"{len(results)} source(s) traitée(s) en {(time.perf_counter() - started) * 1000:.0f} ms.")
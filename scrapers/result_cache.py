@@ -0,0 +1,74 @@
+# scrapers/result_cache.py
+
+"""
+Cache (Redis) des taux renvoyés par le scraper d'une source, pendant SCRAPERS_RESULT_CACHE_TTL
+secondes. Une exécution manuelle (ExecuteScraperView) lancée peu avant ou après l'exécution
+planifiée, ou l'inverse, reprend les taux déjà récupérés au lieu de télécharger (et, pour BOA,
+de faire rendre par ScraperAPI) la même page une seconde fois. L'option « forcer » des tâches
+ignore le cache et le remplace par le nouveau résultat.
+
+Le cache est une optimisation : s'il est indisponible, le scraper est simplement exécuté.
+"""
+
+import sys
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULT_RESULT_CACHE_TTL = 300
+RESULT_CACHE_KEY = 'scrapers:result:{source_id}'
+
+
+def _ttl():
+    return getattr(settings, 'SCRAPERS_RESULT_CACHE_TTL', DEFAULT_RESULT_CACHE_TTL)
+
+
+def get_cached_result(source):
+    """
+    Retourne (taux, validateurs de la page) mis en cache pour la source, ou None (pas de résultat
+    récent, scraper de la source modifié depuis, cache désactivé ou indisponible).
+    """
+    if _ttl() <= 0:
+        return None
+    try:
+        cached = cache.get(RESULT_CACHE_KEY.format(source_id=source.pk))
+    except Exception as e:
+        print(f"[result_cache]  Cache indisponible : {e}", file=sys.stderr)
+        return None
+    if not cached or cached['scraper_filename'] != source.scraper_filename:
+        return None
+    return cached['records'], cached['validators']
+
+
+def store_result(source, records, validators=None):
+    """Met en cache la liste des taux renvoyés par le scraper de la source."""
+    if _ttl() <= 0:
+        return
+    try:
+        cache.set(
+            RESULT_CACHE_KEY.format(source_id=source.pk),
+            {'scraper_filename': source.scraper_filename, 'records': records, 'validators': validators},
+            timeout=_ttl()
+        )
+    except Exception as e:
+        print(f"[result_cache]  Impossible de mettre en cache le résultat : {e}", file=sys.stderr)
+
+
+def caching_records(source, records, validators=None):
+    """
+    Retourne les taux tels quels, et les met en cache : tout de suite pour une liste, à la fin
+    de la lecture pour un flux (mode sous-processus), seulement s'il a été lu sans erreur.
+    """
+    if isinstance(records, list):
+        store_result(source, records, validators)
+        return records
+    return _caching_stream(source, records, validators)
+
+
+def _caching_stream(source, records, validators):
+    collected = []
+    for record in records:
+        collected.append(record)
+        yield record
+    store_result(source, collected, validators)
+
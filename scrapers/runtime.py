@@ -0,0 +1,308 @@
+# scrapers/runtime.py
+
+"""
+Exécution des scrapers de scrapers/scrapers/.
+
+Chaque module de scraper expose une fonction ``scrape()`` qui renvoie la liste (ou un itérable) des taux
+(dicts date_publication, nom_brut, code_iso, unite, valeur) et lève une exception en cas d'échec.
+Par défaut, le module est importé une seule fois par worker et ``scrape()`` est appelée dans
+le processus, avec un délai maximal par appel. Avec SCRAPERS_SUBPROCESS_ISOLATION = True,
+chaque scraping lance le script dans un processus Python séparé (ancien fonctionnement),
+dont le bloc ``__main__`` imprime un taux JSON par ligne (NDJSON), lu au fil de l'eau.
+
+Un scraper peut aussi exposer ``build_request()`` (url, params, headers, timeout) et
+``parse(content)`` : le runtime (ou le moteur asynchrone, scrapers/fetch_engine.py) envoie
+alors lui-même la requête HTTP, avec un client partagé, et la rend conditionnelle grâce aux
+validateurs de la page précédente (ETag, Last-Modified, empreinte du contenu). Une réponse
+304 ou un contenu identique lève ScraperPageUnchanged sans appeler parse().
+"""
+
+import contextvars
+import hashlib
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from collections.abc import Iterator
+from functools import partial
+
+import httpx
+from django.conf import settings
+
+from core.run_metrics import run_stage
+
+SCRAPERS_PACKAGE = 'scrapers.scrapers'
+SCRAPER_ENTRYPOINT = 'scrape'
+DEFAULT_SCRAPER_TIMEOUT = 120
+
+
+class ScraperError(Exception):
+    """Erreur de base du runtime des scrapers."""
+
+
+class ScraperNotFound(ScraperError):
+    """Le fichier du scraper n'existe pas ou n'expose pas de fonction scrape()."""
+
+
+class ScraperExecutionError(ScraperError):
+    """Le scraper a levé une exception ou s'est terminé avec un code de sortie non nul."""
+
+
+class ScraperTimeout(ScraperExecutionError):
+    """Le scraper n'a pas rendu la main dans le délai imparti."""
+
+
+class ScraperPageUnchanged(ScraperError):
+    """La page n'a pas changé depuis la dernière récupération (304 ou contenu identique)."""
+
+
+class ScraperInvalidOutput(ScraperError):
+    """Le scraper a renvoyé autre chose qu'une liste non vide de taux (ou un JSON invalide)."""
+
+    def __init__(self, message, output=''):
+        super().__init__(message)
+        self.output = output
+
+
+def _module_name(scraper_filename):
+    stem, ext = os.path.splitext(scraper_filename or '')
+    if ext != '.py' or not stem.isidentifier() or stem.startswith('_'):
+        raise ScraperNotFound(f"Nom de fichier de scraper invalide : '{scraper_filename}'.")
+    if not os.path.exists(os.path.join(settings.SCRAPERS_DIR, scraper_filename)):
+        raise ScraperNotFound(f"Le script du scraper '{scraper_filename}' est introuvable.")
+    return f"{SCRAPERS_PACKAGE}.{stem}"
+
+
+def load_scraper(scraper_filename):
+    """
+    Importe le module du scraper (une seule fois : les imports suivants viennent de sys.modules)
+    et vérifie qu'il expose scrape().
+    """
+    module_name = _module_name(scraper_filename)
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        raise ScraperNotFound(f"Impossible d'importer le scraper '{scraper_filename}' : {e}") from e
+    if not callable(getattr(module, SCRAPER_ENTRYPOINT, None)):
+        raise ScraperNotFound(f"Le scraper '{scraper_filename}' n'expose pas de fonction {SCRAPER_ENTRYPOINT}().")
+    return module
+
+
+def check_records(scraper_filename, records, output=''):
+    """Vérifie que le scraper a renvoyé une liste non vide de dicts et la retourne."""
+    if not isinstance(records, list) or not records or not all(isinstance(item, dict) for item in records):
+        raise ScraperInvalidOutput(
+            f"Le scraper '{scraper_filename}' n'a pas renvoyé une liste non vide de taux.", output=output
+        )
+    return records
+
+
+def supports_conditional_fetch(module):
+    """Le scraper expose build_request() et parse(content) : le runtime peut envoyer la requête lui-même."""
+    return callable(getattr(module, 'build_request', None)) and callable(getattr(module, 'parse', None))
+
+
+def conditional_headers(request, validators):
+    """En-têtes de la requête complétés par If-None-Match / If-Modified-Since."""
+    headers = dict(request.get('headers') or {})
+    if validators and validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators and validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+
+def page_validators(scraper_filename, response, validators):
+    """
+    Retourne les validateurs de la réponse (etag, last_modified, hash du contenu), ou lève
+    ScraperPageUnchanged si la page n'a pas changé depuis `validators`.
+    """
+    if response.status_code == 304:
+        raise ScraperPageUnchanged(f"La page du scraper '{scraper_filename}' n'a pas changé (HTTP 304).")
+    response.raise_for_status()
+    new_validators = {
+        'etag': response.headers.get('ETag', ''),
+        'last_modified': response.headers.get('Last-Modified', ''),
+        'hash': hashlib.sha256(response.content).hexdigest(),
+    }
+    if validators and validators.get('hash') == new_validators['hash']:
+        raise ScraperPageUnchanged(f"La page du scraper '{scraper_filename}' est identique à la précédente.")
+    return new_validators
+
+
+_http_client = None
+
+
+def _shared_http_client():
+    # Un client par processus : les connexions restent ouvertes d'un scraping à l'autre.
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(follow_redirects=True)
+    return _http_client
+
+
+def _fetch_and_parse(scraper_filename, module, validators):
+    request = module.build_request()
+    try:
+        response = _shared_http_client().get(
+            request['url'], params=request.get('params'), headers=conditional_headers(request, validators),
+            timeout=request.get('timeout', DEFAULT_SCRAPER_TIMEOUT)
+        )
+    except httpx.TimeoutException as e:
+        raise ScraperTimeout(f"Le scraper '{scraper_filename}' a dépassé le délai : {e}") from e
+    except httpx.HTTPError as e:
+        raise ScraperExecutionError(f"Erreur: Échec de la requête : {e}") from e
+    try:
+        new_validators = page_validators(scraper_filename, response, validators)
+    except httpx.HTTPStatusError as e:
+        raise ScraperExecutionError(f"Erreur: {e}") from e
+    # Analyse de la page, mesurée à part : l'étape 'fetch' de la tâche la contient aussi.
+    with run_stage('scraper_parse'):
+        return _materialize(module.parse(response.content)), new_validators
+
+
+def _materialize(records):
+    # Un générateur est consommé dans le thread du scraper, sous le délai maximal.
+    return list(records) if isinstance(records, Iterator) else records
+
+
+def _scrape_only(module):
+    return _materialize(getattr(module, SCRAPER_ENTRYPOINT)()), None
+
+
+def run_scraper_in_process(scraper_filename, timeout=DEFAULT_SCRAPER_TIMEOUT, validators=None):
+    """
+    Récupère les taux dans un thread du worker et attend au plus `timeout` secondes.
+    Retourne (taux, validateurs de la page) ; les validateurs sont None si le scraper
+    n'expose que scrape().
+    Un thread Python ne peut pas être interrompu : en cas de dépassement, l'appel continue en
+    arrière-plan jusqu'au délai réseau propre au scraper, mais le worker reprend la main.
+    """
+    module = load_scraper(scraper_filename)
+    if supports_conditional_fetch(module):
+        call = partial(_fetch_and_parse, scraper_filename, module, validators)
+    else:
+        call = partial(_scrape_only, module)
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = call()
+        except BaseException as e:
+            outcome['error'] = e
+
+    # Le thread reprend le contexte de l'appelant : ses étapes sont mesurées dans l'exécution en cours.
+    thread = threading.Thread(
+        target=contextvars.copy_context().run, args=(target,), name=f"scraper-{scraper_filename}", daemon=True
+    )
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise ScraperTimeout(f"Le scraper '{scraper_filename}' a dépassé le délai de {timeout} s.")
+    if 'error' in outcome:
+        if isinstance(outcome['error'], ScraperError):
+            raise outcome['error']
+        raise ScraperExecutionError(f"Erreur: {outcome['error']}") from outcome['error']
+    records, new_validators = outcome['result']
+    return check_records(scraper_filename, records), new_validators
+
+
+def _iter_subprocess_records(scraper_filename, process, stderr, timeout):
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    count = 0
+    try:
+        for line in process.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            if count == 0 and line.startswith('['):
+                # Ancien format : un tableau JSON (éventuellement indenté) lu en entier.
+                output = line + process.stdout.read()
+                try:
+                    records = json.loads(output)
+                except json.JSONDecodeError as e:
+                    raise ScraperInvalidOutput(f"JSON invalide : {e}", output=output) from e
+                records = check_records(scraper_filename, records, output=output)
+                count = len(records)
+                yield from records
+                break
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ScraperInvalidOutput(f"Ligne JSON invalide : {e}", output=line) from e
+            if not isinstance(record, dict):
+                raise ScraperInvalidOutput(f"Ligne JSON qui n'est pas un taux : {line[:200]}", output=line)
+            count += 1
+            yield record
+        returncode = process.wait()
+    finally:
+        timer.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+
+    if timed_out.is_set():
+        raise ScraperTimeout(f"Le scraper '{scraper_filename}' a dépassé le délai de {timeout} s.")
+    if returncode != 0:
+        stderr.seek(0)
+        raise ScraperExecutionError(f"Code de sortie: {returncode}. Erreur (stderr): {stderr.read()[-2000:]}")
+    if count == 0:
+        raise ScraperInvalidOutput(f"Le scraper '{scraper_filename}' n'a renvoyé aucun taux.")
+
+
+def _stream_subprocess(scraper_filename, timeout):
+    script_path = os.path.join(settings.SCRAPERS_DIR, scraper_filename)
+    with tempfile.TemporaryFile(mode='w+', encoding='utf-8') as stderr:
+        process = subprocess.Popen(
+            [sys.executable, script_path], stdout=subprocess.PIPE, stderr=stderr, text=True, encoding='utf-8'
+        )
+        yield from _iter_subprocess_records(scraper_filename, process, stderr, timeout)
+
+
+def run_scraper_subprocess(scraper_filename, timeout=DEFAULT_SCRAPER_TIMEOUT):
+    """
+    Lance le script dans un processus Python séparé et lit ses taux au fil de l'eau sur stdout,
+    un objet JSON par ligne (NDJSON ; un tableau JSON est encore accepté).
+    Retourne (itérateur de taux, None) : les taux sont disponibles pendant que le script tourne,
+    et les erreurs (JSON invalide, code de sortie, délai dépassé) sont levées pendant l'itération.
+    Ce mode ne fait pas de requêtes conditionnelles.
+    """
+    _module_name(scraper_filename)
+    return _stream_subprocess(scraper_filename, timeout), None
+
+
+def fetch_records(scraper_filename, validators=None, timeout=None, isolated=None):
+    """
+    Exécute le scraper, dans le processus ou dans un sous-processus selon
+    SCRAPERS_SUBPROCESS_ISOLATION (ou `isolated` s'il est fourni), et retourne
+    (taux, validateurs de la page ou None) ; les taux sont une liste, ou un itérateur
+    en mode sous-processus.
+    Lève ScraperNotFound, ScraperExecutionError (dont ScraperTimeout), ScraperInvalidOutput
+    ou ScraperPageUnchanged (page identique à celle décrite par `validators`).
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'SCRAPERS_TIMEOUT', DEFAULT_SCRAPER_TIMEOUT)
+    if isolated is None:
+        isolated = getattr(settings, 'SCRAPERS_SUBPROCESS_ISOLATION', False)
+    if isolated:
+        return run_scraper_subprocess(scraper_filename, timeout=timeout)
+    return run_scraper_in_process(scraper_filename, timeout=timeout, validators=validators)
+
+
+def run_scraper(scraper_filename, timeout=None, isolated=None):
+    """
+    Exécute le scraper sans requête conditionnelle et renvoie ses taux (liste, ou itérateur
+    en mode sous-processus).
+    """
+    return fetch_records(scraper_filename, timeout=timeout, isolated=isolated)[0]
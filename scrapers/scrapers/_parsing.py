@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Aides d'analyse HTML partagées par les scrapers de ce dossier.
+
+Seule la table des taux est construite en arbre (SoupStrainer) : menus, pieds de page et
+scripts de la page sont ignorés par le parseur. La date de publication est cherchée par
+expression régulière dans le texte brut, sans arbre. lxml est utilisé s'il est installé,
+sinon html.parser.
+
+Les fichiers commençant par « _ » ne sont pas des scrapers (ni proposés dans l'interface,
+ni chargés par le runtime).
+"""
+
+import html
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+
+def decode(content):
+    """Texte de la page (bytes décodés en UTF-8, à défaut en latin-1)."""
+    if isinstance(content, str):
+        return content
+    try:
+        return content.decode('utf-8')
+    except UnicodeDecodeError:
+        return content.decode('latin-1')
+
+
+def parse_table(content, index=0):
+    """
+    Construit l'arbre des seules balises <table> de la page et retourne la table n° `index`
+    (None si la page n'en a pas assez).
+    """
+    soup = BeautifulSoup(content, PARSER, parse_only=SoupStrainer('table'))
+    tables = soup.find_all('table', limit=index + 1)
+    return tables[index] if len(tables) > index else None
+
+
+def find_date(content, label, date_pattern=r'\d{2}/\d{2}/\d{4}', max_gap=100):
+    """
+    Retourne la première date (texte) qui suit `label` dans la page, à au plus `max_gap`
+    caractères sans chiffre (balises, espaces, ponctuation), ou None. Les entités HTML
+    (ex: « Journ&eacute;e ») sont décodées avant la recherche.
+    """
+    match = re.search(
+        rf'{re.escape(label)}[^\d]{{0,{max_gap}}}?({date_pattern})', html.unescape(decode(content))
+    )
+    return match.group(1) if match else None
+
+
+def row_cells(table, cell='td'):
+    """Textes des cellules de chaque ligne de la table (lignes sans cellule `cell` ignorées)."""
+    for row in table.find_all('tr'):
+        cells = [element.get_text(strip=True) for element in row.find_all(cell)]
+        if cells:
+            yield cells
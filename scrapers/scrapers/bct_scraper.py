@@ -2,56 +2,61 @@
 # -*- coding: utf-8 -*-
 
 import requests
-from bs4 import BeautifulSoup
 import json
+import os
 import sys
-import re
 from datetime import datetime # Importation nécessaire
 
+try:
+    from . import _parsing
+except ImportError: # Exécuté comme script (mode sous-processus)
+    import _parsing
+
+# URL surchargeable par la variable BCT_SCRAPER_URL (ex: page de test servie en local pour les benchmarks)
 URL = "https://www.bct.gov.tn/bct/siteprod/cours.jsp"
 
-def scraper_bct_exchange_rates():
+def build_request():
+    """Requête HTTP à envoyer (utilisée telle quelle par le moteur de récupération asynchrone)."""
+    return {"url": os.getenv("BCT_SCRAPER_URL", URL), "timeout": 60}
+
+def scrape():
+    """Renvoie la liste des taux publiés par la BCT. Lève une exception en cas d'échec."""
+    request = build_request()
     try:
         # Correction: Supprimez 'verify=False' et les avertissements si utilisés ici
-        response = requests.get(URL, timeout=60)
+        response = requests.get(request["url"], timeout=request["timeout"])
         response.raise_for_status() # Lève une exception pour les codes d'erreur 4xx/5xx
     except requests.exceptions.RequestException as e:
-        print(f"Erreur de connexion : {e}", file=sys.stderr)
-        sys.exit(1)
-
-    soup = BeautifulSoup(response.content, 'html.parser')
+        raise RuntimeError(f"Erreur de connexion : {e}") from e
+    return parse(response.content)
 
+def parse(content):
+    """Extrait les taux du contenu (bytes) de la page de la BCT."""
     # Récupération et normalisation de la date de publication au format YYYY-MM-DD
     date_publication_iso = None
-    date_tag = soup.find(lambda tag: tag.name in ['h3', 'p', 'span', 'div'] and 'Journée du' in tag.get_text())
-    if date_tag:
-        match = re.search(r'\d{2}/\d{2}/\d{4}', date_tag.get_text())
-        if match:
-            try:
-                # Convertir la date du format DD/MM/YYYY au format YYYY-MM-DD
-                date_publication_iso = datetime.strptime(match.group(0), "%d/%m/%Y").strftime("%Y-%m-%d")
-            except ValueError:
-                # Gérer les erreurs de parsing de date si nécessaire, mais on passera None
-                pass
+    date_raw = _parsing.find_date(content, 'Journée du')
+    if date_raw:
+        try:
+            # Convertir la date du format DD/MM/YYYY au format YYYY-MM-DD
+            date_publication_iso = datetime.strptime(date_raw, "%d/%m/%Y").strftime("%Y-%m-%d")
+        except ValueError:
+            # Gérer les erreurs de parsing de date si nécessaire, mais on passera None
+            pass
 
-    table = soup.find('table')
+    # Seule la table des taux est analysée (voir _parsing.parse_table)
+    table = _parsing.parse_table(content)
     if not table:
-        print("Erreur : Aucune table n'a été trouvée sur la page.", file=sys.stderr)
-        sys.exit(1)
+        raise RuntimeError("Aucune table n'a été trouvée sur la page.")
 
     exchange_rates_list = []
-    rows = table.find_all('tr')
-    
-    for row in rows:
-        cells = row.find_all('td')
+    for cells in _parsing.row_cells(table):
         # S'assurer qu'il y a suffisamment de cellules pour éviter IndexError
         if len(cells) >= 4:
             try:
                 # Convertir valeur en float et assurer un nom brut si manquant
-                nom_brut = cells[0].get_text(strip=True)
-                code_iso = cells[1].get_text(strip=True)
-                unite = int(cells[2].get_text(strip=True))
-                valeur = float(cells[3].get_text(strip=True).replace(',', '.'))
+                nom_brut, code_iso = cells[0], cells[1]
+                unite = int(cells[2])
+                valeur = float(cells[3].replace(',', '.'))
 
                 rate_data = {
                     "date_publication": date_publication_iso, # Utilisation de la date normalisée
@@ -64,7 +69,13 @@ def scraper_bct_exchange_rates():
             except (ValueError, IndexError):
                 pass # Ignore les lignes mal formatées (comme l'en-tête)
 
-    print(json.dumps(exchange_rates_list, indent=2, ensure_ascii=False))
+    return exchange_rates_list
 
+# Mode sous-processus (SCRAPERS_SUBPROCESS_ISOLATION) : un taux JSON par ligne sur stdout (NDJSON).
 if __name__ == "__main__":
-    scraper_bct_exchange_rates()
+    try:
+        for record in scrape():
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+    except Exception as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        sys.exit(1)
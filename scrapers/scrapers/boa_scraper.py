@@ -2,30 +2,40 @@
 # -*- coding: utf-8 -*-
 import os
 import httpx
-from bs4 import BeautifulSoup
 from datetime import datetime
 import json
 import re
+import sys
 from dotenv import load_dotenv
 
+try:
+    from . import _parsing
+except ImportError: # Exécuté comme script (mode sous-processus)
+    import _parsing
+
 
 # 🔐 Clé API ScraperAPI
 load_dotenv()
 SCRAPER_API_KEY = os.getenv("SCRAPER_API_KEY")
 TARGET_URL = "https://www.bank-of-algeria.dz/taux-de-change-journalier/"
+SCRAPER_API_URL = "https://api.scraperapi.com"
+
+def build_request():
+    """Requête HTTP à envoyer (utilisée telle quelle par le moteur de récupération asynchrone)."""
+    return {
+        "url": os.getenv("SCRAPER_API_URL", SCRAPER_API_URL),
+        "params": {
+            "api_key": SCRAPER_API_KEY,
+            "url": TARGET_URL,
+            "render": "true",
+            "wait_for_selector": "table"
+        },
+        "timeout": 60,
+    }
 
 def fetch_page_content():
     try:
-        response = httpx.get(
-            "https://api.scraperapi.com",
-            params={
-                "api_key": SCRAPER_API_KEY,
-                "url": TARGET_URL,
-                "render": "true",
-                "wait_for_selector": "table"
-            },
-            timeout=60,
-        )
+        response = httpx.get(**build_request())
         response.raise_for_status()
         return response.text
     except httpx.RequestError as e:
@@ -33,14 +43,14 @@ def fetch_page_content():
     except httpx.HTTPStatusError as e:
         raise Exception(f"[ScraperAPI] Erreur HTTP : {e.response.status_code} {e.response.reason_phrase}")
 
-def parse_exchange_rates(html: str):
-    soup = BeautifulSoup(html, 'html.parser')
-    table = soup.select_one("table")
+def parse_exchange_rates(html):
+    # Seule la table des taux est analysée (voir _parsing.parse_table)
+    table = _parsing.parse_table(html)
 
     if not table:
         raise Exception("Aucune table trouvée sur la page.")
 
-    headers = table.select("th")
+    headers = table.find_all("th")
     latest_col_index = None
     date_raw = None
 
@@ -60,12 +70,11 @@ def parse_exchange_rates(html: str):
         raise Exception(f"Erreur parsing date : {date_raw}")
 
     data = []
-    for row in table.select("tr")[1:]:
-        cols = row.select("td")
-        if len(cols) > latest_col_index and cols[0].text.strip():
+    for cols in _parsing.row_cells(table):
+        if len(cols) > latest_col_index and cols[0]:
             try:
-                code = cols[0].text.strip().upper()
-                valeur_str = cols[latest_col_index].text.strip().replace(",", ".")
+                code = cols[0].upper()
+                valeur_str = cols[latest_col_index].replace(",", ".")
                 valeur = float(valeur_str)
                 data.append({
                     "date_publication": date_iso,
@@ -79,13 +88,22 @@ def parse_exchange_rates(html: str):
 
     return data
 
+def parse(content):
+    """Extrait les taux du contenu de la page rendue par ScraperAPI."""
+    return parse_exchange_rates(content)
+
+def scrape():
+    """Renvoie la liste des taux publiés par la Banque d'Algérie. Lève une exception en cas d'échec."""
+    return parse_exchange_rates(fetch_page_content())
+
+# Mode sous-processus (SCRAPERS_SUBPROCESS_ISOLATION) : un taux JSON par ligne sur stdout (NDJSON).
 def run():
     try:
-        html = fetch_page_content()
-        rates = parse_exchange_rates(html)
-        print(json.dumps(rates, indent=2, ensure_ascii=False))
+        for record in scrape():
+            print(json.dumps(record, ensure_ascii=False), flush=True)
     except Exception as e:
-        print(f"Erreur : {e}")
+        print(f"Erreur : {e}", file=sys.stderr)
+        sys.exit(1)
 
 if __name__ == "__main__":
     run()
@@ -1,29 +1,225 @@
 # scrapers/tasks.py
 
-import os
-import json
-import subprocess
-from django.conf import settings
+import hashlib
+import itertools
+import time
+from collections import Counter
 from celery import shared_task
-from core.models import Source, ScrapedCurrencyRaw, ZoneMonetaire
-from core.pipeline import process_and_inject_rates
+from django.db import transaction
+from django.utils import timezone
+from core.models import Source, ScrapedCurrencyRaw, ZoneMonetaire, PipelineRun
+from core.pipeline import run_pipeline
+from core.run_metrics import recording_run, record_run, run_stage
+from .runtime import (
+    fetch_records, ScraperNotFound, ScraperExecutionError, ScraperInvalidOutput, ScraperPageUnchanged
+)
+from .fetch_engine import fetch_sources
+from .result_cache import get_cached_result, caching_records
+from .locks import source_run_lock, is_source_locked
+from .health import circuit_open_until, record_success, record_failure, retry_delay
 from datetime import datetime
 from decimal import Decimal
-import sys
-from logs.utils import log_action
+from logs.utils import log_action, buffered_logs
+
+
+# Taille des lots d'insertion des données brutes pendant la lecture du flux du scraper.
+RAW_INSERT_BATCH_SIZE = 500
+
+
+class BatchFingerprint:
+    """
+    Empreinte SHA-256 d'un lot de devises brutes normalisées, calculée au fil de l'eau.
+    L'empreinte ne dépend pas de l'ordre des lignes (somme des empreintes de chaque ligne)
+    ni de l'écriture des valeurs (ex: '2.9056' et '2.905600' donnent la même empreinte).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+
+    def update(self, raw_entries):
+        for entry in raw_entries:
+            line = "|".join([
+                entry.date_publication_brut.isoformat() if entry.date_publication_brut else '',
+                entry.nom_devise_brut or '',
+                entry.code_iso_brut or '',
+                format(entry.valeur_brute.normalize(), 'f'),
+                str(entry.multiplicateur_brut),
+            ])
+            self.total = (self.total + int.from_bytes(hashlib.sha256(line.encode('utf-8')).digest(), 'big')) % (1 << 256)
+            self.count += 1
+
+    def hexdigest(self):
+        return hashlib.sha256(f"{self.count}:{self.total:064x}".encode('utf-8')).hexdigest()
+
+
+def compute_batch_fingerprint(raw_entries):
+    """Calcule l'empreinte (voir BatchFingerprint) d'une liste de devises brutes."""
+    fingerprint = BatchFingerprint()
+    fingerprint.update(raw_entries)
+    return fingerprint.hexdigest()
+
+
+def reset_batch_fingerprints(zone=None):
+    """
+    Efface les empreintes enregistrées (toutes les sources, ou celle d'une zone) pour que
+    le prochain scraping repasse par le pipeline même si la page n'a pas changé.
+    À appeler quand le résultat du pipeline peut changer à données brutes égales
+    (alias modifiés, devise activée ou désactivée). Les validateurs HTTP de la page sont
+    effacés aussi, pour que la page soit de nouveau téléchargée et analysée.
+    """
+    sources = Source.objects.all() if zone is None else Source.objects.filter(zone=zone)
+    sources.update(empreinte_donnees='', date_empreinte=None, **_page_validator_fields(None))
+
+
+def _page_validator_fields(validators):
+    # Sans validateurs (scraper sans build_request/parse, ou mode sous-processus), les anciens sont effacés.
+    validators = validators or {}
+    return {
+        'etag_page': validators.get('etag', '')[:255],
+        'last_modified_page': validators.get('last_modified', '')[:64],
+        'empreinte_page': validators.get('hash', ''),
+    }
 
 @shared_task(name="scrapers.tasks.run_scraper_for_source")
-def run_scraper_for_source(source_id):
+def run_scraper_for_source(source_id, force_refresh=False, attempt=0):
     """
     Tâche Celery générique pour exécuter le scraper associé à une Source,
     insérer les données brutes et déclencher le pipeline.
+    Le scraper est exécuté par scrapers.runtime (dans le worker, ou en sous-processus si
+    SCRAPERS_SUBPROCESS_ISOLATION est activé).
     Maintenant, inclut une vérification pour s'assurer que la zone associée est active.
+    Tous les logs SCRAPER_*/PIPELINE_* de l'exécution sont écrits en une fois à la fin.
+    Une seule exécution à la fois par source (verrou Redis, voir scrapers/locks.py) : un doublon
+    est ignoré et tracé (SCRAPER_RUN_ALREADY_IN_PROGRESS, PipelineRun « skipped »).
+    Un échec de récupération est retenté plus tard (nouvelle tâche, `attempt` = n° de la
+    tentative) et un disjoncteur par source suspend les exécutions d'un site en panne
+    (voir scrapers/health.py) ; `force_refresh` passe outre le disjoncteur.
+    L'exécution (étapes du scraper et du pipeline) est tracée dans un PipelineRun.
+    Les taux récupérés il y a moins de SCRAPERS_RESULT_CACHE_TTL secondes sont repris du
+    cache (voir scrapers/result_cache.py), sauf si `force_refresh` est vrai.
+    """
+    return scrape_and_ingest(source_id, force_refresh=force_refresh, attempt=attempt)
+
+
+def scrape_and_ingest(source_id, prefetched=None, force_refresh=False, attempt=0):
+    """
+    Exécute le scraper d'une source (ou reprend le résultat `prefetched` déjà récupéré par
+    fetch_engine.fetch_sources, ou celui du cache) puis ingère le lot, avec les logs groupés
+    et le PipelineRun. Retourne le message de résultat.
+    """
+    with recording_run(PipelineRun.KIND_SCRAPER):
+        with buffered_logs():
+            with source_run_lock(source_id) as acquired:
+                if not acquired:
+                    return _skip_run_in_progress(source_id)
+                return _run_scraper_for_source(source_id, prefetched, force_refresh, attempt)
+
+
+def _skip_run_in_progress(source_id):
+    # Une autre exécution détient le verrou de la source : celle-ci est abandonnée, avec sa raison.
+    source = Source.objects.select_related('zone').filter(pk=source_id).first()
+    log_action(
+        actor_id=None,
+        action='SCRAPER_RUN_ALREADY_IN_PROGRESS',
+        details=f"Exécution du scraper ignorée pour la source '{source.nom if source else source_id}' (ID: {source_id}) : une autre exécution est déjà en cours pour cette source.",
+        level='info',
+        zone_obj=source.zone if source else None,
+        source_obj=source
+    )
+    record_run(source=source, status='skipped', message="Exécution déjà en cours pour cette source.")
+    return f"Ignoré : une exécution est déjà en cours pour la source {source.nom if source else source_id}."
+
+
+@shared_task(name="scrapers.tasks.run_scrapers_batch")
+def run_scrapers_batch(source_ids=None, force_refresh=False):
+    """
+    Tâche Celery qui récupère en parallèle les pages de toutes les sources des zones actives
+    (ou des sources listées) depuis un seul worker, avec un client HTTP asynchrone partagé,
+    puis ingère chaque lot l'un après l'autre. À planifier à la place des tâches par source
+    quand de nombreuses sources publient au même horaire. Les sources dont les taux sont
+    encore en cache ne sont pas récupérées (sauf `force_refresh`).
+    Retourne {source_id: message de résultat}.
+    """
+    sources = Source.objects.filter(zone__is_active=True)
+    if source_ids is not None:
+        sources = sources.filter(pk__in=source_ids)
+    sources = list(sources)
+    # Les sources déjà en cours d'exécution, encore en cache ou au disjoncteur ouvert ne sont pas téléchargées.
+    to_fetch = [
+        source for source in sources
+        if not is_source_locked(source.pk)
+        and (force_refresh or (get_cached_result(source) is None and circuit_open_until(source) is None))
+    ]
+    fetched = fetch_sources(
+        {source.pk: source.scraper_filename for source in to_fetch},
+        validators_by_source={source.pk: source.page_validators for source in to_fetch}
+    )
+    results = {
+        source_id: scrape_and_ingest(source_id, prefetched=outcome, force_refresh=force_refresh)
+        for source_id, outcome in fetched.items()
+    }
+    # Sources encore en cache (lot repris du cache), en cours d'exécution ou au disjoncteur
+    # ouvert (ignorées, avec leur raison).
+    for source in sources:
+        if source.pk not in results:
+            results[source.pk] = scrape_and_ingest(source.pk, force_refresh=force_refresh)
+    return results
+
+
+class _TimedStream:
+    """
+    Flux de taux du sous-processus : mesure le temps passé à attendre le scraper (sans celui
+    de l'ingestion qui consomme le flux), du lancement jusqu'au dernier taux.
+    """
+
+    def __init__(self, records, started):
+        self.records = iter(records)
+        self.waited = time.perf_counter() - started
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            return next(self.records)
+        finally:
+            self.waited += time.perf_counter() - started
+
+
+def _fetch_records(source, prefetched, force_refresh=False):
+    """
+    Retourne (taux, validateurs, flux) : `flux` est le _TimedStream du mode sous-processus, dont
+    la réussite n'est enregistrée qu'une fois lu en entier, None si elle l'est déjà.
     """
+    if prefetched is None:
+        cached = None if force_refresh else get_cached_result(source)
+        if cached is not None:
+            record_run(result_cache_hit=1)
+            return (*cached, None)
+        started = time.perf_counter()
+        records, validators = fetch_records(source.scraper_filename, validators=source.page_validators)
+        if isinstance(records, list):
+            record_success(source, latency_ms=(time.perf_counter() - started) * 1000)
+            return caching_records(source, records, validators), validators, None
+        stream = _TimedStream(records, started)
+        return caching_records(source, stream, validators), validators, stream
+    outcome, elapsed_ms = prefetched
+    record_run(batch_fetch_ms=elapsed_ms)
+    if isinstance(outcome, Exception):
+        raise outcome
+    record_success(source, latency_ms=elapsed_ms)
+    return caching_records(source, *outcome), outcome[1], None
+
+
+def _run_scraper_for_source(source_id, prefetched=None, force_refresh=False, attempt=0):
     source = None
     zone = None
     try:
         source = Source.objects.get(pk=source_id)
         zone = source.zone
+        record_run(source=source)
 
         # NEW CHECK: Prevent pipeline execution if the zone is inactive
         if not zone or not zone.is_active:
@@ -35,125 +231,80 @@ def run_scraper_for_source(source_id):
                 zone_obj=zone,
                 source_obj=source
             )
+            record_run(status='skipped', message="Zone inactive ou non assignée.")
             return f"Pipeline skipped for source {source_id}: Zone is inactive or not assigned."
 
-        script_path = os.path.join(settings.SCRAPERS_DIR, source.scraper_filename)
-        if not os.path.exists(script_path):
+        # Disjoncteur ouvert : le site de la source a échoué trop de fois de suite.
+        open_until = None if force_refresh else circuit_open_until(source)
+        if open_until:
+            log_action(
+                actor_id=None,
+                action='SCRAPER_CIRCUIT_OPEN',
+                details=f"Exécution du scraper ignorée pour la source '{source.nom}' (ID: {source.pk}) : disjoncteur ouvert après des échecs répétés, jusqu'au {timezone.localtime(open_until):%d/%m/%Y %H:%M}.",
+                level='info',
+                zone_obj=zone,
+                source_obj=source
+            )
+            record_run(status='skipped', message="Disjoncteur ouvert.")
+            return f"Ignoré : disjoncteur ouvert pour la source {source.nom} jusqu'au {timezone.localtime(open_until):%d/%m/%Y %H:%M}."
+
+        try:
+            with run_stage('fetch'):
+                scraped_data, validators, stream = _fetch_records(source, prefetched, force_refresh)
+            # En mode sous-processus, les erreurs du scraper surviennent à la lecture du flux (début de l'ingestion).
+            result = _ingest_scraped_data(source, zone, scraped_data, validators)
+            if stream is not None:
+                # Flux lu en entier sans erreur (code de sortie, délai, JSON) : la récupération a réussi.
+                # Enregistré hors de la transaction d'ingestion, qui peut être annulée (lot inchangé).
+                record_success(source, latency_ms=stream.waited * 1000)
+            return result
+        except ScraperPageUnchanged as e:
+            log_action(
+                actor_id=None,
+                action='SCRAPER_PAGE_UNCHANGED',
+                details=f"Page inchangée pour la source '{source.nom}' (ID: {source.pk}) de la zone '{zone.nom}' : {e} Analyse, ingestion et pipeline ignorés.",
+                level='info',
+                zone_obj=zone,
+                source_obj=source
+            )
+            record_success(source)
+            record_run(status='unchanged', message=str(e))
+            return f"Inchangé : la page de la source {source.nom} n'a pas changé depuis la dernière récupération."
+        except ScraperNotFound as e:
             log_action(
                 actor_id=None,
                 action='SCRAPER_SCRIPT_NOT_FOUND',
-                details=f"Erreur: Le script du scraper '{source.scraper_filename}' pour la source '{source.nom}' (ID: {source.pk}) est introuvable.",
+                details=f"Erreur: Le script du scraper '{source.scraper_filename}' pour la source '{source.nom}' (ID: {source.pk}) est introuvable. Détails: {e}",
                 level='error',
                 zone_obj=zone,
                 source_obj=source
             )
+            record_run(status='error', message="Script du scraper introuvable.")
             return f"Erreur : Le script du scraper {source.scraper_filename} est introuvable."
-
-        result = subprocess.run(
-            ['python', script_path], capture_output=True, text=True, check=False, timeout=120 # Changed check=True to check=False to capture stderr and handle it
-        )
-
-        if result.returncode != 0: # Scraper script returned an error
+        except ScraperExecutionError as e: # Exception du scraper, code de sortie non nul ou délai dépassé
             log_action(
                 actor_id=None,
                 action='SCRAPER_EXECUTION_ERROR',
-                details=f"Le script du scraper '{source.scraper_filename}' pour la source '{source.nom}' (ID: {source.pk}) a échoué. Code de sortie: {result.returncode}. Erreur (stderr): {result.stderr}",
+                details=f"Le script du scraper '{source.scraper_filename}' pour la source '{source.nom}' (ID: {source.pk}) a échoué. {e}",
                 level='error',
                 zone_obj=zone,
                 source_obj=source
             )
-            return f"Erreur d'exécution du scraper pour la source {source.nom}."
-
-
-        try:
-            scraped_data = json.loads(result.stdout)
-            if not scraped_data: # Handle empty JSON array or object
-                raise json.JSONDecodeError("Scraper returned empty data.", result.stdout, 0)
-
-        except json.JSONDecodeError as e:
+            record_run(status='error', message=str(e)[:500])
+            return f"Erreur d'exécution du scraper pour la source {source.nom}.{_after_failure(source, zone, e, force_refresh, attempt)}"
+        except ScraperInvalidOutput as e:
             log_action(
                 actor_id=None,
                 action='SCRAPER_INVALID_JSON',
-                details=f"Erreur: Le scraper pour la source '{source.nom}' (ID: {source.pk}) n'a pas renvoyé de JSON valide. Output: '{result.stdout[:500]}' Détails: {e}",
+                details=f"Erreur: Le scraper pour la source '{source.nom}' (ID: {source.pk}) n'a pas renvoyé de JSON valide. Output: '{e.output[:500]}' Détails: {e}",
                 level='error',
                 zone_obj=zone,
                 source_obj=source
             )
+            record_failure(source, str(e))
+            record_run(status='error', message="JSON invalide ou vide renvoyé par le scraper.")
             return f"Erreur: Le scraper pour la source {source.nom} n'a pas renvoyé de JSON valide."
 
-
-        # Logique de suppression des données brutes pour la date cible
-        target_date = None
-        if scraped_data and scraped_data[0].get('date_publication'):
-            try:
-                target_date = datetime.strptime(scraped_data[0]['date_publication'], "%Y-%m-%d").date()
-                # Only delete if target_date is successfully parsed
-                ScrapedCurrencyRaw.objects.filter(source=source, date_publication_brut=target_date).delete()
-            except ValueError:
-                log_action(
-                    actor_id=None,
-                    action='RAW_DATA_DATE_PARSE_ERROR',
-                    details=f"Warning: Mauvais format de date dans le JSON du scraper pour la source '{source.nom}'. Date: {scraped_data[0].get('date_publication')}",
-                    level='warning',
-                    zone_obj=zone,
-                    source_obj=source
-                )
-        
-        raw_entries = []
-        for item in scraped_data:
-            date_pub = None
-            if item.get('date_publication'):
-                try:
-                    date_pub = datetime.strptime(item['date_publication'], "%Y-%m-%d").date()
-                except ValueError:
-                    log_action(
-                        actor_id=None,
-                        action='RAW_DATA_DATE_PARSE_ERROR',
-                        details=f"Warning: Impossible de parser la date '{item['date_publication']}' pour la source '{source.nom}'.",
-                        level='warning',
-                        zone_obj=zone,
-                        source_obj=source
-                    )
-
-            valeur = Decimal('0.0')
-            try:
-                if item.get('valeur') is not None:
-                    valeur = Decimal(str(item['valeur']).replace(',', '.'))
-            except (ValueError, TypeError):
-                log_action(
-                    actor_id=None,
-                    action='RAW_DATA_VALUE_PARSE_ERROR',
-                    details=f"Warning: Valeur incorrecte pour '{item.get('code_iso', 'N/A')}' pour la source '{source.nom}'. Valeur: '{item.get('valeur', 'N/A')}'",
-                    level='warning',
-                    zone_obj=zone,
-                    source_obj=source
-                )
-
-            raw_entries.append(ScrapedCurrencyRaw(
-                source=source,
-                date_publication_brut=date_pub,
-                nom_devise_brut=item.get('nom_brut', ''),
-                code_iso_brut=item.get('code_iso', ''),
-                valeur_brute=valeur,
-                multiplicateur_brut=int(item.get('unite', 1))
-            ))
-        
-        if raw_entries:
-            ScrapedCurrencyRaw.objects.bulk_create(raw_entries)
-        
-        # Trigger pipeline processing
-        processing_result = process_and_inject_rates(source.pk) # Assuming process_and_inject_rates also handles logging
-        
-        log_action(
-            actor_id=None,
-            action='PIPELINE_EXECUTION_SUCCESS',
-            details=f"Pipeline exécuté avec succès pour la source '{source.nom}' (ID: {source.pk}) de la zone '{zone.nom}'. {len(raw_entries)} devises brutes traitées. Résultat pipeline: {processing_result}",
-            level='info',
-            zone_obj=zone,
-            source_obj=source
-        )
-        return f"Succès : {len(raw_entries)} devises brutes récupérées pour la source {source.nom}. Pipeline: {processing_result}"
-
     # General exception handling for any unhandled errors in the task
     except Source.DoesNotExist:
         log_action(
@@ -162,6 +313,7 @@ def run_scraper_for_source(source_id):
             details=f"Erreur critique: Source avec l'ID {source_id} non trouvée lors de l'exécution du scraper Celery.",
             level='critical'
         )
+        record_run(status='error', message="Source non trouvée.")
         return f"Erreur critique : Source avec l'ID {source_id} non trouvée."
     except Exception as e:
         # Catch-all for any other unexpected errors during the task
@@ -173,4 +325,263 @@ def run_scraper_for_source(source_id):
             zone_obj=zone,
             source_obj=source
         )
-        return f"Erreur interne lors du traitement de la source {source.nom if source else 'ID non spécifié'} (ID: {source.pk if source else source_id}) : {e}"
\ No newline at end of file
+        record_run(status='error', message=str(e))
+        return f"Erreur interne lors du traitement de la source {source.nom if source else 'ID non spécifié'} (ID: {source.pk if source else source_id}) : {e}"
+
+
+def _after_failure(source, zone, error, force_refresh, attempt):
+    """
+    Enregistre l'échec de récupération dans la santé de la source, puis ouvre le disjoncteur
+    ou planifie une nouvelle tentative. Retourne la suite du message de résultat.
+    """
+    health = record_failure(source, str(error))
+    if health.circuit_ouvert:
+        log_action(
+            actor_id=None,
+            action='SCRAPER_CIRCUIT_OPENED',
+            details=f"Disjoncteur ouvert pour la source '{source.nom}' (ID: {source.pk}) après {health.echecs_consecutifs} échecs consécutifs : exécutions suspendues jusqu'au {timezone.localtime(health.circuit_ouvert_jusqua):%d/%m/%Y %H:%M}.",
+            level='warning',
+            zone_obj=zone,
+            source_obj=source
+        )
+        record_run(consecutive_failures=health.echecs_consecutifs)
+        return " Disjoncteur ouvert."
+    delay = retry_delay(attempt)
+    if delay is None:
+        record_run(consecutive_failures=health.echecs_consecutifs)
+        return ""
+    run_scraper_for_source.apply_async(
+        args=(source.pk,), kwargs={'force_refresh': force_refresh, 'attempt': attempt + 1}, countdown=delay
+    )
+    record_run(consecutive_failures=health.echecs_consecutifs, retry_in_s=delay)
+    return f" Nouvelle tentative dans {delay:.0f} s."
+
+
+def _parse_date(source, zone, value, details):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (ValueError, TypeError):
+        log_action(
+            actor_id=None,
+            action='RAW_DATA_DATE_PARSE_ERROR',
+            details=details,
+            level='warning',
+            zone_obj=zone,
+            source_obj=source
+        )
+        return None
+
+
+def _raw_entry(source, zone, item):
+    """Valide un taux renvoyé par le scraper et le convertit en ScrapedCurrencyRaw (non enregistré)."""
+    date_pub = None
+    if item.get('date_publication'):
+        date_pub = _parse_date(
+            source, zone, item['date_publication'],
+            f"Warning: Impossible de parser la date '{item['date_publication']}' pour la source '{source.nom}'."
+        )
+
+    valeur = Decimal('0.0')
+    try:
+        if item.get('valeur') is not None:
+            valeur = Decimal(str(item['valeur']).replace(',', '.'))
+    except (ValueError, TypeError, ArithmeticError):
+        log_action(
+            actor_id=None,
+            action='RAW_DATA_VALUE_PARSE_ERROR',
+            details=f"Warning: Valeur incorrecte pour '{item.get('code_iso', 'N/A')}' pour la source '{source.nom}'. Valeur: '{item.get('valeur', 'N/A')}'",
+            level='warning',
+            zone_obj=zone,
+            source_obj=source
+        )
+
+    return ScrapedCurrencyRaw(
+        source=source,
+        date_publication_brut=date_pub,
+        nom_devise_brut=item.get('nom_brut', ''),
+        code_iso_brut=item.get('code_iso', ''),
+        valeur_brute=valeur,
+        multiplicateur_brut=int(item.get('unite', 1))
+    )
+
+
+RAW_VALUE_QUANTUM = Decimal('0.000001') # decimal_places de ScrapedCurrencyRaw.valeur_brute
+RAW_UPDATE_FIELDS = ['valeur_brute', 'multiplicateur_brut', 'date_scraping']
+
+
+def _write_raw_entries(raw_entries, target_date, existing, seen, raw_changes):
+    """
+    Écrit un lot de lignes brutes par différence avec `existing` (lot enregistré pour la date cible) :
+    un INSERT groupé pour les nouvelles, un UPDATE groupé pour celles dont la valeur ou le
+    multiplicateur a changé, rien pour les autres. Les lignes d'une autre date (rare) sont
+    comparées de la même façon aux lignes enregistrées à leur date. Met à jour `seen` (clés
+    uniques date, nom, code déjà lues) et les compteurs `raw_changes`.
+    """
+    to_insert, to_update, other_dates = [], [], []
+    now = timezone.now()
+
+    def classify(entry, current):
+        if current is None:
+            to_insert.append(entry)
+        elif (current[1], current[2]) == (entry.valeur_brute.quantize(RAW_VALUE_QUANTUM), entry.multiplicateur_brut):
+            raw_changes['unchanged'] += 1
+        else:
+            entry.pk = current[0]
+            entry.date_scraping = now
+            to_update.append(entry)
+
+    for entry in raw_entries:
+        if entry.date_publication_brut is None:
+            to_insert.append(entry) # Sans date : pas de clé unique, insérée comme auparavant
+            continue
+        key = (entry.date_publication_brut, entry.nom_devise_brut, entry.code_iso_brut)
+        if key in seen:
+            continue # Doublon dans la page : la première ligne l'emporte
+        seen.add(key)
+        if entry.date_publication_brut != target_date:
+            other_dates.append(entry)
+            continue
+        classify(entry, existing.get(key[1:]))
+
+    if other_dates:
+        # Lignes enregistrées aux autres dates du lot : {(date, nom, code): (id, valeur, multiplicateur)}
+        existing_other = {
+            (date_pub, nom, code): (pk, valeur, multiplicateur)
+            for pk, date_pub, nom, code, valeur, multiplicateur in ScrapedCurrencyRaw.objects.filter(
+                source=other_dates[0].source,
+                date_publication_brut__in={entry.date_publication_brut for entry in other_dates}
+            ).values_list('pk', 'date_publication_brut', 'nom_devise_brut', 'code_iso_brut', 'valeur_brute', 'multiplicateur_brut')
+        }
+        for entry in other_dates:
+            classify(entry, existing_other.get((entry.date_publication_brut, entry.nom_devise_brut, entry.code_iso_brut)))
+
+    if to_insert:
+        ScrapedCurrencyRaw.objects.bulk_create(to_insert)
+        raw_changes['inserted'] += len(to_insert)
+    if to_update:
+        ScrapedCurrencyRaw.objects.bulk_update(to_update, RAW_UPDATE_FIELDS)
+        raw_changes['updated'] += len(to_update)
+
+
+def _ingest_scraped_data(source, zone, scraped_data, validators=None):
+    """
+    Lit les taux renvoyés par le scraper (liste ou flux), les convertit en ScrapedCurrencyRaw et
+    les compare, par lots de RAW_INSERT_BATCH_SIZE, au lot brut déjà
+    enregistré pour la date publiée (clé unique source, date, nom, code) : seules les lignes
+    nouvelles ou dont la valeur ou le multiplicateur a changé sont écrites, et les lignes
+    disparues de la page sont supprimées. Les lignes inchangées gardent leur date_scraping.
+    Le flux est d'abord lu en entier (un échec en cours de route n'écrit donc rien), puis
+    l'ingestion se fait dans une transaction, annulée si le lot est identique au dernier
+    (empreinte). Le pipeline reçoit ensuite les compteurs (inserted, updated, unchanged, deleted).
+    Les validateurs de la page sont enregistrés avec l'empreinte du lot. Retourne le message.
+    """
+    # Lecture du flux (sortie du sous-processus) hors transaction : la connexion n'est pas
+    # gardée en transaction pendant que le scraper s'exécute.
+    with run_stage('parse'):
+        records = iter(list(scraped_data))
+    fingerprint = BatchFingerprint()
+    raw_count = 0
+    raw_changes = Counter(inserted=0, updated=0, unchanged=0, deleted=0)
+    with transaction.atomic():
+        with run_stage('parse'):
+            first = next(records, None)
+            if first is None:
+                raise ScraperInvalidOutput(f"Le scraper '{source.scraper_filename}' n'a renvoyé aucun taux.")
+            # Date cible du lot (utilisée pour le remplacement des données brutes et l'empreinte)
+            target_date = None
+            if first.get('date_publication'):
+                target_date = _parse_date(
+                    source, zone, first['date_publication'],
+                    f"Warning: Mauvais format de date dans le JSON du scraper pour la source '{source.nom}'. Date: {first.get('date_publication')}"
+                )
+
+        # Lot brut déjà enregistré pour la date cible : {(nom, code): (id, valeur, multiplicateur)}
+        existing = {}
+        if target_date:
+            with run_stage('raw_ingest'):
+                existing = {
+                    (nom, code): (pk, valeur, multiplicateur)
+                    for pk, nom, code, valeur, multiplicateur in ScrapedCurrencyRaw.objects.filter(
+                        source=source, date_publication_brut=target_date
+                    ).values_list('pk', 'nom_devise_brut', 'code_iso_brut', 'valeur_brute', 'multiplicateur_brut')
+                }
+        seen = set()
+
+        stream = itertools.chain([first], records)
+        while True:
+            with run_stage('parse'):
+                raw_entries = [_raw_entry(source, zone, item) for item in itertools.islice(stream, RAW_INSERT_BATCH_SIZE)]
+                fingerprint.update(raw_entries)
+            if not raw_entries:
+                break
+            with run_stage('raw_ingest'):
+                _write_raw_entries(raw_entries, target_date, existing, seen, raw_changes)
+            raw_count += len(raw_entries)
+
+        # Lignes du lot précédent absentes de la page : supprimées, comme avec l'ancien remplacement complet.
+        stale_ids = [pk for (nom, code), (pk, _, _) in existing.items() if (target_date, nom, code) not in seen]
+        if stale_ids:
+            with run_stage('raw_ingest'):
+                raw_changes['deleted'] = ScrapedCurrencyRaw.objects.filter(pk__in=stale_ids).delete()[0]
+
+        # Court-circuit : même date de publication et même contenu que le dernier lot injecté.
+        fingerprint = fingerprint.hexdigest()
+        unchanged = bool(target_date) and source.date_empreinte == target_date and source.empreinte_donnees == fingerprint
+        if unchanged:
+            transaction.set_rollback(True)
+
+    record_run(raw_rows=raw_count, **{f'raw_{key}': value for key, value in raw_changes.items()})
+    if unchanged:
+        log_action(
+            actor_id=None,
+            action='SCRAPER_DATA_UNCHANGED',
+            details=f"Données inchangées pour la source '{source.nom}' (ID: {source.pk}) de la zone '{zone.nom}' à la date du {target_date}. {raw_count} devises brutes identiques au dernier lot : ingestion et pipeline ignorés.",
+            level='info',
+            zone_obj=zone,
+            source_obj=source
+        )
+        Source.objects.filter(pk=source.pk).update(**_page_validator_fields(validators))
+        record_run(status='unchanged', message="Lot identique au dernier lot injecté.")
+        return f"Inchangé : {raw_count} devises brutes identiques au dernier lot pour la source {source.nom}."
+
+    # Trigger pipeline processing. Après une remise à zéro de l'empreinte (alias ou activations
+    # modifiés), le pipeline doit tout recalculer même si aucune ligne brute n'a changé.
+    pipeline_result = run_pipeline(
+        source.pk, raw_changes=dict(raw_changes) if source.empreinte_donnees else None
+    )
+    processing_result = pipeline_result['message']
+
+    if pipeline_result['status'] == 'error':
+        # Écriture des taux annulée : l'empreinte et les validateurs de la page sont effacés pour
+        # que la prochaine exécution relance tout le pipeline (raw_changes=None), même si la page
+        # et les lignes brutes n'ont pas changé.
+        Source.objects.filter(pk=source.pk).update(
+            empreinte_donnees='', date_empreinte=None, **_page_validator_fields(None)
+        )
+        log_action(
+            actor_id=None,
+            action='PIPELINE_ERROR',
+            details=f"Échec du pipeline pour la source '{source.nom}' (ID: {source.pk}) de la zone '{zone.nom}'. {raw_count} devises brutes ingérées, taux non écrits : le pipeline sera relancé à la prochaine exécution. Résultat pipeline: {processing_result}",
+            level='error',
+            zone_obj=zone,
+            source_obj=source
+        )
+        record_run(status='error', message=processing_result)
+        return f"Erreur : {raw_count} devises brutes récupérées pour la source {source.nom}, mais le pipeline a échoué. Pipeline: {processing_result}"
+
+    # L'empreinte n'est enregistrée qu'une fois le lot ingéré et traité avec succès par le pipeline.
+    if target_date:
+        Source.objects.filter(pk=source.pk).update(
+            empreinte_donnees=fingerprint, date_empreinte=target_date, **_page_validator_fields(validators)
+        )
+
+    log_action(
+        actor_id=None,
+        action='PIPELINE_EXECUTION_SUCCESS',
+        details=f"Pipeline exécuté avec succès pour la source '{source.nom}' (ID: {source.pk}) de la zone '{zone.nom}'. {raw_count} devises brutes traitées. Résultat pipeline: {processing_result}",
+        level='info',
+        zone_obj=zone,
+        source_obj=source
+    )
+    record_run(message=processing_result)
+    return f"Succès : {raw_count} devises brutes récupérées pour la source {source.nom}. Pipeline: {processing_result}"
@@ -1,3 +1,629 @@
-from django.test import TestCase
+# scrapers/tests.py
 
-# Create your tests here.
+import json
+import tempfile
+import httpx
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django.db import IntegrityError, connection
+
+from core.alias_resolver import bump_alias_version
+from core.models import (
+    ZoneMonetaire, Source, ScrapedCurrencyRaw, PipelineRun, SourceHealth,
+    Devise, DeviseAlias, ActivatedCurrency, ExchangeRate
+)
+from logs.models import LogEntry
+from scrapers import tasks
+from scrapers.tasks import run_scraper_for_source, run_scrapers_batch, reset_batch_fingerprints
+from scrapers.locks import SOURCE_LOCK_KEY, source_run_lock
+from scrapers.runtime import run_scraper, ScraperTimeout
+from scrapers.scrapers import bct_scraper, boa_scraper, _parsing
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+# Cache propre aux tests (taux en cache, verrous, index des alias), vidé à chaque test
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+SCRAPED_PAYLOAD = [
+    {"date_publication": "2025-07-24", "nom_brut": "DOLLAR DES USA", "code_iso": "USD", "unite": 1, "valeur": 2.9056},
+    {"date_publication": "2025-07-24", "nom_brut": "EURO", "code_iso": "EUR", "unite": 1, "valeur": 3.3595},
+]
+
+
+def fake_page(content=b'', status_code=200, headers=None):
+    return httpx.Response(
+        status_code, content=content, headers=headers,
+        request=httpx.Request('GET', 'https://www.bct.gov.tn/bct/siteprod/cours.jsp')
+    )
+
+
+@contextmanager
+def fake_scraper_run(payload, response=None, **parse_kwargs):
+    # Le contenu de la page suit le lot : deux lots différents donnent deux pages différentes.
+    response = response or fake_page(json.dumps(payload).encode('utf-8'))
+    parse_kwargs = parse_kwargs or {'return_value': payload}
+    with mock.patch.object(httpx.Client, 'get', return_value=response) as get, \
+            mock.patch('scrapers.scrapers.bct_scraper.parse', **parse_kwargs) as parse:
+        yield get, parse
+
+
+class BctSourceTestMixin:
+    """
+    Vide le cache (local, voir LOCMEM_CACHES) et crée la zone TND et sa source BCT.
+    """
+    scraper_filename = "bct_scraper.py"
+
+    def setUp(self):
+        cache.clear()
+        self.zone = ZoneMonetaire.objects.create(nom="TND")
+        self.source = Source.objects.create(
+            zone=self.zone,
+            nom="BCT",
+            url_source="https://www.bct.gov.tn/bct/siteprod/cours.jsp",
+            scraper_filename=self.scraper_filename
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SCRAPERS_RESULT_CACHE_TTL=0) # Cache des taux : voir ResultCacheTestCase
+class RunScraperForSourceTestCase(BctSourceTestMixin, TestCase):
+    def test_unchanged_batch_skips_ingest_and_pipeline(self):
+        with fake_scraper_run(SCRAPED_PAYLOAD):
+            first = run_scraper_for_source(self.source.pk)
+        self.assertTrue(first.startswith("Succès"))
+        raw_ids = set(ScrapedCurrencyRaw.objects.values_list('pk', flat=True))
+
+        with fake_scraper_run(list(reversed(SCRAPED_PAYLOAD))), \
+                mock.patch('scrapers.tasks.run_pipeline') as pipeline:
+            second = run_scraper_for_source(self.source.pk)
+
+        self.assertTrue(second.startswith("Inchangé"))
+        pipeline.assert_not_called()
+        self.assertEqual(set(ScrapedCurrencyRaw.objects.values_list('pk', flat=True)), raw_ids)
+        self.assertTrue(LogEntry.objects.filter(action='SCRAPER_DATA_UNCHANGED', source=self.source).exists())
+
+    def test_changed_batch_is_ingested(self):
+        with fake_scraper_run(SCRAPED_PAYLOAD):
+            run_scraper_for_source(self.source.pk)
+
+        changed_payload = [dict(SCRAPED_PAYLOAD[0], valeur=2.9101), SCRAPED_PAYLOAD[1]]
+        with fake_scraper_run(changed_payload):
+            result = run_scraper_for_source(self.source.pk)
+
+        self.assertTrue(result.startswith("Succès"))
+        usd = ScrapedCurrencyRaw.objects.get(source=self.source, code_iso_brut="USD")
+        self.assertEqual(str(usd.valeur_brute), "2.910100")
+
+    def test_run_is_recorded_with_stage_timings(self):
+        with fake_scraper_run(SCRAPED_PAYLOAD):
+            run_scraper_for_source(self.source.pk)
+
+        run = PipelineRun.objects.get()
+        self.assertEqual((run.source, run.kind, run.status), (self.source, PipelineRun.KIND_SCRAPER, 'ok'))
+        self.assertEqual(
+            set(run.stages), {'fetch', 'scraper_parse', 'parse', 'raw_ingest', 'resolution', 'logging'}
+        )
+        self.assertEqual(run.stages['raw_ingest']['queries'], 2)
+        self.assertEqual(run.stages['logging']['queries'], 1)
+        self.assertEqual(run.rows['raw_rows'], 2)
+        self.assertGreaterEqual(run.query_count, sum(stage['queries'] for stage in run.stages.values()))
+
+
+    def test_failed_pipeline_write_is_retried_on_next_run(self):
+        usd = Devise.objects.create(code="USD", nom="Dollar US")
+        DeviseAlias.objects.create(alias="USD", devise_officielle=usd)
+        bump_alias_version()
+        ActivatedCurrency.objects.create(zone=self.zone, devise=usd, is_active=True)
+
+        with fake_scraper_run(SCRAPED_PAYLOAD), \
+                mock.patch.object(ExchangeRate.objects, 'bulk_create', side_effect=IntegrityError("conflit")):
+            first = run_scraper_for_source(self.source.pk)
+
+        self.assertTrue(first.startswith("Erreur"))
+        self.assertFalse(ExchangeRate.objects.exists())
+        self.source.refresh_from_db()
+        self.assertEqual((self.source.empreinte_donnees, self.source.empreinte_page), ('', ''))
+        self.assertTrue(LogEntry.objects.filter(action='PIPELINE_ERROR', source=self.source).exists())
+        self.assertFalse(LogEntry.objects.filter(action='PIPELINE_EXECUTION_SUCCESS', source=self.source).exists())
+
+        # Même page, mêmes lignes brutes : le pipeline est relancé en entier.
+        with fake_scraper_run(SCRAPED_PAYLOAD):
+            second = run_scraper_for_source(self.source.pk)
+        self.assertTrue(second.startswith("Succès"))
+        self.assertEqual(list(ExchangeRate.objects.values_list('devise_id', flat=True)), ['USD'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SCRAPERS_RESULT_CACHE_TTL=0) # Cache des taux : voir ResultCacheTestCase
+class DiffRawIngestTestCase(BctSourceTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        with fake_scraper_run(SCRAPED_PAYLOAD):
+            run_scraper_for_source(self.source.pk)
+        self.raw = {raw.code_iso_brut: raw for raw in ScrapedCurrencyRaw.objects.filter(source=self.source)}
+
+    def test_only_changed_rows_are_written(self):
+        changed_payload = [dict(SCRAPED_PAYLOAD[0], valeur=2.9101), SCRAPED_PAYLOAD[1]]
+        with fake_scraper_run(changed_payload):
+            run_scraper_for_source(self.source.pk)
+
+        usd = ScrapedCurrencyRaw.objects.get(source=self.source, code_iso_brut="USD")
+        eur = ScrapedCurrencyRaw.objects.get(source=self.source, code_iso_brut="EUR")
+        self.assertEqual((usd.pk, str(usd.valeur_brute)), (self.raw['USD'].pk, "2.910100"))
+        self.assertGreater(usd.date_scraping, self.raw['USD'].date_scraping)
+        self.assertEqual((eur.pk, eur.date_scraping), (self.raw['EUR'].pk, self.raw['EUR'].date_scraping))
+        run = PipelineRun.objects.latest('started_at')
+        self.assertEqual(
+            {key: run.rows[key] for key in ('raw_inserted', 'raw_updated', 'raw_unchanged', 'raw_deleted')},
+            {'raw_inserted': 0, 'raw_updated': 1, 'raw_unchanged': 1, 'raw_deleted': 0}
+        )
+
+    def test_rows_missing_from_the_page_are_deleted(self):
+        with fake_scraper_run(SCRAPED_PAYLOAD[:1]):
+            run_scraper_for_source(self.source.pk)
+
+        self.assertEqual(
+            list(ScrapedCurrencyRaw.objects.filter(source=self.source).values_list('pk', flat=True)),
+            [self.raw['USD'].pk]
+        )
+
+    def test_rows_of_other_dates_are_deduplicated_and_classified(self):
+        other_day = dict(SCRAPED_PAYLOAD[1], date_publication="2025-07-23")
+        payload = SCRAPED_PAYLOAD + [other_day, dict(other_day, valeur=9.99)]
+        with fake_scraper_run(payload):
+            run_scraper_for_source(self.source.pk)
+        reset_batch_fingerprints(self.zone)
+        with fake_scraper_run(payload):
+            run_scraper_for_source(self.source.pk)
+
+        eur = ScrapedCurrencyRaw.objects.get(source=self.source, code_iso_brut="EUR", date_publication_brut=date(2025, 7, 23))
+        self.assertEqual(eur.valeur_brute, Decimal(str(other_day['valeur'])).quantize(Decimal('0.000001')))
+        runs = PipelineRun.objects.order_by('-started_at')[:2]
+        self.assertEqual(
+            [{key: run.rows[key] for key in ('raw_inserted', 'raw_updated', 'raw_unchanged')} for run in runs],
+            [{'raw_inserted': 0, 'raw_updated': 0, 'raw_unchanged': 3}, {'raw_inserted': 1, 'raw_updated': 0, 'raw_unchanged': 2}]
+        )
+
+    def test_pipeline_is_skipped_when_no_raw_row_changed(self):
+        # Empreinte différente (ex: calculée par une version précédente) mais lignes brutes identiques.
+        Source.objects.filter(pk=self.source.pk).update(empreinte_donnees='0' * 64)
+        with fake_scraper_run(list(reversed(SCRAPED_PAYLOAD))):
+            result = run_scraper_for_source(self.source.pk)
+
+        self.assertIn("pipeline ignoré", result)
+        self.assertTrue(LogEntry.objects.filter(action='PIPELINE_SKIPPED_RAW_UNCHANGED', source=self.source).exists())
+
+    def test_pipeline_runs_after_fingerprint_reset(self):
+        reset_batch_fingerprints(self.zone)
+        with fake_scraper_run(SCRAPED_PAYLOAD), \
+                mock.patch('scrapers.tasks.run_pipeline', return_value={'status': 'ok', 'message': "ok"}) as pipeline:
+            run_scraper_for_source(self.source.pk)
+
+        pipeline.assert_called_once_with(self.source.pk, raw_changes=None)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SCRAPERS_RESULT_CACHE_TTL=0, SCRAPERS_RETRY_MAX=0) # Cache des taux, nouvelles tentatives : voir plus bas
+class ScraperRuntimeTestCase(BctSourceTestMixin, TestCase):
+    def test_scraper_exception_is_logged_as_execution_error(self):
+        with fake_scraper_run(SCRAPED_PAYLOAD, side_effect=RuntimeError("Aucune table")):
+            result = run_scraper_for_source(self.source.pk)
+
+        self.assertTrue(result.startswith("Erreur d'exécution"))
+        entry = LogEntry.objects.get(action='SCRAPER_EXECUTION_ERROR', source=self.source)
+        self.assertIn("Aucune table", entry.details)
+        self.assertEqual(PipelineRun.objects.get().status, 'error')
+
+    def test_in_process_call_times_out(self):
+        release = threading.Event()
+        try:
+            with fake_scraper_run(SCRAPED_PAYLOAD, side_effect=lambda content: release.wait(5)):
+                with self.assertRaises(ScraperTimeout):
+                    run_scraper("bct_scraper.py", timeout=0.05)
+        finally:
+            release.set()
+
+    def test_unknown_scraper_is_reported(self):
+        self.source.scraper_filename = "absent_scraper.py"
+        self.source.save()
+
+        result = run_scraper_for_source(self.source.pk)
+
+        self.assertIn("introuvable", result)
+        self.assertTrue(LogEntry.objects.filter(action='SCRAPER_SCRIPT_NOT_FOUND', source=self.source).exists())
+
+
+BCT_PAGE = (
+    "<html><body><h3>Journée du 24/07/2025</h3><table>"
+    "<tr><th>Nom</th><th>Code</th><th>Unité</th><th>Valeur</th></tr>"
+    "<tr><td>DOLLAR DES USA</td><td>USD</td><td>1</td><td>2,9056</td></tr>"
+    "<tr><td>EURO</td><td>EUR</td><td>1</td><td>3,3595</td></tr>"
+    "</table></body></html>"
+).encode('utf-8')
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SCRAPERS_RESULT_CACHE_TTL=0, SCRAPERS_RETRY_MAX=0) # Cache des taux, nouvelles tentatives : voir plus bas
+class SubprocessStreamingTestCase(BctSourceTestMixin, TestCase):
+    """Mode SCRAPERS_SUBPROCESS_ISOLATION : le script imprime un taux JSON par ligne, lu au fil de l'eau."""
+
+    scraper_filename = "stream_scraper.py"
+
+    def setUp(self):
+        super().setUp()
+        self.scrapers_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.scrapers_dir.cleanup)
+        settings_override = override_settings(SCRAPERS_SUBPROCESS_ISOLATION=True, SCRAPERS_DIR=self.scrapers_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def write_scraper(self, body):
+        Path(self.scrapers_dir.name, "stream_scraper.py").write_text(
+            "import json, sys\n" + f"PAYLOAD = {SCRAPED_PAYLOAD!r}\n" + body, encoding='utf-8'
+        )
+
+    def test_ndjson_records_are_ingested(self):
+        self.write_scraper("for record in PAYLOAD:\n    print(json.dumps(record), flush=True)\n")
+
+        result = run_scraper_for_source(self.source.pk)
+
+        self.assertTrue(result.startswith("Succès"), result)
+        self.assertEqual(ScrapedCurrencyRaw.objects.filter(source=self.source).count(), 2)
+
+    def test_legacy_json_array_is_accepted(self):
+        self.write_scraper("print(json.dumps(PAYLOAD, indent=2))\n")
+
+        result = run_scraper_for_source(self.source.pk)
+
+        self.assertTrue(result.startswith("Succès"), result)
+        self.assertEqual(ScrapedCurrencyRaw.objects.filter(source=self.source).count(), 2)
+
+    def test_failure_after_partial_output_rolls_back_the_batch(self):
+        self.write_scraper(
+            "print(json.dumps(PAYLOAD[0]), flush=True)\n"
+            "print('Erreur : table incomplète', file=sys.stderr)\n"
+            "sys.exit(1)\n"
+        )
+
+        result = run_scraper_for_source(self.source.pk)
+
+        self.assertTrue(result.startswith("Erreur d'exécution"), result)
+        self.assertFalse(ScrapedCurrencyRaw.objects.filter(source=self.source).exists())
+        entry = LogEntry.objects.get(action='SCRAPER_EXECUTION_ERROR', source=self.source)
+        self.assertIn("table incomplète", entry.details)
+
+    def test_stream_is_read_outside_the_ingest_transaction(self):
+        self.write_scraper("for record in PAYLOAD:\n    print(json.dumps(record), flush=True)\n")
+        fetch_records = tasks._fetch_records
+        depths = []
+
+        def watched_fetch(*args):
+            records, validators, stream = fetch_records(*args)
+
+            def watched_records():
+                for record in records:
+                    depths.append(len(connection.savepoint_ids))
+                    yield record
+            return watched_records(), validators, stream
+
+        baseline = len(connection.savepoint_ids)
+        with mock.patch('scrapers.tasks._fetch_records', side_effect=watched_fetch):
+            result = run_scraper_for_source(self.source.pk)
+
+        self.assertTrue(result.startswith("Succès"), result)
+        self.assertEqual(depths, [baseline] * len(SCRAPED_PAYLOAD))
+
+    def test_health_is_recorded_once_the_stream_is_read(self):
+        self.write_scraper("print(json.dumps(PAYLOAD[0]), flush=True)\nsys.exit(1)\n")
+        run_scraper_for_source(self.source.pk)
+        health = SourceHealth.objects.get(source=self.source)
+        self.assertEqual((health.echecs_consecutifs, health.derniere_reussite), (1, None))
+
+        # Lot complet, puis lot identique (ingestion annulée) : réussites enregistrées malgré tout.
+        self.write_scraper("for record in PAYLOAD:\n    print(json.dumps(record), flush=True)\n")
+        run_scraper_for_source(self.source.pk)
+        self.assertTrue(run_scraper_for_source(self.source.pk).startswith("Inchangé"))
+        health.refresh_from_db()
+        self.assertEqual(health.echecs_consecutifs, 0)
+        self.assertIsNotNone(health.derniere_reussite)
+        self.assertGreater(health.latence_moyenne_ms, 0)
+
+    def test_invalid_line_is_reported(self):
+        self.write_scraper("print(json.dumps(PAYLOAD[0]))\nprint('pas du json')\n")
+
+        result = run_scraper_for_source(self.source.pk)
+
+        self.assertIn("JSON valide", result)
+        self.assertFalse(ScrapedCurrencyRaw.objects.filter(source=self.source).exists())
+
+    def test_inserts_are_batched(self):
+        self.write_scraper("for record in PAYLOAD:\n    print(json.dumps(record), flush=True)\n")
+
+        with mock.patch('scrapers.tasks.RAW_INSERT_BATCH_SIZE', 1):
+            run_scraper_for_source(self.source.pk)
+
+        run = PipelineRun.objects.get()
+        self.assertEqual(run.stages['raw_ingest']['queries'], 3) # suppression + 2 lots d'une ligne
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SCRAPERS_RESULT_CACHE_TTL=0) # Cache des taux : voir ResultCacheTestCase
+class ConditionalFetchTestCase(BctSourceTestMixin, TestCase):
+    def test_validators_are_stored_and_sent_back(self):
+        page = fake_page(b"<html>v1</html>", headers={'ETag': '"v1"', 'Last-Modified': 'Thu, 24 Jul 2025 08:00:00 GMT'})
+        with fake_scraper_run(SCRAPED_PAYLOAD, response=page):
+            run_scraper_for_source(self.source.pk)
+
+        self.source.refresh_from_db()
+        self.assertEqual(self.source.etag_page, '"v1"')
+        self.assertEqual(len(self.source.empreinte_page), 64)
+
+        with fake_scraper_run(SCRAPED_PAYLOAD, response=fake_page(status_code=304)) as (get, parse), \
+                mock.patch('scrapers.tasks.run_pipeline') as pipeline:
+            result = run_scraper_for_source(self.source.pk)
+
+        self.assertTrue(result.startswith("Inchangé"))
+        headers = get.call_args.kwargs['headers']
+        self.assertEqual(headers['If-None-Match'], '"v1"')
+        self.assertEqual(headers['If-Modified-Since'], 'Thu, 24 Jul 2025 08:00:00 GMT')
+        parse.assert_not_called()
+        pipeline.assert_not_called()
+        self.assertTrue(LogEntry.objects.filter(action='SCRAPER_PAGE_UNCHANGED', source=self.source).exists())
+        self.assertEqual(PipelineRun.objects.latest('started_at').status, 'unchanged')
+
+    def test_identical_body_skips_parsing(self):
+        with fake_scraper_run(SCRAPED_PAYLOAD):
+            run_scraper_for_source(self.source.pk)
+
+        with fake_scraper_run(SCRAPED_PAYLOAD) as (get, parse):
+            result = run_scraper_for_source(self.source.pk)
+
+        self.assertTrue(result.startswith("Inchangé"))
+        parse.assert_not_called()
+
+    def test_reset_fingerprints_forces_a_full_fetch(self):
+        with fake_scraper_run(SCRAPED_PAYLOAD):
+            run_scraper_for_source(self.source.pk)
+        reset_batch_fingerprints(self.zone)
+
+        with fake_scraper_run(SCRAPED_PAYLOAD) as (get, parse):
+            result = run_scraper_for_source(self.source.pk)
+
+        self.assertTrue(result.startswith("Succès"))
+        parse.assert_called_once()
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SCRAPERS_RESULT_CACHE_TTL=0, SCRAPERS_RETRY_MAX=0) # Cache des taux, nouvelles tentatives : voir plus bas
+class RunScrapersBatchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.sources = [
+            Source.objects.create(
+                zone=ZoneMonetaire.objects.create(nom=nom),
+                nom=f"Source {nom}",
+                url_source="https://www.bct.gov.tn/bct/siteprod/cours.jsp",
+                scraper_filename="bct_scraper.py"
+            )
+            for nom in ("TND", "TND2")
+        ]
+        self.broken = Source.objects.create(
+            zone=ZoneMonetaire.objects.create(nom="XXX"),
+            nom="Source absente",
+            url_source="https://example.com",
+            scraper_filename="absent_scraper.py"
+        )
+        self.inactive = Source.objects.create(
+            zone=ZoneMonetaire.objects.create(nom="OFF", is_active=False),
+            nom="Source inactive",
+            url_source="https://example.com",
+            scraper_filename="bct_scraper.py"
+        )
+
+    def test_sources_are_fetched_with_shared_client_and_ingested(self):
+        async def fake_get(client, url, **kwargs):
+            return httpx.Response(200, content=BCT_PAGE, request=httpx.Request('GET', url))
+
+        with mock.patch.object(httpx.AsyncClient, 'get', new=fake_get):
+            results = run_scrapers_batch()
+
+        self.assertEqual(set(results), {source.pk for source in self.sources} | {self.broken.pk})
+        for source in self.sources:
+            self.assertTrue(results[source.pk].startswith("Succès"), results[source.pk])
+            self.assertEqual(ScrapedCurrencyRaw.objects.filter(source=source).count(), 2)
+        self.assertIn("introuvable", results[self.broken.pk])
+        self.assertEqual(PipelineRun.objects.filter(kind=PipelineRun.KIND_SCRAPER).count(), 3)
+
+    def test_http_error_is_reported_per_source(self):
+        async def fake_get(client, url, **kwargs):
+            return httpx.Response(503, request=httpx.Request('GET', url))
+
+        with mock.patch.object(httpx.AsyncClient, 'get', new=fake_get):
+            results = run_scrapers_batch([self.sources[0].pk])
+
+        self.assertTrue(results[self.sources[0].pk].startswith("Erreur d'exécution"))
+        self.assertTrue(LogEntry.objects.filter(action='SCRAPER_EXECUTION_ERROR', source=self.sources[0]).exists())
+
+    def test_forced_batch_fetches_source_with_open_circuit(self):
+        source = self.sources[0]
+        SourceHealth.objects.create(
+            source=source, echecs_consecutifs=5, etat_circuit=SourceHealth.CIRCUIT_OUVERT,
+            circuit_ouvert_jusqua=timezone.now() + timedelta(hours=1)
+        )
+
+        async def fake_get(client, url, **kwargs):
+            return httpx.Response(200, content=BCT_PAGE, request=httpx.Request('GET', url))
+
+        with mock.patch.object(httpx.AsyncClient, 'get', new=fake_get):
+            self.assertTrue(run_scrapers_batch([source.pk])[source.pk].startswith("Ignoré"))
+            result = run_scrapers_batch([source.pk], force_refresh=True)[source.pk]
+
+        self.assertTrue(result.startswith("Succès"), result)
+        self.assertEqual(ScrapedCurrencyRaw.objects.filter(source=source).count(), 2)
+        self.assertFalse(SourceHealth.objects.get(source=source).circuit_ouvert)
+
+
+@override_settings(
+    SCRAPERS_RESULT_CACHE_TTL=300,
+    CACHES=LOCMEM_CACHES
+)
+class ResultCacheTestCase(BctSourceTestMixin, TestCase):
+    def test_second_run_reuses_cached_records(self):
+        with fake_scraper_run(SCRAPED_PAYLOAD) as (get, parse):
+            first = run_scraper_for_source(self.source.pk)
+            second = run_scraper_for_source(self.source.pk)
+
+        self.assertTrue(first.startswith("Succès"), first)
+        self.assertTrue(second.startswith("Inchangé"), second)
+        get.assert_called_once()
+        parse.assert_called_once()
+        run = PipelineRun.objects.filter(source=self.source).order_by('-started_at').first()
+        self.assertEqual(run.rows['result_cache_hit'], 1)
+
+    def test_force_refresh_bypasses_cache(self):
+        updated = [dict(SCRAPED_PAYLOAD[0], valeur=2.95), SCRAPED_PAYLOAD[1]]
+        with fake_scraper_run(SCRAPED_PAYLOAD):
+            run_scraper_for_source(self.source.pk)
+        with fake_scraper_run(updated) as (get, parse):
+            result = run_scraper_for_source(self.source.pk, force_refresh=True)
+
+        self.assertTrue(result.startswith("Succès"), result)
+        get.assert_called_once()
+        usd = ScrapedCurrencyRaw.objects.get(source=self.source, code_iso_brut="USD")
+        self.assertEqual(str(usd.valeur_brute), "2.950000")
+        # Le nouveau lot remplace l'ancien dans le cache.
+        with fake_scraper_run(SCRAPED_PAYLOAD) as (get, parse):
+            run_scraper_for_source(self.source.pk)
+        get.assert_not_called()
+
+    def test_batch_skips_sources_still_in_cache(self):
+        with fake_scraper_run(SCRAPED_PAYLOAD):
+            run_scraper_for_source(self.source.pk)
+
+        with mock.patch.object(httpx.AsyncClient, 'get') as get:
+            results = run_scrapers_batch([self.source.pk])
+
+        get.assert_not_called()
+        self.assertTrue(results[self.source.pk].startswith("Inchangé"), results[self.source.pk])
+
+    def test_changed_scraper_invalidates_cached_records(self):
+        with fake_scraper_run(SCRAPED_PAYLOAD):
+            run_scraper_for_source(self.source.pk)
+        Source.objects.filter(pk=self.source.pk).update(scraper_filename="boa_scraper.py")
+
+        with mock.patch.object(httpx.Client, 'get', return_value=fake_page(b'<html></html>')) as get:
+            run_scraper_for_source(self.source.pk)
+        get.assert_called_once()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SourceRunLockTestCase(BctSourceTestMixin, TestCase):
+    def test_duplicate_run_is_skipped_with_reason(self):
+        with source_run_lock(self.source.pk) as acquired, fake_scraper_run(SCRAPED_PAYLOAD) as (get, parse):
+            self.assertTrue(acquired)
+            result = run_scraper_for_source(self.source.pk)
+
+        self.assertTrue(result.startswith("Ignoré"), result)
+        get.assert_not_called()
+        self.assertFalse(ScrapedCurrencyRaw.objects.exists())
+        run = PipelineRun.objects.get(source=self.source)
+        self.assertEqual(run.status, 'skipped')
+        self.assertTrue(LogEntry.objects.filter(action='SCRAPER_RUN_ALREADY_IN_PROGRESS', source=self.source).exists())
+
+    def test_lock_is_released_after_run(self):
+        with fake_scraper_run(SCRAPED_PAYLOAD):
+            run_scraper_for_source(self.source.pk)
+            result = run_scraper_for_source(self.source.pk, force_refresh=True)
+
+        self.assertIsNone(cache.get(SOURCE_LOCK_KEY.format(source_id=self.source.pk)))
+        self.assertFalse(result.startswith("Ignoré"), result)
+
+    def test_lock_taken_over_after_expiry_is_not_released(self):
+        key = SOURCE_LOCK_KEY.format(source_id=self.source.pk)
+        with source_run_lock(self.source.pk):
+            cache.set(key, 'autre-execution') # Verrou expiré puis repris par une autre exécution
+
+        self.assertEqual(cache.get(key), 'autre-execution')
+
+    def test_batch_does_not_fetch_locked_source(self):
+        with source_run_lock(self.source.pk), mock.patch.object(httpx.AsyncClient, 'get') as get:
+            results = run_scrapers_batch([self.source.pk])
+
+        get.assert_not_called()
+        self.assertTrue(results[self.source.pk].startswith("Ignoré"), results[self.source.pk])
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES, SCRAPERS_RESULT_CACHE_TTL=0,
+    SCRAPERS_RETRY_MAX=2, SCRAPERS_RETRY_BACKOFF=10, SCRAPERS_CIRCUIT_THRESHOLD=3
+)
+class SourceHealthTestCase(BctSourceTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        retry_patch = mock.patch.object(run_scraper_for_source, 'apply_async')
+        self.apply_async = retry_patch.start()
+        self.addCleanup(retry_patch.stop)
+
+    def failing_run(self, attempt=0):
+        with fake_scraper_run(SCRAPED_PAYLOAD, response=fake_page(status_code=503)) as (get, parse):
+            return run_scraper_for_source(self.source.pk, attempt=attempt), get
+
+    def test_failure_schedules_retry_with_backoff(self):
+        result, _ = self.failing_run(attempt=1)
+
+        self.assertIn("Nouvelle tentative", result)
+        kwargs = self.apply_async.call_args.kwargs
+        self.assertEqual(kwargs['kwargs']['attempt'], 2)
+        self.assertTrue(10 <= kwargs['countdown'] <= 20, kwargs['countdown'])
+        self.assertEqual(SourceHealth.objects.get(source=self.source).echecs_consecutifs, 1)
+
+    def test_no_retry_after_last_attempt(self):
+        self.failing_run(attempt=2)
+        self.apply_async.assert_not_called()
+
+    def test_circuit_opens_then_probe_closes_it(self):
+        for _ in range(3):
+            self.failing_run()
+        health = SourceHealth.objects.get(source=self.source)
+        self.assertTrue(health.circuit_ouvert)
+        self.assertEqual(self.apply_async.call_count, 2) # Pas de nouvelle tentative une fois le disjoncteur ouvert
+        self.assertTrue(LogEntry.objects.filter(action='SCRAPER_CIRCUIT_OPENED', source=self.source).exists())
+
+        result, get = self.failing_run()
+        self.assertTrue(result.startswith("Ignoré"), result)
+        get.assert_not_called()
+
+        # Délai écoulé : l'exécution suivante sert de sonde.
+        SourceHealth.objects.filter(pk=self.source.pk).update(circuit_ouvert_jusqua=timezone.now())
+        with fake_scraper_run(SCRAPED_PAYLOAD):
+            result = run_scraper_for_source(self.source.pk)
+        self.assertTrue(result.startswith("Succès"), result)
+        health.refresh_from_db()
+        self.assertFalse(health.circuit_ouvert)
+        self.assertEqual(health.echecs_consecutifs, 0)
+        self.assertIsNotNone(health.derniere_reussite)
+        self.assertIsNotNone(health.latence_moyenne_ms)
+
+
+class ScraperParsingTestCase(TestCase):
+    def test_bct_fixture(self):
+        records = bct_scraper.parse((FIXTURES_DIR / 'bct_cours.html').read_bytes())
+
+        self.assertEqual(len(records), 30)
+        self.assertEqual(records[0]['code_iso'], 'USD')
+        self.assertEqual({record['date_publication'] for record in records}, {'2025-07-24'})
+        self.assertEqual(next(record['unite'] for record in records if record['code_iso'] == 'JPY'), 1000)
+
+    def test_boa_fixture_uses_latest_date_column(self):
+        records = boa_scraper.parse((FIXTURES_DIR / 'boa_taux.html').read_bytes())
+
+        self.assertEqual(len(records), 30)
+        self.assertEqual({record['date_publication'] for record in records}, {'2025-07-24'})
+
+    def test_date_label_with_entities_and_markup(self):
+        content = "<p>Journ&eacute;e du <b>24/07/2025</b></p><table></table>".encode('latin-1')
+
+        self.assertEqual(_parsing.find_date(content, 'Journée du'), '24/07/2025')
+        self.assertIsNone(_parsing.find_date(b"<p>Aucune date</p>", 'Journée du'))
@@ -1,9 +1,13 @@
 from django.utils.cache import add_never_cache_headers
 
+API_PATH_PREFIX = '/api/'
+
 class NoCacheMiddleware:
     """
     Ce middleware ajoute des en-têtes à chaque réponse pour dire
     au navigateur de ne jamais mettre cette page en cache.
+    Les réponses de l'API (/api/) gèrent elles-mêmes leur cache : requêtes conditionnelles
+    avec ETag / Last-Modified (voir api/conditional.py).
     """
     def __init__(self, get_response):
         self.get_response = get_response
@@ -12,7 +16,8 @@ class NoCacheMiddleware:
         # On récupère la réponse que Django s'apprêtait à envoyer
         response = self.get_response(request)
         
-        # On y ajoute les en-têtes "never_cache"
-        add_never_cache_headers(response)
+        # On y ajoute les en-têtes "never_cache", sauf pour l'API
+        if not request.path.startswith(API_PATH_PREFIX):
+            add_never_cache_headers(response)
         
         return response
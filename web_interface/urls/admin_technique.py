@@ -12,15 +12,19 @@ from web_interface.views.admin_technique import (
     manage_alias,
     manage_schedule,
     delete_schedule,
-    execute_scraper # NOUVEAU: Importation de la classe ExecuteScraperView
+    execute_scraper, # NOUVEAU: Importation de la classe ExecuteScraperView
+    pipeline_preview,
+    pipeline_stats
 )
 
 urlpatterns = [
     path('', dashboard.dashboard_view, name='admin_technique_dashboard'),
+    path('pipeline-stats/', pipeline_stats.pipeline_stats_view, name='admin_technique_pipeline_stats'),
     path('add-zone/', add_zone.AddZoneView.as_view(), name='admin_technique_add_zone'),
     path('delete-zone/<int:pk>/', delete_zone.DeleteZoneView.as_view(), name='admin_technique_delete_zone'),
     path('toggle-zone/<int:pk>/', toggle_zone.ToggleZoneView.as_view(), name='admin_technique_toggle_zone'),
     path('zone/<int:pk>/', zone_detail.ZoneDetailView.as_view(), name='admin_technique_zone_detail'),
+    path('zone/<int:pk>/pipeline-preview/', pipeline_preview.PipelinePreviewView.as_view(), name='admin_technique_pipeline_preview'),
     path('zone/<int:pk>/manage-source/', manage_source.ManageSourceView.as_view(), name='admin_technique_manage_source'),
     path('delete-source/<int:pk>/', delete_source.DeleteSourceView.as_view(), name='admin_technique_delete_source'),
     path('manage-alias/<int:raw_currency_id>/', manage_alias.ManageAliasView.as_view(), name='admin_technique_manage_alias'),
@@ -47,7 +47,7 @@ def dashboard_view(request):
             Q(actor=request.user) | # Use the actual user object here
             Q(impersonator=request.user) | # Use the actual user object here
             Q(action__in=[
-                "SOURCE_CONFIGURATION_FAILED", "SCRAPER_TIMEOUT", "SCRAPER_EXECUTION_ERROR",
+                "SOURCE_CONFIGURATION_FAILED", "SCRAPER_TIMEOUT", "SCRAPER_EXECUTION_ERROR", "SCRAPER_CIRCUIT_OPENED",
                 "PIPELINE_ERROR", "PIPELINE_UNEXPECTED_ERROR_START", "ZONE_DELETION_FAILED",
                 "SCHEDULE_MANAGEMENT_FAILED", "UNAUTHORIZED_ACCESS_ATTEMPT", 
             ])
@@ -39,11 +39,16 @@ class ExecuteScraperView(View):
         source = get_object_or_404(Source, pk=source_id)
         zone = source.zone
 
+        # « Forcer » : ignore les taux mis en cache par une exécution récente (planifiée ou manuelle)
+        force_refresh = request.POST.get('force_refresh') == '1'
+
         try:
             # Lancement de la tâche Celery d'exécution du scraper
-            run_scraper_for_source.delay(source.pk)
+            run_scraper_for_source.delay(source.pk, force_refresh=force_refresh)
             message_type_ui = "showSuccess"
             message_text_ui = f"Exécution manuelle du scraper pour '{source.nom}' lancée avec succès en arrière-plan."
+            if force_refresh:
+                message_text_ui += " La page est téléchargée à nouveau (cache ignoré)."
             log_level = 'info'
             action_type = 'SCRAPER_MANUAL_EXECUTION_STARTED'
 
@@ -56,7 +61,8 @@ class ExecuteScraperView(View):
                 details_prefix = f"L'administrateur {current_active_user_obj.email if current_active_user_obj else 'Utilisateur inconnu'} (ID: {current_active_user_obj.pk if current_active_user_obj else 'N/A'}, Rôle: {current_active_user_obj.get_role_display() if current_active_user_obj else 'N/A'})"
 
             log_details = (
-                f"{details_prefix} a lancé manuellement l'exécution du scraper pour la source '{source.nom}' (ID: {source.pk}) de la zone '{zone.nom}' (ID: {zone.pk})."
+                f"{details_prefix} a lancé manuellement l'exécution du scraper pour la source '{source.nom}' (ID: {source.pk}) de la zone '{zone.nom}' (ID: {zone.pk})"
+                f"{' en forçant le rafraîchissement (cache des taux ignoré)' if force_refresh else ''}."
             )
 
         except Exception as e:
@@ -7,6 +7,8 @@ from django.template.loader import render_to_string
 from core.models import Devise, DeviseAlias, ScrapedCurrencyRaw, ZoneMonetaire, Source 
 from .shared import get_daily_photocopy
 from logs.utils import log_action 
+from scrapers.tasks import reset_batch_fingerprints
+from core.alias_resolver import bump_alias_version
 from users.models import CustomUser 
 from django.db.models import Q 
 
@@ -97,6 +99,10 @@ class ManageAliasView(View):
             if aliases_to_delete_q: 
                 aliases_deleted_count = DeviseAlias.objects.filter(aliases_to_delete_q).delete()[0]
             
+            if aliases_deleted_count > 0:
+                bump_alias_version()
+                reset_batch_fingerprints()
+            
             if aliases_deleted_count > 0:
                 message_type_ui = "showInfo"
                 message_text_ui = f"Alias(es) pour '{raw_currency.nom_devise_brut or raw_currency.code_iso_brut}' supprimé(s) avec succès."
@@ -172,6 +178,8 @@ class ManageAliasView(View):
                     created_aliases_count += 1
                 else:
                     updated_aliases_count += 1
+            bump_alias_version()
+            reset_batch_fingerprints()
             
             message_type_ui = "showSuccess"
             message_text_ui = "Alias(es) enregistré(s) avec succès."
@@ -219,5 +227,6 @@ class ManageAliasView(View):
         html = render_to_string("admin_technique/partials/_raw_currency_table.html", context, request=request)
         
         response = HttpResponse(html)
-        response['HX-Trigger'] = f'{{"{message_type_ui}": "{message_text_ui}"}}'
+        # 'pipelinePreviewRefresh' recharge la simulation du pipeline affichée sur la page de zone.
+        response['HX-Trigger'] = f'{{"{message_type_ui}": "{message_text_ui}", "pipelinePreviewRefresh": true}}'
         return response
\ No newline at end of file
@@ -16,7 +16,7 @@ def get_available_scrapers():
         scraper_dir = settings.SCRAPERS_DIR
         if not os.path.isdir(scraper_dir):
             return []
-        return sorted([f for f in os.listdir(scraper_dir) if f.endswith('.py') and not f.startswith('__')])
+        return sorted([f for f in os.listdir(scraper_dir) if f.endswith('.py') and not f.startswith('_')]) # _*.py : modules d'aide, pas des scrapers
     except Exception:
         return []
 
@@ -43,6 +43,7 @@ class ManageSourceView(View):
             "zone": zone,
             "source": source,
             "available_scrapers": get_available_scrapers(),
+            "pipeline_engines": Source.MOTEUR_CHOICES,
             "current_user_role": request.user.role, # Use request.user.role
         }
         return render(request, "admin_technique/partials/form_manage_source.html", context)
@@ -79,6 +80,9 @@ class ManageSourceView(View):
         nom = request.POST.get("nom", "").strip()
         url_source = request.POST.get("url_source", "").strip()
         scraper_filename = request.POST.get("scraper_filename", "").strip()
+        moteur_pipeline = request.POST.get("moteur_pipeline", Source.MOTEUR_PYTHON).strip()
+        if moteur_pipeline not in dict(Source.MOTEUR_CHOICES):
+            moteur_pipeline = Source.MOTEUR_PYTHON
 
         if not all([nom, url_source, scraper_filename]):
             error_message = "Tous les champs sont obligatoires."
@@ -86,6 +90,7 @@ class ManageSourceView(View):
                 "zone": zone,
                 "source": None, 
                 "available_scrapers": get_available_scrapers(),
+                "pipeline_engines": Source.MOTEUR_CHOICES,
                 "error_message": error_message,
                 "current_user_role": request.user.role, # Use request.user.role
             }
@@ -110,7 +115,7 @@ class ManageSourceView(View):
         
         source, created = Source.objects.update_or_create(
             zone=zone, 
-            defaults={'nom': nom, 'url_source': url_source, 'scraper_filename': scraper_filename}
+            defaults={'nom': nom, 'url_source': url_source, 'scraper_filename': scraper_filename, 'moteur_pipeline': moteur_pipeline}
         )
         
         action_type = 'SOURCE_CONFIGURED' if is_creation else 'SOURCE_MODIFIED'
@@ -126,7 +131,7 @@ class ManageSourceView(View):
 
         log_details = (
             f"{details_prefix} {'a configuré' if is_creation else 'a modifié'} la source '{source.nom}' (ID: {source.pk}) pour la zone '{zone.nom}' (ID: {zone.pk}). "
-            f"Fichier scraper: {source.scraper_filename}, URL: {source.url_source}."
+            f"Fichier scraper: {source.scraper_filename}, URL: {source.url_source}, moteur du pipeline: {source.get_moteur_pipeline_display()}."
         )
 
         log_action(
@@ -0,0 +1,30 @@
+# web_interface/views/admin_technique/pipeline_preview.py
+
+from django.shortcuts import render, get_object_or_404
+from django.views import View
+from django.http import HttpResponse
+from core.models import ZoneMonetaire
+from core.pipeline import preview_pipeline
+
+
+class PipelinePreviewView(View):
+    """
+    Fragment HTMX de la page de zone : simulation du prochain passage du pipeline.
+    Rechargé après chaque modification d'alias (événement 'pipelinePreviewRefresh').
+    """
+    def get(self, request, *args, **kwargs):
+        # Access control: Ensure user is authenticated and is an ADMIN_TECH
+        if not request.user.is_authenticated or request.user.role != "ADMIN_TECH":
+            return HttpResponse("Accès non autorisé.", status=403)
+
+        zone = get_object_or_404(ZoneMonetaire, pk=kwargs.get('pk'))
+        preview = None
+        if hasattr(zone, 'source') and zone.source:
+            preview = preview_pipeline(zone.source.pk)
+
+        context = {
+            "zone": zone,
+            "preview": preview,
+            "current_user_role": request.user.role,
+        }
+        return render(request, "admin_technique/partials/_pipeline_preview.html", context)
@@ -0,0 +1,89 @@
+# web_interface/views/admin_technique/pipeline_stats.py
+
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.shortcuts import render, redirect
+from django.utils import timezone
+
+from core.models import PipelineRun
+from core.run_metrics import RUN_STAGES
+
+DEFAULT_PERIOD_DAYS = 7
+MAX_PERIOD_DAYS = 90
+
+
+def _percentile(values, fraction):
+    # Percentile « au rang le plus proche » d'une liste déjà triée.
+    if not values:
+        return None
+    rank = max(1, math.ceil(fraction * len(values)))
+    return values[rank - 1]
+
+
+def _p50_p95(values):
+    values = sorted(values)
+    return _percentile(values, 0.50), _percentile(values, 0.95)
+
+
+def pipeline_stats_view(request):
+    # Access control: Redirect if not authenticated via request.user or role is incorrect
+    if not request.user.is_authenticated or request.user.role != "ADMIN_TECH":
+        return redirect("login")
+
+    try:
+        days = min(max(int(request.GET.get('days', DEFAULT_PERIOD_DAYS)), 1), MAX_PERIOD_DAYS)
+    except ValueError:
+        days = DEFAULT_PERIOD_DAYS
+    since = timezone.now() - timedelta(days=days)
+
+    runs_by_source = defaultdict(list)
+    source_names = {}
+    runs = PipelineRun.objects.filter(started_at__gte=since, source__isnull=False).order_by('started_at').values_list(
+        'source_id', 'source__nom', 'started_at', 'duration_ms', 'query_count', 'status', 'stages'
+    )
+    for source_id, source_nom, started_at, duration_ms, query_count, run_status, stages in runs:
+        source_names[source_id] = source_nom
+        runs_by_source[source_id].append((started_at, duration_ms, query_count, run_status, stages))
+
+    sources_stats = []
+    for source_id, source_runs in runs_by_source.items():
+        duration_p50, duration_p95 = _p50_p95([run[1] for run in source_runs])
+        queries_p50, queries_p95 = _p50_p95([run[2] for run in source_runs])
+
+        stages_stats = []
+        for stage, label in RUN_STAGES:
+            stage_durations = [run[4][stage]['ms'] for run in source_runs if stage in run[4]]
+            if stage_durations:
+                p50, p95 = _p50_p95(stage_durations)
+                stages_stats.append({'name': stage, 'label': label, 'p50': p50, 'p95': p95})
+
+        durations_by_day = defaultdict(list)
+        for started_at, duration_ms, *_ in source_runs:
+            durations_by_day[timezone.localdate(started_at)].append(duration_ms)
+        daily_stats = []
+        for day, durations in sorted(durations_by_day.items()):
+            p50, p95 = _p50_p95(durations)
+            daily_stats.append({'day': day, 'runs': len(durations), 'p50': p50, 'p95': p95})
+
+        sources_stats.append({
+            'source_id': source_id,
+            'source_nom': source_names[source_id],
+            'runs': len(source_runs),
+            'errors': sum(1 for run in source_runs if run[3] == 'error'),
+            'duration_p50': duration_p50,
+            'duration_p95': duration_p95,
+            'queries_p50': queries_p50,
+            'queries_p95': queries_p95,
+            'stages': stages_stats,
+            'daily': daily_stats,
+        })
+    sources_stats.sort(key=lambda stats: stats['source_nom'])
+
+    context = {
+        "sources_stats": sources_stats,
+        "days": days,
+        "current_user_role": request.user.role,
+    }
+    return render(request, "admin_technique/pipeline_stats.html", context)
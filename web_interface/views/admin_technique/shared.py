@@ -1,6 +1,7 @@
 # web_interface/views/admin_technique/shared.py
 
-from core.models import Source, ScrapedCurrencyRaw, DeviseAlias, ZoneMonetaire
+from core.models import Source, ScrapedCurrencyRaw, ZoneMonetaire, SourceHealth
+from core.alias_resolver import get_alias_index
 from users.models import CustomUser 
 
 def get_daily_photocopy(source: Source):
@@ -22,8 +23,8 @@ def get_daily_photocopy(source: Source):
             date_publication_brut=latest_publication_date
         )
         
-        aliases = DeviseAlias.objects.select_related('devise_officielle').all()
-        aliases_dict = {alias.alias: alias.devise_officielle for alias in aliases}
+        # Index partagé et versionné : pas de rechargement de la table des alias à chaque appel
+        aliases_dict = get_alias_index()
         
         photocopy_of_the_day = sorted(
             raw_currencies_for_today,
@@ -38,9 +39,11 @@ def get_zones_with_status(request):
     Récupère toutes les zones et les enrichit avec
     le statut de mapping et de planification.
     MODIFICATION : Ajoute l'utilisateur AdminZone pour la zone et le rôle de l'utilisateur actuel.
+    Ajoute aussi la santé du scraper de la source (échecs, disjoncteur, latence), None si jamais exécuté.
     """
     zones = ZoneMonetaire.objects.prefetch_related('source', 'source__periodic_task', 'users').all()
     zones_with_status = []
+    health_by_source = {health.source_id: health for health in SourceHealth.objects.all()}
 
     # Get current user's role directly from request.user
     current_user_role_from_request = request.user.role if request.user.is_authenticated else None
@@ -49,6 +52,7 @@ def get_zones_with_status(request):
         unmapped_count = -1  # -1 signifie "pas de source"
         is_scheduled = False
         admin_zone_user = None # Initialiser à None
+        health = None
 
         if hasattr(zone, 'source') and zone.source:
             photocopy, aliases_dict = get_daily_photocopy(zone.source)
@@ -60,6 +64,8 @@ def get_zones_with_status(request):
 
             if zone.source.periodic_task and zone.source.periodic_task.enabled:
                 is_scheduled = True
+
+            health = health_by_source.get(zone.source.pk)
         
         # Use .filter().first() to get the AdminZone user safely
         admin_zone_user = CustomUser.objects.filter(
@@ -73,6 +79,7 @@ def get_zones_with_status(request):
             'unmapped_count': unmapped_count,
             'is_scheduled': is_scheduled,
             'admin_zone_user': admin_zone_user,
+            'health': health,
         })
     
     # Return the role from request.user, not session.
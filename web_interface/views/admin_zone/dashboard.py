@@ -1,7 +1,8 @@
 # web_interface/views/admin_zone/dashboard.py
 
 from django.shortcuts import render, redirect, get_object_or_404
-from core.models import Devise, ActivatedCurrency, ZoneMonetaire, Source, ScrapedCurrencyRaw, DeviseAlias
+from core.models import Devise, ActivatedCurrency, ZoneMonetaire, Source, ScrapedCurrencyRaw
+from core.alias_resolver import get_alias_index
 from logs.models import LogEntry
 from django.db.models import Q
 from django.views import View
@@ -50,9 +51,10 @@ class AdminZoneDashboardView(View):
                     raw_names_and_codes.add(raw_currency.code_iso_brut.upper())
 
             if raw_names_and_codes:
-                all_mapped_devises = Devise.objects.filter(
-                    aliases__alias__in=list(raw_names_and_codes)
-                ).distinct().order_by('code')
+                # Résolution via l'index d'alias partagé, sans requête sur DeviseAlias
+                alias_index = get_alias_index()
+                mapped_devises = {alias_index[identifier] for identifier in raw_names_and_codes if identifier in alias_index}
+                all_mapped_devises = sorted(mapped_devises, key=lambda devise: devise.code)
 
         # Get currently active currencies for this zone
         active_currency_objects = ActivatedCurrency.objects.filter(
@@ -1,7 +1,8 @@
 # web_interface/views/admin_zone/shared.py
 
 from users.models import CustomUser
-from core.models import Devise, ActivatedCurrency, Source, ScrapedCurrencyRaw, DeviseAlias
+from core.models import Devise, ActivatedCurrency, Source, ScrapedCurrencyRaw
+from core.alias_resolver import get_alias_index
 from django.db.models import Q # Add Q import for combined filtering in case needed elsewhere.
 
 def get_dashboard_context(user_id):
@@ -43,11 +44,10 @@ def get_dashboard_context(user_id):
                     raw_identifiers.add(raw_currency.code_iso_brut.upper())
             
             if raw_identifiers:
-                # Find all DeviseAlias entries where the 'alias' matches one of our raw_identifiers
-                # And then get the distinct official Devise objects linked by these aliases
-                all_mapped_devises_to_display = Devise.objects.filter(
-                    aliases__alias__in=list(raw_identifiers)
-                ).distinct().order_by('nom')
+                # Résolution via l'index d'alias partagé, sans requête sur DeviseAlias
+                alias_index = get_alias_index()
+                mapped_devises = {alias_index[identifier] for identifier in raw_identifiers if identifier in alias_index}
+                all_mapped_devises_to_display = sorted(mapped_devises, key=lambda devise: devise.nom)
         
     activated_devises_for_zone = ActivatedCurrency.objects.filter(zone=user.zone, is_active=True)
     active_codes = set(d.devise.code for d in activated_devises_for_zone)
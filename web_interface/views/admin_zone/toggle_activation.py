@@ -7,6 +7,8 @@ from django.template.loader import render_to_string
 from core.models import Devise, ActivatedCurrency, ZoneMonetaire
 from users.models import CustomUser
 from logs.utils import log_action
+from scrapers.tasks import reset_batch_fingerprints
+from core.latest_rates_cache import invalidate_latest_rates
 
 class ToggleActivationView(View):
     def post(self, request, devise_code):
@@ -62,6 +64,10 @@ class ToggleActivationView(View):
         old_status = "active" if activation.is_active else "inactive"
         activation.is_active = not activation.is_active
         activation.save()
+        # Le prochain scraping doit repasser par le pipeline, même si la page n'a pas changé.
+        reset_batch_fingerprints(zone=current_active_user_obj.zone)
+        # Les devises actives de la zone changent : nouveaux ETag pour l'API (/api/my-zone-currencies/).
+        invalidate_latest_rates([current_active_user_obj.zone.pk])
         new_status = "active" if activation.is_active else "inactive"
         
         # Build log details with impersonation info